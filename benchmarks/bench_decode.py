@@ -0,0 +1,115 @@
+"""Compare per-entity lazy decoding with the coordinator's single decode pass.
+
+Before: every entity looked its field up and parsed it inside
+``native_value``, and Home Assistant reads that property more than once per
+state write, so each tick cost roughly entities x reads x parse.
+
+After: ``ValueStore.decode`` parses every field once per tick and entities
+index a list, so a tick costs one parse per field plus cheap reads.
+
+Run from the repository root (Home Assistant must be importable)::
+
+    python benchmarks/bench_decode.py
+"""
+import sys
+import timeit
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from custom_components.eg4_inverter.decoder import ValueStore  # noqa: E402
+from custom_components.eg4_inverter.definitions import DEFINITION_LOOKUP  # noqa: E402
+from custom_components.eg4_inverter.util import read_field  # noqa: E402
+
+BATTERY_UNITS = 8
+# Property reads per entity per state write (state, attributes, ...)
+READS_PER_WRITE = 2
+TICKS = 200
+
+
+def _payload(group: str, index: int = 0) -> SimpleNamespace:
+    fields = {}
+    for key, _, definition in DEFINITION_LOOKUP[group]:
+        if definition.co2_parse:
+            fields[key] = "367.69 kG"
+        elif definition.numeric:
+            fields[key] = str(1000 + index)
+        else:
+            fields[key] = "text"
+    fields.update(noticeInfo="", batIndex=index, genDryContact="OFF")
+    return SimpleNamespace(**fields)
+
+
+def build_snapshot() -> dict:
+    battery = _payload("battery")
+    battery.battery_units = [
+        _payload("battery_units", index) for index in range(BATTERY_UNITS)
+    ]
+    return {
+        "runtime": _payload("runtime"),
+        "energy": _payload("energy"),
+        "settings": _payload("settings"),
+        "battery": battery,
+        "metrics": {"pollLag": 0.1, "queueDepth": 0},
+    }
+
+
+def entity_targets(data: dict):
+    """(payload, definition) for every entity the platforms would create."""
+    targets = [
+        (data[group], definition)
+        for group in ("runtime", "energy", "settings", "battery", "metrics")
+        for _, _, definition in DEFINITION_LOOKUP[group]
+    ]
+    for unit in data["battery"].battery_units:
+        targets += [
+            (unit, definition)
+            for _, _, definition in DEFINITION_LOOKUP["battery_units"]
+        ]
+    return targets
+
+
+def lazy_tick(targets) -> None:
+    for payload, definition in targets:
+        for _ in range(READS_PER_WRITE):
+            if definition.calc is not None:
+                definition.calc(payload)
+            else:
+                definition.decode(read_field(payload, definition.key))
+
+
+def main() -> None:
+    data = build_snapshot()
+    targets = entity_targets(data)
+
+    store = ValueStore()
+    store.decode(data)
+    slots = [
+        store.slot(group, key)
+        for group in ("runtime", "energy", "settings", "battery", "metrics")
+        for key, _, _ in DEFINITION_LOOKUP[group]
+    ]
+    slots += [
+        store.slot("battery_units", key, unit.batIndex)
+        for unit in data["battery"].battery_units
+        for key, _, _ in DEFINITION_LOOKUP["battery_units"]
+    ]
+
+    def single_pass_tick() -> None:
+        store.decode(data)
+        values = store.values
+        for slot in slots:
+            for _ in range(READS_PER_WRITE):
+                values[slot]
+
+    lazy = timeit.timeit(lambda: lazy_tick(targets), number=TICKS) / TICKS
+    single = timeit.timeit(single_pass_tick, number=TICKS) / TICKS
+    print(f"entities: {len(targets)}  battery units: {BATTERY_UNITS}")
+    print(f"per-entity decode : {lazy * 1e6:8.1f} us/tick")
+    print(f"single decode pass: {single * 1e6:8.1f} us/tick")
+    print(f"speedup           : {lazy / single:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
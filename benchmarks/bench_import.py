@@ -0,0 +1,112 @@
+"""Measure what importing each integration module costs a running Home Assistant.
+
+Every module is imported in a fresh interpreter that has already imported
+the Home Assistant modules that are loaded by the time an integration sets
+up (core, config entries, the sensor platforms, ...), so only the
+integration's own cost and whatever it drags in beyond those is timed
+(median of several runs). It also reports whether the import pulled in the
+client library or the MQTT and recorder integrations, which should only be
+loaded when used. Pass another checkout's root to compare, e.g.::
+
+    git worktree add /tmp/before <baseline commit>
+    python benchmarks/bench_import.py /tmp/before
+    python benchmarks/bench_import.py
+
+Needs Home Assistant and eg4_inverter_api installed in the interpreter.
+"""
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "custom_components.eg4_inverter"
+MODULES = [
+    PACKAGE,
+    f"{PACKAGE}.config_flow",
+    f"{PACKAGE}.sensor",
+    f"{PACKAGE}.binary_sensor",
+]
+# Already imported by Home Assistant before the integration is set up
+PRELOAD = [
+    "aiohttp",
+    "voluptuous",
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.aiohttp_client",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.device_registry",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.helpers.entity_registry",
+    "homeassistant.helpers.event",
+    "homeassistant.helpers.selector",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.components.sensor",
+    "homeassistant.components.binary_sensor",
+]
+# Should stay unloaded until they are actually used
+LAZY = ["eg4_inverter_api", "homeassistant.components.mqtt", "homeassistant.components.recorder"]
+RUNS = 7
+
+_PROBE = """
+import importlib, json, sys, time
+for name in {preload!r}:
+    importlib.import_module(name)
+started = time.perf_counter()
+importlib.import_module({module!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def probe(root: Path, module: str) -> dict | None:
+    """Import time and lazily-loaded modules for one import, in a fresh interpreter."""
+    code = _PROBE.format(preload=PRELOAD, module=module, lazy=LAZY)
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=root, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def platform_walks(root: Path) -> str | None:
+    """Definitions each platform iterates at setup, against the full table."""
+    code = (
+        "from custom_components.eg4_inverter import definitions as d\n"
+        "print(sum(len(v) for v in d.DEFINITION_LOOKUP.values()),"
+        " *(len(d.platform_definitions(p)) + len(d.per_battery_definitions(p))"
+        " for p in d.DEFINITION_PLATFORMS))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=root, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    total, sensors, binary_sensors = result.stdout.split()
+    return (
+        f"definitions: {total} in the shared table (decoded by the coordinator); "
+        f"the sensor platform walks {sensors}, binary_sensor {binary_sensors}"
+    )
+
+
+def main() -> None:
+    root = Path(sys.argv[1]).resolve() if len(sys.argv) > 1 else ROOT
+    print(f"checkout: {root}")
+    for module in MODULES:
+        samples = [probe(root, module) for _ in range(RUNS)]
+        samples = [sample for sample in samples if sample is not None]
+        if not samples:
+            print(f"{module:45s} import failed")
+            continue
+        median = statistics.median(sample["ms"] for sample in samples)
+        loaded = ", ".join(samples[0]["loaded"]) or "-"
+        print(f"{module:45s} {median:8.1f} ms   also loads: {loaded}")
+    if walks := platform_walks(root):
+        print(walks)
+
+
+if __name__ == "__main__":
+    main()
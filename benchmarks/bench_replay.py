@@ -0,0 +1,57 @@
+"""Profile the fetch, parse and decode path against a recorded capture.
+
+Record one with the "capture" advanced option (files land in
+``<config>/eg4_captures``), then run from the repository root with Home
+Assistant and eg4_inverter_api importable::
+
+    python benchmarks/bench_replay.py path/to/capture.jsonl.gz [ticks]
+
+The real ``EG4InverterAPI`` talks to a ``ReplaySession`` at speed 0, so
+every call returns the next recorded response with no network or sleeps:
+what is timed is the client's model parsing plus ``ValueStore.decode``.
+Wrap it in ``python -m cProfile -s cumtime`` for a per-function view.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from eg4_inverter_api import EG4InverterAPI  # noqa: E402
+
+from custom_components.eg4_inverter.decoder import ValueStore  # noqa: E402
+from custom_components.eg4_inverter.replay import (  # noqa: E402
+    ReplaySession,
+    load_capture,
+)
+
+
+async def run(path: str, ticks: int) -> None:
+    records = load_capture(path)
+    api = EG4InverterAPI("replay", "replay", session=ReplaySession(records, 0))
+    await api.login()
+    api.set_selected_inverter(inverterIndex=0)
+    store = ValueStore()
+
+    fetch = decode = 0.0
+    for _ in range(ticks):
+        started = time.perf_counter()
+        data = {
+            "runtime": await api.get_inverter_runtime_async(),
+            "energy": await api.get_inverter_energy_async(),
+            "battery": await api.get_inverter_battery_async(),
+        }
+        parsed = time.perf_counter()
+        store.decode(data)
+        fetch += parsed - started
+        decode += time.perf_counter() - parsed
+
+    units = len(getattr(data["battery"], "battery_units", None) or [])
+    print(f"records: {len(records)}  battery units: {units}  ticks: {ticks}")
+    print(f"client parse : {fetch / ticks * 1e6:8.1f} us/tick")
+    print(f"store decode : {decode / ticks * 1e6:8.1f} us/tick")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 500))
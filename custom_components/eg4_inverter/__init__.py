@@ -1,9 +1,10 @@
 import logging
+import time
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.core import HomeAssistant
-from .const import DOMAIN, PLATFORMS
-from .coordinator import EG4DataCoordinator
+from .const import DOMAIN, PLATFORMS, RELOAD_OPTIONS, CONF_SERIAL_NUMBER
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -12,21 +13,91 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     """Set up EG4 Inverter via configuration.yaml (if required in future)."""
     _LOGGER.info("EG4 Inverter integration async_setup() called")
     hass.data.setdefault(DOMAIN, {})
+    await async_setup_services(hass)
+    return True
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Migrate old entries to the current config entry version."""
+    if entry.version > 2:
+        # Downgraded from a future version
+        return False
+    if entry.version == 1:
+        # Version 1 used its title, "EG4 Inverter Integration - <base url>",
+        # as unique id, so a portal could only be added once; the inverter
+        # pick-list dedupes on the serial itself
+        unique_id = entry.unique_id
+        serial = entry.data.get(CONF_SERIAL_NUMBER)
+        if serial and not any(
+            other.unique_id == str(serial)
+            for other in hass.config_entries.async_entries(DOMAIN)
+            if other.entry_id != entry.entry_id
+        ):
+            unique_id = str(serial)
+        else:
+            _LOGGER.warning(
+                "Keeping unique id %s for EG4 entry %s: serial missing or taken",
+                entry.unique_id,
+                entry.title,
+            )
+        hass.config_entries.async_update_entry(entry, unique_id=unique_id, version=2)
+        _LOGGER.debug("Migrated EG4 entry %s to version 2", entry.title)
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    # Loaded here rather than at import so the config flow stays cheap
+    from .coordinator import EG4DataCoordinator
+    from .parallel import async_join_system
+    from .scheduler import async_get_scheduler
+
+    started = time.perf_counter()
     coordinator = EG4DataCoordinator(hass, entry)
     await coordinator.async_config_entry_first_refresh()
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    # Paralleled inverters are polled together and totalled as one system
+    coordinator.system = async_join_system(hass, coordinator)
+    async_get_scheduler(hass).async_register(entry.entry_id, coordinator)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+    _LOGGER.debug(
+        "EG4 entry %s set up in %.3fs", entry.entry_id, time.perf_counter() - started
+    )
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    from .parallel import async_leave_system
+    from .scheduler import async_get_scheduler
+
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
+        async_leave_system(hass, hass.data[DOMAIN][entry.entry_id])
+        async_get_scheduler(hass).async_unregister(entry.entry_id)
         hass.data[DOMAIN].pop(entry.entry_id)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Hand a removed entry's parallel system sensors to another member."""
+    from .parallel import async_hand_over_system
+
+    await async_hand_over_system(hass, entry.entry_id)
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply option changes live; only reload when the entity set changes."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    previous, current = coordinator.applied_options, dict(entry.options)
+    changed = {
+        key
+        for key in previous.keys() | current.keys()
+        if previous.get(key) != current.get(key)
+    }
+    coordinator.applied_options = current
+    if changed & RELOAD_OPTIONS:
+        await hass.config_entries.async_reload(entry.entry_id)
+    elif changed:
+        coordinator.async_apply_options()
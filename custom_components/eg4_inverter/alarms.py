@@ -0,0 +1,117 @@
+"""Incremental ingestion of the EG4 portal's alarm/event log."""
+import logging
+from collections import deque
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    EVENT_EG4_ALARM,
+    ALARM_LOG_PATH,
+    ALARM_PAGE_SIZE,
+    ALARM_MAX_PAGES,
+    ALARM_BUFFER_SIZE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+def _record_time(row: dict) -> str:
+    return str(row.get("startTime") or row.get("time") or row.get("eventTime") or "")
+
+
+def _record_id(row: dict) -> str:
+    record_id = row.get("id") or row.get("eventId")
+    if record_id is not None:
+        return str(record_id)
+    return f"{_record_time(row)}|{row.get('eventText') or row.get('event')}"
+
+
+class EG4AlarmLog:
+    """Pages through the alarm log, remembering how far we have read.
+
+    The cursor is the newest record time seen plus the ids recorded at that
+    exact time, so a page boundary or identical timestamps never produce
+    duplicates. It is persisted so restarts do not re-download history.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, session, base_url: str):
+        self.hass = hass
+        self._session = session
+        self._url = f"{base_url.rstrip('/')}{ALARM_LOG_PATH}"
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.alarms")
+        self._cursor: dict | None = None
+        self._loaded = False
+        self.recent: deque[dict] = deque(maxlen=ALARM_BUFFER_SIZE)
+
+    def _is_new(self, row: dict) -> bool:
+        if self._cursor is None:
+            return True
+        row_time = _record_time(row)
+        if row_time != self._cursor["time"]:
+            return row_time > self._cursor["time"]
+        return _record_id(row) not in self._cursor["ids"]
+
+    async def _async_fetch_page(self, serial_number: str, page: int):
+        async with self._session.post(
+            self._url,
+            data={"serialNum": serial_number, "page": page, "rows": ALARM_PAGE_SIZE},
+        ) as resp:
+            resp.raise_for_status()
+            payload = await resp.json(content_type=None)
+        return payload.get("rows") or payload.get("data") or []
+
+    async def async_update(self, serial_number: str, throttle) -> list[dict]:
+        """Fetch records newer than the cursor and return them oldest first."""
+        if not self._loaded:
+            stored = await self._store.async_load() or {}
+            self._cursor = stored.get("cursor")
+            self.recent.extend(stored.get("recent", []))
+            self._loaded = True
+
+        first_run = self._cursor is None
+        new_rows: list[dict] = []
+        for page in range(1, ALARM_MAX_PAGES + 1):
+            await throttle()
+            rows = await self._async_fetch_page(serial_number, page)
+            fresh = [row for row in rows if self._is_new(row)]
+            new_rows.extend(fresh)
+            # Newest first: once a page contains old records we have caught up
+            if first_run or len(fresh) < len(rows) or len(rows) < ALARM_PAGE_SIZE:
+                break
+
+        if not new_rows:
+            return []
+
+        new_rows.sort(key=_record_time)
+        newest = _record_time(new_rows[-1])
+        ids = [_record_id(row) for row in new_rows if _record_time(row) == newest]
+        if self._cursor is not None and self._cursor["time"] == newest:
+            ids += self._cursor["ids"]
+        self._cursor = {"time": newest, "ids": ids}
+        self.recent.extend(new_rows)
+        self._store.async_delay_save(self._data_to_save, 30)
+
+        # On the very first read everything is history, not news
+        return [] if first_run else new_rows
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"cursor": self._cursor, "recent": list(self.recent)}
+
+    def async_fire_events(self, rows: list[dict], entry_id: str, serial_number: str):
+        """Put newly seen alarm records on the event bus (and so the logbook)."""
+        for row in rows:
+            self.hass.bus.async_fire(
+                EVENT_EG4_ALARM,
+                {
+                    "entry_id": entry_id,
+                    "serial_number": serial_number,
+                    "time": _record_time(row),
+                    "event": row.get("eventText") or row.get("event"),
+                    "record": row,
+                },
+            )
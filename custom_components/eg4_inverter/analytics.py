@@ -0,0 +1,170 @@
+"""Incremental pack analytics over the per-battery module values."""
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, ANALYTICS_ALPHA, ANALYTICS_SOH_MIN_DAYS
+from .decoder import PER_BATTERY_GROUP, ValueStore
+
+STORAGE_VERSION = 1
+SECONDS_PER_DAY = 86400
+
+
+class RollingStat:
+    """EWMA mean and variance plus all-time min/max, in constant memory."""
+
+    __slots__ = ("mean", "var", "min", "max")
+
+    def __init__(self, mean=None, var=0.0, min=None, max=None) -> None:
+        self.mean = mean
+        self.var = var
+        self.min = min
+        self.max = max
+
+    def update(self, value: float, alpha: float = ANALYTICS_ALPHA) -> None:
+        if self.mean is None:
+            self.mean = self.min = self.max = value
+            return
+        diff = value - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.var = (1 - alpha) * (self.var + diff * increment)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class TrendStat:
+    """Least-squares slope of a value over time, updated one sample at a time."""
+
+    __slots__ = ("count", "mean_t", "mean_y", "cov", "var_t", "first_t")
+
+    def __init__(
+        self, count=0, mean_t=0.0, mean_y=0.0, cov=0.0, var_t=0.0, first_t=None
+    ) -> None:
+        self.count = count
+        self.mean_t = mean_t
+        self.mean_y = mean_y
+        self.cov = cov
+        self.var_t = var_t
+        self.first_t = first_t
+
+    def update(self, t: float, y: float) -> None:
+        if self.first_t is None:
+            self.first_t = t
+        self.count += 1
+        dt = t - self.mean_t
+        self.mean_t += dt / self.count
+        self.mean_y += (y - self.mean_y) / self.count
+        self.cov += dt * (y - self.mean_y)
+        self.var_t += dt * (t - self.mean_t)
+
+    def slope(self, t: float, min_span: float) -> float | None:
+        """Change per unit of t, once the samples span at least ``min_span``."""
+        if self.first_t is None or t - self.first_t < min_span or self.var_t <= 0:
+            return None
+        return self.cov / self.var_t
+
+    def as_dict(self) -> dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class ModuleStats:
+    """Rolling statistics for one battery module."""
+
+    __slots__ = ("cell_spread", "max_temp", "soh")
+
+    def __init__(self, stored: dict[str, Any] | None = None) -> None:
+        stored = stored or {}
+        self.cell_spread = RollingStat(**stored.get("cell_spread", {}))
+        self.max_temp = RollingStat(**stored.get("max_temp", {}))
+        self.soh = TrendStat(**stored.get("soh", {}))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {slot: getattr(self, slot).as_dict() for slot in self.__slots__}
+
+
+class PackAnalytics:
+    """Per-module rolling stats, folded into pack-level figures each poll.
+
+    Reads the module values the coordinator has already decoded into the
+    ValueStore, so it does no parsing of its own, and keeps a fixed set of
+    running sums per module rather than any history. The sums are persisted
+    so the slow SoH trend survives restarts.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, store: ValueStore) -> None:
+        self._store = store
+        self._storage = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.analytics")
+        self.modules: dict[str, ModuleStats] = {}
+
+    async def async_load(self) -> None:
+        stored = await self._storage.async_load() or {}
+        self.modules = {
+            index: ModuleStats(stats) for index, stats in stored.items()
+        }
+
+    def _value(self, key: str, bat_index: Any) -> float | None:
+        return self._store[self._store.slot(PER_BATTERY_GROUP, key, bat_index)]
+
+    def update(self, data: dict[str, Any], timestamp: float) -> dict[str, Any] | None:
+        """Fold this poll's modules into the stats; return the pack figures."""
+        units = getattr(data.get("battery"), "battery_units", None) or []
+        if not units:
+            return None
+
+        day = timestamp / SECONDS_PER_DAY
+        socs = []
+        worst_spread = None
+        hottest = None
+        decline = None
+        for unit in units:
+            bat_index = getattr(unit, "batIndex", None)
+            # Keys are strings so the stored form round-trips through JSON
+            stats = self.modules.setdefault(str(bat_index), ModuleStats())
+
+            high = self._value("batMaxCellVoltage", bat_index)
+            low = self._value("batMinCellVoltage", bat_index)
+            if high is not None and low is not None:
+                stats.cell_spread.update((high - low) * 1000)
+                if worst_spread is None or stats.cell_spread.mean > worst_spread.mean:
+                    worst_spread = stats.cell_spread
+
+            temp = self._value("batMaxCellTemp", bat_index)
+            if temp is not None:
+                stats.max_temp.update(temp)
+                if hottest is None or stats.max_temp.mean > hottest[1].mean:
+                    hottest = (bat_index, stats.max_temp)
+
+            soh = self._value("soh", bat_index)
+            if soh is not None:
+                stats.soh.update(day, soh)
+                slope = stats.soh.slope(day, ANALYTICS_SOH_MIN_DAYS)
+                if slope is not None:
+                    # Reported as a positive decline, percent per year
+                    rate = -slope * 365
+                    decline = rate if decline is None else max(decline, rate)
+
+            soc = self._value("soc", bat_index)
+            if soc is not None:
+                socs.append(soc)
+
+        self._storage.async_delay_save(self._data_to_save, 300)
+        return {
+            "cellSpread": _round(worst_spread and worst_spread.mean),
+            "cellSpreadStdDev": _round(worst_spread and worst_spread.var**0.5),
+            "socSpread": _round(max(socs) - min(socs)) if socs else None,
+            "hottestModule": hottest[0] if hottest else None,
+            "hottestModuleTemp": _round(hottest and hottest[1].mean),
+            "sohDeclineRate": _round(decline),
+        }
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {index: stats.as_dict() for index, stats in self.modules.items()}
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 2)
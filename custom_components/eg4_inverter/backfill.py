@@ -0,0 +1,264 @@
+"""Fill holes in the power sensors' statistics from the portal's day charts.
+
+While Home Assistant is down (or the portal unreachable) the runtime power
+sensors record nothing. The portal keeps a 5-minute chart per day of PV,
+battery, grid and load power, so once polling recovers the missing hours
+are read from it, one request per day, and imported into the long-term
+statistics of the matching sensors. The end of the last imported hour is
+kept as a watermark, so a restart never fetches or imports an hour twice.
+"""
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    BACKFILL_CHART_PATH,
+    BACKFILL_MIN_GAP_SECONDS,
+    BACKFILL_MAX_DAYS,
+    BACKFILL_RETRY_SECONDS,
+    BACKFILL_MAX_ATTEMPTS,
+)
+from .util import parse_float
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+HOUR = timedelta(hours=1)
+
+# Runtime sensor key -> (chart field, sign). Grid and battery are signed in
+# the chart; each direction has its own sensor, so the other half reads 0.
+CHART_FIELDS = {
+    "ppv": ("solarPv", 1),
+    "consumptionPower": ("consumption", 1),
+    "pToUser": ("gridPower", 1),
+    "pToGrid": ("gridPower", -1),
+    "pDisCharge": ("batteryDischarging", 1),
+    "pCharge": ("batteryDischarging", -1),
+}
+
+
+def _point_time(row: dict[str, Any]) -> datetime | None:
+    """Chart times are the station's local time, taken as HA's time zone."""
+    if text := row.get("time"):
+        parsed = dt_util.parse_datetime(str(text))
+    else:
+        try:
+            parsed = datetime(
+                int(row["year"]),
+                int(row["month"]),
+                int(row["day"]),
+                int(row.get("hour", 0)),
+                int(row.get("minute", 0)),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+    if parsed is not None and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
+    return parsed
+
+
+def hourly_statistics(
+    rows: list[dict[str, Any]], start: datetime, end: datetime
+) -> dict[str, list[dict[str, Any]]]:
+    """Mean/min/max per sensor key for each whole hour in [start, end)."""
+    buckets: dict[tuple[str, datetime], list[float]] = defaultdict(list)
+    for row in rows:
+        point = _point_time(row)
+        if point is None:
+            continue
+        hour = dt_util.as_utc(point).replace(minute=0, second=0, microsecond=0)
+        if not start <= hour < end:
+            continue
+        for key, (field, sign) in CHART_FIELDS.items():
+            value = parse_float(row.get(field))
+            if value is not None:
+                buckets[(key, hour)].append(max(value * sign, 0.0))
+
+    stats: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for (key, hour), values in sorted(buckets.items(), key=lambda item: item[0][1]):
+        stats[key].append(
+            {
+                "start": hour,
+                "mean": sum(values) / len(values),
+                "min": min(values),
+                "max": max(values),
+            }
+        )
+    return stats
+
+
+class EG4Backfill:
+    """Tracks the sample timeline and backfills the gaps it finds.
+
+    ``last_sample`` is the time of the newest runtime poll that succeeded,
+    persisted (lazily) so a gap that spans a restart is noticed too.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, session, base_url: str):
+        self.hass = hass
+        self._entry_id = entry_id
+        self._session = session
+        self._url = f"{base_url.rstrip('/')}{BACKFILL_CHART_PATH}"
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.backfill")
+        self.last_sample: float | None = None
+        self.watermark: float | None = None
+        # Start of a gap whose backfill failed, retried after a while
+        self.retry_start: float | None = None
+        self.attempts = 0
+        self._retry_at = 0.0
+        self.imported_hours = 0
+        self.running = False
+
+    async def async_load(self) -> None:
+        stored = await self._store.async_load() or {}
+        self.last_sample = stored.get("last_sample")
+        self.watermark = stored.get("watermark")
+        self.retry_start = stored.get("retry_start")
+        self.attempts = stored.get("attempts", 0)
+
+    def note_sample(self, timestamp: float) -> tuple[datetime, datetime] | None:
+        """Record a good runtime poll; return the gap before it, if any."""
+        previous, self.last_sample = self.last_sample, timestamp
+        self._store.async_delay_save(self._data_to_save, 60)
+        starts = []
+        if previous is not None and timestamp - previous >= BACKFILL_MIN_GAP_SECONDS:
+            starts.append(previous)
+        if self.retry_start is not None and time.monotonic() >= self._retry_at:
+            starts.append(self.retry_start)
+        if self.running or not starts:
+            return None
+        start = max(min(starts), self.watermark or 0.0)
+        # Whole hours only, and only those that have already ended. The hour
+        # the gap starts in was partly sampled, and the recorder has compiled
+        # it from those states, so it is left alone.
+        start_dt = dt_util.utc_from_timestamp(start)
+        hour = start_dt.replace(minute=0, second=0, microsecond=0)
+        start_dt = hour if start_dt == hour else hour + HOUR
+        end_dt = dt_util.utc_from_timestamp(timestamp).replace(
+            minute=0, second=0, microsecond=0
+        )
+        start_dt = max(start_dt, end_dt - timedelta(days=BACKFILL_MAX_DAYS))
+        if start_dt >= end_dt:
+            return None
+        return start_dt, end_dt
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "last_sample": self.last_sample,
+            "watermark": self.watermark,
+            "retry_start": self.retry_start,
+            "attempts": self.attempts,
+        }
+
+    async def _async_fetch_day(self, serial_number: str, day: str):
+        async with self._session.post(
+            self._url, data={"serialNum": serial_number, "dateText": day}
+        ) as resp:
+            resp.raise_for_status()
+            payload = await resp.json(content_type=None)
+        if not isinstance(payload, dict):
+            raise ValueError("unexpected chart response")
+        return payload
+
+    async def async_backfill(
+        self, gap: tuple[datetime, datetime], serial_number: str, fetch
+    ) -> None:
+        """Fetch the day charts covering the gap and import the hours in it.
+
+        ``fetch`` is the coordinator's ``_async_fetch``, so the chart requests
+        share the rate limit, error classes, retries and relogin of the
+        other endpoints.
+        """
+        start, end = gap
+        self.running = True
+        try:
+            rows: list[dict[str, Any]] = []
+            first = dt_util.as_local(start).date()
+            last = dt_util.as_local(end - HOUR).date()
+            for offset in range((last - first).days + 1):
+                day = (first + timedelta(days=offset)).isoformat()
+                result = await fetch(
+                    "backfill", partial(self._async_fetch_day, serial_number, day)
+                )
+                if not result.ok:
+                    self._failed(start, end, result.error or "backing off")
+                    return
+                rows += result.data.get("data") or []
+            self.imported_hours += self._import(hourly_statistics(rows, start, end))
+        except HomeAssistantError as err:
+            self._failed(start, end, err)
+            return
+        finally:
+            self.running = False
+        self.watermark = end.timestamp()
+        self.retry_start = None
+        self.attempts = 0
+        self._store.async_delay_save(self._data_to_save, 0)
+        _LOGGER.info("Backfilled EG4 power statistics from %s to %s", start, end)
+
+    def _failed(self, start: datetime, end: datetime, reason: Any) -> None:
+        """Retry the gap after a while, or give up on it after a few tries."""
+        self.attempts += 1
+        if self.attempts >= BACKFILL_MAX_ATTEMPTS:
+            _LOGGER.warning(
+                "EG4 backfill of %s to %s failed (%s), giving up after %d attempts",
+                start,
+                end,
+                reason,
+                self.attempts,
+            )
+            self.retry_start = None
+            self.attempts = 0
+        else:
+            _LOGGER.warning("EG4 backfill of %s to %s failed: %s", start, end, reason)
+            self.retry_start = start.timestamp()
+            self._retry_at = time.monotonic() + BACKFILL_RETRY_SECONDS
+        self._store.async_delay_save(self._data_to_save, 0)
+
+    def _import(self, stats: dict[str, list[dict[str, Any]]]) -> int:
+        """Import hourly rows into the statistics of the matching sensors."""
+        if "recorder" not in self.hass.config.components:
+            return 0
+        from homeassistant.components.recorder.statistics import (
+            async_import_statistics,
+        )
+
+        registry = er.async_get(self.hass)
+        imported = 0
+        for key, rows in stats.items():
+            entity_id = registry.async_get_entity_id(
+                "sensor", DOMAIN, f"{self._entry_id}_runtime_{key}"
+            )
+            if entity_id is None or not rows:
+                continue
+            async_import_statistics(self.hass, _metadata(entity_id), rows)
+            imported += len(rows)
+        return imported
+
+
+def _metadata(entity_id: str) -> dict[str, Any]:
+    metadata = {
+        "has_mean": True,
+        "has_sum": False,
+        "name": None,
+        "source": "recorder",
+        "statistic_id": entity_id,
+        "unit_of_measurement": "W",
+    }
+    try:
+        from homeassistant.components.recorder.models import StatisticMeanType
+    except ImportError:
+        return metadata
+    # Newer recorders describe the mean by its type
+    metadata["mean_type"] = StatisticMeanType.ARITHMETIC
+    return metadata
@@ -1,22 +1,23 @@
 import logging
-from typing import Any, Dict
-from homeassistant.components.binary_sensor import (
-    BinarySensorEntity,
-    BinarySensorDeviceClass,
-)
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any
+from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.typing import DiscoveryInfoType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .coordinator import EG4DataCoordinator
 from .const import DOMAIN
 from .definitions import (
-    PER_BATTERY_DEFS,
-    BATTERY_SUMMARY_SENSORS,
-    ENERGY_SENSORS,
-    RUNTIME_SENSORS,
+    EG4Definition,
+    platform_definitions,
+    per_battery_definitions,
 )
+from .subset import preset_groups
+
+if TYPE_CHECKING:
+    # The coordinator is already loaded by the time platforms set up
+    from .coordinator import EG4DataCoordinator, EG4EndpointCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,43 +31,26 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up EG4 inverter binary sensors from a config entry."""
-    coordinator: EG4DataCoordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator: "EG4DataCoordinator" = hass.data[DOMAIN][entry.entry_id]
 
     entities = []
-
-    # BATTERY SUMMARY BINARY SENSORS
-    for sensor_def in BATTERY_SUMMARY_SENSORS:
-        if sensor_def.get("type", "") == "binary_sensor":
-            entities.append(
-                EG4InverterBinarySensor(coordinator, entry, sensor_def, "battery")
-            )
-
-    # ENERGY BINARY SENSORS
-    for sensor_def in ENERGY_SENSORS:
-        if sensor_def.get("type", "") == "binary_sensor":
-            entities.append(
-                EG4InverterBinarySensor(coordinator, entry, sensor_def, "energy")
-            )
-
-    # RUNTIME BINARY SENSORS
-    for sensor_def in RUNTIME_SENSORS:
-        if sensor_def.get("type", "") == "binary_sensor":
-            entities.append(
-                EG4InverterBinarySensor(coordinator, entry, sensor_def, "runtime")
-            )
+    groups = preset_groups(entry)
+
+    # BATTERY SUMMARY, ENERGY AND RUNTIME BINARY SENSORS
+    for parent_key, sensor_def in platform_definitions("binary_sensor"):
+        if parent_key not in groups:
+            continue
+        entities.append(
+            EG4InverterBinarySensor(coordinator, entry, sensor_def, parent_key)
+        )
 
     # PER-BATTERY BINARY SENSORS
-    battery_data = coordinator.data.get("battery", {})
-    battery_units = battery_data.battery_units or []
+    battery_units = []
+    if "battery_units" in groups and coordinator.data.get("battery") is not None:
+        battery_units = coordinator.data["battery"].battery_units or []
     for binfo in battery_units:
-        for subdef in PER_BATTERY_DEFS:
-            subdef = subdef.copy()
-            if subdef["type"] != "binary_sensor":
-                continue
-            name_template = subdef.get("name", "")
-            dynamic_name = name_template.format(binfo=binfo)
-            if name_template != dynamic_name:
-                subdef["name"] = dynamic_name
+        for subdef in per_battery_definitions("binary_sensor"):
+            subdef = replace(subdef, name=subdef.name.format(binfo=binfo))
             entities.append(
                 EG4PerBatteryBinarySensor(coordinator, entry, binfo, subdef)
             )
@@ -77,30 +61,17 @@ async def async_setup_entry(
 # -------------------------------------------------------------------------
 # BASE BINARY SENSOR CLASSES
 # -------------------------------------------------------------------------
-class EG4BaseBinarySensor(BinarySensorEntity):
-    """Common base for EG4 binary sensors that integrates with the coordinator."""
+class EG4BaseBinarySensor(
+    CoordinatorEntity["EG4EndpointCoordinator"], BinarySensorEntity
+):
+    """Common base for EG4 binary sensors, subscribed to their endpoint's coordinator."""
 
-    def __init__(self, coordinator, entry):
+    def __init__(self, coordinator: "EG4DataCoordinator", entry, group: str):
         """Initialize the base binary sensor."""
-        self._coordinator = coordinator
+        super().__init__(coordinator.child_for(group))
+        self._parent = coordinator
         self._entry = entry
 
-    @property
-    def should_poll(self) -> bool:
-        """No polling, coordinator notifies us."""
-        return False
-
-    async def async_added_to_hass(self):
-        """When entity is added to HA, subscribe to coordinator updates."""
-        self.async_on_remove(
-            self._coordinator.async_add_listener(self.async_write_ha_state)
-        )
-
-    @property
-    def available(self) -> bool:
-        """Return true if coordinator was able to update successfully."""
-        return self._coordinator.last_update_success
-
     @property
     def device_info(self):
         """Put all sensors under one device in the UI."""
@@ -114,27 +85,20 @@ class EG4BaseBinarySensor(BinarySensorEntity):
 class EG4InverterBinarySensor(EG4BaseBinarySensor):
     """A binary sensor for defined data points in battery, runtime, or energy."""
 
-    def __init__(self, coordinator, entry, sensor_def: Dict[str, Any], parent_key: str):
-        super().__init__(coordinator, entry)
+    def __init__(self, coordinator, entry, sensor_def: EG4Definition, parent_key: str):
+        super().__init__(coordinator, entry, parent_key)
         self._sensor_def = sensor_def
         self._parent_key = parent_key
+        self._slot = coordinator.values.slot(parent_key, sensor_def.key)
 
-        self._attr_unique_id = f"{entry.entry_id}_{parent_key}_{sensor_def['key']}"
-        self._attr_name = sensor_def.get("name", sensor_def["key"])
-        self._attr_device_class = sensor_def.get("device_class")
+        self._attr_unique_id = f"{entry.entry_id}_{parent_key}_{sensor_def.key}"
+        self._attr_name = sensor_def.name
+        self._attr_device_class = sensor_def.device_class
 
     @property
     def is_on(self) -> bool:
-        data = self._coordinator.data.get(self._parent_key, {})
-        try:
-            raw_value = getattr(data, self._sensor_def["key"])
-        except Exception as e:
-            raw_value = data.get(self._sensor_def["key"], False)
+        return self._parent.values[self._slot]
 
-        calc_func = self._sensor_def.get("calc")
-        if calc_func:
-            return calc_func(data)
-        return bool(raw_value)
 
 class EG4PerBatteryBinarySensor(EG4BaseBinarySensor):
     """A binary sensor for each battery in battery_units."""
@@ -143,27 +107,21 @@ class EG4PerBatteryBinarySensor(EG4BaseBinarySensor):
         self,
         coordinator,
         entry,
-        battery_info: Dict[str, Any],
-        sensor_def: Dict[str, Any],
+        battery_info: Any,
+        sensor_def: EG4Definition,
     ):
-        super().__init__(coordinator, entry)
-        self._battery_info = battery_info
+        super().__init__(coordinator, entry, "battery_units")
         self._sensor_def = sensor_def
+        self._slot = coordinator.values.slot(
+            "battery_units", sensor_def.key, battery_info.batIndex
+        )
 
         battery_idx = battery_info.batIndex or "Unknown"
-        key = sensor_def["key"]
+        key = sensor_def.key
         self._attr_unique_id = f"{entry.entry_id}_battery_{battery_idx}_{key}"
-        self._attr_name = sensor_def.get("name", f"{battery_idx} {key}")
-        self._attr_device_class = sensor_def.get("device_class")
+        self._attr_name = sensor_def.name
+        self._attr_device_class = sensor_def.device_class
 
     @property
     def is_on(self) -> bool:
-        try:
-            raw_value = getattr(self._battery_info, self._sensor_def["key"], None)
-        except Exception as e:
-            raw_value = self._battery_info.get(self._sensor_def["key"])
-
-        calc_func = self._sensor_def.get("calc")
-        if calc_func:
-            return calc_func(self._battery_info)
-        return bool(raw_value)
+        return self._parent.values[self._slot]
@@ -0,0 +1,90 @@
+"""Learn the dongle's upload cadence from runtime ``deviceTime`` changes."""
+from collections import deque
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CADENCE_SAMPLES,
+    CADENCE_MIN_PERIOD_SECONDS,
+    CADENCE_MAX_PERIOD_SECONDS,
+    CADENCE_MARGIN_SECONDS,
+    CADENCE_PROBE_SECONDS,
+    CADENCE_RETRY_SECONDS,
+    CADENCE_MAX_MISSES,
+)
+
+
+class UploadCadence:
+    """Predict when the next dongle upload will be visible in the cloud.
+
+    The period is the smallest recent gap between successive ``deviceTime``
+    values. Those come from the dongle's own clock, so they do not depend on
+    when we poll, and a poll that skipped uploads only sees a multiple of
+    the real period.
+
+    The phase is a monotonic anchor at the latest upload. An upload can
+    only be seen after it happened, so whenever a predicted poll finds new
+    data the anchor moves to that upload and is nudged a little earlier;
+    when one misses, the anchor is reset to the request that eventually
+    sees it. It settles just after the real upload time.
+    """
+
+    def __init__(self) -> None:
+        self._device_time = None
+        self._gaps: deque[float] = deque(maxlen=CADENCE_SAMPLES)
+        self._anchor: float | None = None
+        self.period: float | None = None
+        # Polls in a row that returned the deviceTime we already had
+        self.unchanged = 0
+
+    def observe(self, device_time: Any, requested: float) -> bool:
+        """Record a poll's deviceTime; return False if it is not new data.
+
+        ``requested`` is the monotonic time the runtime request was sent.
+        """
+        parsed = dt_util.parse_datetime(str(device_time)) if device_time else None
+        if parsed is None:
+            # Nothing to compare against, so never hold back an update
+            return True
+        previous = self._device_time
+        if parsed == previous:
+            self.unchanged += 1
+            return False
+
+        missed = self.unchanged > 0
+        self._device_time = parsed
+        self.unchanged = 0
+        if previous is not None:
+            gap = (parsed - previous).total_seconds()
+            if CADENCE_MIN_PERIOD_SECONDS <= gap <= CADENCE_MAX_PERIOD_SECONDS:
+                self._gaps.append(gap)
+                self.period = min(self._gaps)
+
+        if self._anchor is not None and self.period is not None and not missed:
+            periods = round((requested - self._anchor) / self.period)
+            expected = self._anchor + periods * self.period
+            if expected <= requested:
+                self._anchor = expected - CADENCE_PROBE_SECONDS
+                return True
+        self._anchor = requested
+        return True
+
+    def next_delay(self, now: float, interval: float) -> float | None:
+        """Seconds until the next aligned poll, or None to use the fixed grid.
+
+        Aligned polls stay roughly ``interval`` apart: the upload nearest to
+        one interval from now is picked, but always a later one than the
+        upload we last saw. If the upload we aimed for has not shown up the
+        poll is retried shortly; after several misses the dongle is assumed
+        quiet and the fixed grid takes over until new data appears.
+        """
+        if self._anchor is None or self.period is None:
+            return None
+        if self.unchanged and now > self._anchor + self.period:
+            if self.unchanged > CADENCE_MAX_MISSES:
+                return None
+            return CADENCE_RETRY_SECONDS
+        target = self._anchor + CADENCE_MARGIN_SECONDS
+        periods = max(1, round((now + interval - target) / self.period))
+        return target + periods * self.period - now
@@ -0,0 +1,84 @@
+"""Deferred loading of the eg4_inverter_api client and reuse of flow logins."""
+import importlib
+import time
+from types import ModuleType
+from typing import Any
+
+from aiohttp import ClientSession
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
+
+from .const import (
+    DOMAIN,
+    CONF_USERNAME,
+    CONF_BASE_URL,
+    CONF_SERIAL_NUMBER,
+    DATA_LOGIN_CACHE,
+    LOGIN_CACHE_TTL_SECONDS,
+)
+
+CLIENT_MODULE = "eg4_inverter_api"
+
+
+def _import_client() -> ModuleType:
+    module = importlib.import_module(CLIENT_MODULE)
+    importlib.import_module(f"{CLIENT_MODULE}.exceptions")
+    return module
+
+
+async def async_import_client(hass: HomeAssistant) -> ModuleType:
+    """Import the client library in the executor, off the event loop.
+
+    Nothing in the integration imports it at module level, so loading the
+    integration (or just opening the config flow) no longer pays for it.
+    Python caches the module, so only the first caller does any work.
+    """
+    return await hass.async_add_import_executor_job(_import_client)
+
+
+@callback
+def async_create_session(hass: HomeAssistant, ignore_ssl: bool) -> ClientSession:
+    """A session of the entry's own, verifying TLS unless told not to.
+
+    Each entry logs in with its own cookie jar, and the alarm log, backfill
+    and capture post through the same session as the client. Log in with
+    ``ignore_ssl=False`` whatever the entry says: the library swaps a
+    provided session for a private one when asked to skip verification, so
+    the choice is made on this session instead.
+    """
+    return async_create_clientsession(hass, verify_ssl=not ignore_ssl)
+
+
+def _login_key(data: dict[str, Any]) -> tuple:
+    return (data[CONF_USERNAME], data[CONF_BASE_URL], data.get(CONF_SERIAL_NUMBER))
+
+
+@callback
+def async_cache_login(
+    hass: HomeAssistant,
+    data: dict[str, Any],
+    api: Any,
+    inverters: list,
+    session: ClientSession,
+) -> None:
+    """Keep a freshly logged-in client for the entry that is about to start."""
+    cache = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_LOGIN_CACHE, {})
+    if (replaced := cache.get(_login_key(data))) is not None:
+        replaced[3].detach()
+    cache[_login_key(data)] = (time.monotonic(), api, inverters, session)
+
+
+@callback
+def async_pop_cached_login(
+    hass: HomeAssistant, data: dict[str, Any]
+) -> tuple[Any, list, ClientSession] | None:
+    """Take the config flow's client, inverter list and session, if still fresh."""
+    cache = hass.data.get(DOMAIN, {}).get(DATA_LOGIN_CACHE, {})
+    cached = cache.pop(_login_key(data), None)
+    if cached is None:
+        return None
+    logged_in_at, api, inverters, session = cached
+    if time.monotonic() - logged_in_at > LOGIN_CACHE_TTL_SECONDS:
+        session.detach()
+        return None
+    return api, inverters, session
@@ -15,18 +15,15 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from eg4_inverter_api import EG4InverterAPI
-from eg4_inverter_api.exceptions import EG4APIError, EG4AuthError
-from eg4_inverter_api.models import (
-    APIResponse,
-    BatteryData,
-    BatteryUnit,
-    EnergyData,
-    Inverter,
-    RuntimeData,
-    InverterParameters,
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.selector import (
+    SelectOptionDict,
+    SelectSelector,
+    SelectSelectorConfig,
+    TextSelector,
+    TextSelectorConfig,
 )
+from .client import async_cache_login, async_create_session, async_import_client
 from .const import (
     DOMAIN,
     CONF_USERNAME,
@@ -39,6 +36,27 @@ from .const import (
     DEFAULT_RUNTIME_INTERVAL_SECONDS,
     DEFAULT_SETTINGS_INTERVAL_SECONDS,
     DEFAULT_BASE_URL,
+    CONF_PRESET,
+    DEFAULT_PRESET,
+    PRESET_GROUPS,
+    CONF_ENDPOINTS,
+    OPTIONAL_ENDPOINTS,
+    CONF_EXPORT_URL,
+    CONF_EXPORT_FORMAT,
+    DEFAULT_EXPORT_FORMAT,
+    EXPORT_FORMATS,
+    CONF_MQTT_PREFIX,
+    CONF_MQTT_MODE,
+    CONF_MQTT_DISCOVERY,
+    DEFAULT_MQTT_MODE,
+    MQTT_MODES,
+    CONF_CAPTURE,
+    CONF_REPLAY_PATH,
+    CONF_REPLAY_SPEED,
+    DEFAULT_REPLAY_SPEED,
+    CONF_DERIVED,
+    CONF_INSTRUMENTATION,
+    CONF_NIGHT_MODE,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -47,7 +65,6 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_USERNAME, default=""): str,
         vol.Required(CONF_PASSWORD, default=""): str,
-        vol.Required(CONF_SERIAL_NUMBER, default=""): str,
         vol.Optional(CONF_BASE_URL, default=DEFAULT_BASE_URL): str,
         vol.Optional(CONF_IGNORE_SSL, default=False): bool,
         vol.Optional(
@@ -60,100 +77,191 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
 )
 
 
+def _reconfigure_schema(data: dict[str, Any]) -> vol.Schema:
+    """Connection settings only, prefilled from the current entry.
+
+    The stored password is never sent to the form; left blank, it is kept.
+    """
+    return vol.Schema(
+        {
+            vol.Required(CONF_USERNAME, default=data.get(CONF_USERNAME, "")): str,
+            vol.Optional(CONF_PASSWORD): str,
+            vol.Required(
+                CONF_SERIAL_NUMBER, default=data.get(CONF_SERIAL_NUMBER, "")
+            ): str,
+            vol.Optional(
+                CONF_BASE_URL, default=data.get(CONF_BASE_URL, DEFAULT_BASE_URL)
+            ): str,
+            vol.Optional(
+                CONF_IGNORE_SSL, default=data.get(CONF_IGNORE_SSL, False)
+            ): bool,
+        }
+    )
+
+
+def _inverter_label(inverter: Any) -> str:
+    """Pick-list label: serial, model and status of a discovered inverter."""
+    parts = [str(inverter.serialNum)]
+    for attr in ("deviceTypeText", "model", "modelText"):
+        if getattr(inverter, attr, None):
+            parts.append(str(getattr(inverter, attr)))
+            break
+    if getattr(inverter, "statusText", None):
+        parts.append(str(inverter.statusText))
+    elif getattr(inverter, "lost", None) is not None:
+        parts.append("offline" if inverter.lost else "online")
+    return " - ".join(parts)
+
+
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
     """Validate the user input allows us to connect.
 
-    Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
+    Logs in once and returns the title, the logged-in client, its session
+    and the account's inverter list so the caller can offer a pick-list and
+    hand the login on to the coordinator. If a serial number is given it
+    must be one of the account's inverters.
     """
-    # TODO validate the data can be used to set up a connection.
-
-    # If your PyPI package is not built with async, pass your methods
-    # to the executor:
-    # await hass.async_add_executor_job(
-    #     your_validate_func, data[CONF_USERNAME], data[CONF_PASSWORD]
-    # )
-    session = async_get_clientsession(hass)
-    api = EG4InverterAPI(
+    eg4 = await async_import_client(hass)
+    session = async_create_session(hass, data.get(CONF_IGNORE_SSL, False))
+    api = eg4.EG4InverterAPI(
         data[CONF_USERNAME],
         data[CONF_PASSWORD],
-        base_url=data[CONF_BASE_URL],
+        base_url=data.get(CONF_BASE_URL, DEFAULT_BASE_URL),
         session=session,
     )
+    serial = data.get(CONF_SERIAL_NUMBER)
     try:
-        await api.login(ignore_ssl=data[CONF_IGNORE_SSL])
-        inverters = api.get_inverters()
-        _LOGGER.info(f"EG4 Inverter Login: {inverters}")
+        inverters = await _async_login(eg4, api, serial)
+    except Exception:
+        # Only a successful login hands its session on
+        session.detach()
+        raise
+    return {
+        "title": f"EG4 Inverter {serial}" if serial else "EG4 Inverter",
+        "api": api,
+        "session": session,
+        "inverters": inverters,
+    }
 
-        if data.get(CONF_SERIAL_NUMBER):
-            selected_inverter = [
-                x for x in inverters if x.serialNum == data.get(CONF_SERIAL_NUMBER)
-            ]
-            if len(selected_inverter) > 0:
-                selected_inverter = selected_inverter[0]
-                _LOGGER.info(f"EG4 Inverter Selected: {selected_inverter}")
-            else:
-                selected_inverter = None
 
-            api.set_selected_inverter(serialNum=data[CONF_SERIAL_NUMBER])
-        else:
-            _LOGGER.warning(f"DEFAULT EG4 Inverter at index 0 Selected: {inverters[0]}")
-            api.set_selected_inverter(inverterIndex=0)
-    except EG4AuthError as err:
+async def _async_login(eg4: Any, api: Any, serial: str | None) -> list:
+    """Log in, and select the given serial if it is one of the account's."""
+    try:
+        # The session already carries the ignore_ssl choice
+        await api.login(ignore_ssl=False)
+        inverters = api.get_inverters()
+        _LOGGER.info(f"EG4 Inverter Login: {inverters}")
+    except eg4.exceptions.EG4AuthError as err:
         raise InvalidAuth from err
-    except EG4APIError as err:
+    except eg4.exceptions.EG4APIError as err:
         raise CannotConnect from err
-    return {"title": f"EG4 Inverter Integration - {data[CONF_BASE_URL]}"}
+
+    if not inverters:
+        raise NoInverters
+    if serial:
+        if not any(x.serialNum == serial for x in inverters):
+            raise UnknownInverter
+        api.set_selected_inverter(serialNum=serial)
+    return inverters
 
 
 class EG4InverterConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for EG4 Inverter Integration."""
 
-    VERSION = 1
+    # 2: the unique id is the inverter serial (it was the entry title)
+    VERSION = 2
     _input_data: dict[str, Any]
+    _api: Any
+    _session: Any = None
+    _inverters: dict[str, Any]
 
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
         """Get the options flow for this handler."""
-        # Remove this method and the ExampleOptionsFlowHandler class
-        # if you do not want any options for your integration.
         return OptionsFlowHandler(config_entry)
-        # return ExampleOptionsFlowHandler(config_entry)
+
+    @callback
+    def async_remove(self) -> None:
+        """Close the login's session if the flow ended without handing it on."""
+        if self._session is not None:
+            self._session.detach()
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
+        """Handle the initial step: account credentials."""
         _LOGGER.debug("EG4 Inverter async_step_user() called")
-        """Handle the initial step."""
-        # Called when you initiate adding an integration via the UI
         errors: dict[str, str] = {}
 
         if user_input is not None:
             # The form has been filled in and submitted, so process the data provided.
             try:
-                # Validate that the setup data is valid and if not handle errors.
-                # The errors["base"] values match the values in your strings.json and translation files.
+                # One login for the whole flow: it also gives us the inverter list
                 info = await validate_input(self.hass, user_input)
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except InvalidAuth:
                 errors["base"] = "invalid_auth"
+            except NoInverters:
+                errors["base"] = "no_inverters"
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
 
             if "base" not in errors:
-                # Validation was successful, so create a unique id for this instance of your integration
-                # and create the config entry.
-                await self.async_set_unique_id(info.get("title"))
-                self._abort_if_unique_id_configured()
-                return self.async_create_entry(title=info["title"], data=user_input)
+                self._input_data = user_input
+                self._api = info["api"]
+                self._session = info["session"]
+                self._inverters = {x.serialNum: x for x in info["inverters"]}
+                if len(self._inverters) == 1:
+                    return await self.async_step_inverter(
+                        {CONF_SERIAL_NUMBER: next(iter(self._inverters))}
+                    )
+                return await self.async_step_inverter()
 
         # Show initial form.
         return self.async_show_form(
             step_id="user", data_schema=STEP_USER_DATA_SCHEMA, errors=errors
         )
 
+    async def async_step_inverter(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Pick one of the inverters discovered on the account."""
+        if user_input is not None:
+            serial = user_input[CONF_SERIAL_NUMBER]
+            await self.async_set_unique_id(serial)
+            self._abort_if_unique_id_configured()
+
+            data = {**self._input_data, CONF_SERIAL_NUMBER: serial}
+            self._api.set_selected_inverter(serialNum=serial)
+            # Let the coordinator's first refresh reuse this login
+            async_cache_login(
+                self.hass,
+                data,
+                self._api,
+                list(self._inverters.values()),
+                self._session,
+            )
+            self._session = None
+            return self.async_create_entry(title=f"EG4 Inverter {serial}", data=data)
+
+        options = [
+            SelectOptionDict(value=serial, label=_inverter_label(inverter))
+            for serial, inverter in self._inverters.items()
+        ]
+        return self.async_show_form(
+            step_id="inverter",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_SERIAL_NUMBER): SelectSelector(
+                        SelectSelectorConfig(options=options)
+                    ),
+                }
+            ),
+        )
+
     async def async_step_reconfigure(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
@@ -163,68 +271,159 @@ class EG4InverterConfigFlow(ConfigFlow, domain=DOMAIN):
             self.context["entry_id"]
         )
 
+        # Only connection details live here; intervals and endpoints are
+        # options and apply without a reload
         if user_input is not None:
+            if not user_input.get(CONF_PASSWORD):
+                user_input = {
+                    **user_input,
+                    CONF_PASSWORD: config_entry.data.get(CONF_PASSWORD, ""),
+                }
+            # The serial is the unique id: moving the entry to another
+            # inverter must not collide with that inverter's own entry
+            await self.async_set_unique_id(str(user_input[CONF_SERIAL_NUMBER]))
+            if self.unique_id != config_entry.unique_id:
+                self._abort_if_unique_id_configured()
             try:
-                user_input[CONF_USERNAME] = config_entry.data[CONF_USERNAME]
-                user_input[CONF_PASSWORD] = config_entry.data[CONF_PASSWORD]
-                user_input[CONF_SERIAL_NUMBER] = config_entry.data[CONF_SERIAL_NUMBER]
-                user_input[CONF_IGNORE_SSL] = config_entry.data[CONF_IGNORE_SSL]
-                user_input[CONF_BASE_URL] = config_entry.data[CONF_BASE_URL]
-                user_input[CONF_RUNTIME_INTERVAL_SECONDS] = config_entry.data[
-                    CONF_RUNTIME_INTERVAL_SECONDS
-                ]
-                user_input[CONF_SETTINGS_INTERVAL_SECONDS] = config_entry.data[
-                    CONF_SETTINGS_INTERVAL_SECONDS
-                ]
-                await validate_input(self.hass, user_input)
+                info = await validate_input(self.hass, user_input)
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except InvalidAuth:
                 errors["base"] = "invalid_auth"
+            except (NoInverters, UnknownInverter):
+                errors[CONF_SERIAL_NUMBER] = "unknown_inverter"
             except Exception:  # pylint: disable=broad-except
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
+                # The reload below picks this login up instead of logging in again
+                async_cache_login(
+                    self.hass,
+                    {**config_entry.data, **user_input},
+                    info["api"],
+                    info["inverters"],
+                    info["session"],
+                )
                 return self.async_update_reload_and_abort(
                     config_entry,
-                    unique_id=config_entry.unique_id,
+                    unique_id=self.unique_id,
                     data={**config_entry.data, **user_input},
                     reason="reconfigure_successful",
                 )
         return self.async_show_form(
             step_id="reconfigure",
-            data_schema=STEP_USER_DATA_SCHEMA,
+            data_schema=_reconfigure_schema(user_input or config_entry.data),
             errors=errors,
         )
 
 
 class OptionsFlowHandler(OptionsFlow):
-    """Handles the options flow."""
+    """Handles the options flow.
+
+    The entry's update listener applies most of these to the running
+    coordinator. Options that change the entity set or the transport
+    (preset, derived sensors, capture and replay) reload the entry instead.
+    """
 
     def __init__(self, config_entry: ConfigEntry) -> None:
         """Initialize options flow."""
         self._entry = config_entry
         self.options = dict(config_entry.options)
 
+    def _current(self, key: str, default: Any) -> Any:
+        return self.options.get(key, self._entry.data.get(key, default))
+
     async def async_step_init(self, user_input=None):
         """Handle options flow."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            options = self._entry.options | user_input
-            return self.async_create_entry(title="", data=options)
-
-        # It is recommended to prepopulate options fields with default values if available.
-        # These will be the same default values you use on your coordinator for setting variable values
-        # if the option has not been set.
-        # data_schema = vol.Schema(
-        #    {
-        #        vol.Optional(
-        #            CONF_BASE_URL, default="https://monitor.eg4electronics.com"
-        #        ): str,
-        #    }
-        # )
-
-        # return self.async_show_form(step_id="init", data_schema=data_schema)
-        return self.async_show_form(step_id="init", data_schema=STEP_USER_DATA_SCHEMA)
+            if user_input.get(CONF_DERIVED):
+                from .derived import DerivedError, parse_derived
+
+                try:
+                    parse_derived(user_input[CONF_DERIVED])
+                except DerivedError as err:
+                    _LOGGER.debug("Rejected derived sensors: %s", err)
+                    errors[CONF_DERIVED] = "invalid_derived"
+            if not errors:
+                options = self._entry.options | user_input
+                return self.async_create_entry(title="", data=options)
+            self.options |= user_input
+
+        fields = {
+            vol.Optional(
+                CONF_RUNTIME_INTERVAL_SECONDS,
+                default=self._current(
+                    CONF_RUNTIME_INTERVAL_SECONDS, DEFAULT_RUNTIME_INTERVAL_SECONDS
+                ),
+            ): vol.All(int, vol.Range(min=10)),
+            vol.Optional(
+                CONF_SETTINGS_INTERVAL_SECONDS,
+                default=self._current(
+                    CONF_SETTINGS_INTERVAL_SECONDS, DEFAULT_SETTINGS_INTERVAL_SECONDS
+                ),
+            ): vol.All(int, vol.Range(min=60)),
+            vol.Optional(
+                CONF_ENDPOINTS,
+                default=self._current(CONF_ENDPOINTS, OPTIONAL_ENDPOINTS),
+            ): cv.multi_select(OPTIONAL_ENDPOINTS),
+            vol.Optional(
+                CONF_PRESET,
+                default=self._current(CONF_PRESET, DEFAULT_PRESET),
+            ): vol.In(list(PRESET_GROUPS)),
+            vol.Optional(
+                CONF_NIGHT_MODE,
+                default=self._current(CONF_NIGHT_MODE, False),
+            ): bool,
+            vol.Optional(
+                CONF_EXPORT_URL,
+                default=self._current(CONF_EXPORT_URL, ""),
+            ): str,
+            vol.Optional(
+                CONF_EXPORT_FORMAT,
+                default=self._current(CONF_EXPORT_FORMAT, DEFAULT_EXPORT_FORMAT),
+            ): vol.In(EXPORT_FORMATS),
+            vol.Optional(
+                CONF_MQTT_PREFIX,
+                default=self._current(CONF_MQTT_PREFIX, ""),
+            ): str,
+            vol.Optional(
+                CONF_MQTT_MODE,
+                default=self._current(CONF_MQTT_MODE, DEFAULT_MQTT_MODE),
+            ): vol.In(MQTT_MODES),
+            vol.Optional(
+                CONF_MQTT_DISCOVERY,
+                default=self._current(CONF_MQTT_DISCOVERY, False),
+            ): bool,
+            vol.Optional(
+                CONF_DERIVED,
+                default=self._current(CONF_DERIVED, ""),
+            ): TextSelector(TextSelectorConfig(multiline=True)),
+        }
+        if self.show_advanced_options:
+            # Capture and replay of raw portal responses, for profiling
+            fields.update(
+                {
+                    vol.Optional(
+                        CONF_CAPTURE, default=self._current(CONF_CAPTURE, False)
+                    ): bool,
+                    vol.Optional(
+                        CONF_REPLAY_PATH, default=self._current(CONF_REPLAY_PATH, "")
+                    ): str,
+                    vol.Optional(
+                        CONF_REPLAY_SPEED,
+                        default=self._current(CONF_REPLAY_SPEED, DEFAULT_REPLAY_SPEED),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    # Loop lag and blocking-call stack samples in the log
+                    vol.Optional(
+                        CONF_INSTRUMENTATION,
+                        default=self._current(CONF_INSTRUMENTATION, False),
+                    ): bool,
+                }
+            )
+        return self.async_show_form(
+            step_id="init", data_schema=vol.Schema(fields), errors=errors
+        )
 
 
 class CannotConnect(HomeAssistantError):
@@ -235,14 +434,9 @@ class InvalidAuth(HomeAssistantError):
     """Error to indicate there is invalid auth."""
 
 
-#############
-
-"""
-class OptionsFlowHandler(config_entries.OptionsFlow):
+class NoInverters(HomeAssistantError):
+    """Error to indicate the account has no inverters."""
 
-    def __init__(self, config_entry):
-        self._entry = config_entry
 
-    async def async_step_init(self, user_input=None):
-        return self.async_show_form(step_id="init")
-"""
+class UnknownInverter(HomeAssistantError):
+    """Error to indicate the serial number is not on the account."""
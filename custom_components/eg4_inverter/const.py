@@ -15,3 +15,184 @@ CONF_SETTINGS_INTERVAL_SECONDS = "settings_interval_seconds"
 DEFAULT_RUNTIME_INTERVAL_SECONDS = 30
 DEFAULT_SETTINGS_INTERVAL_SECONDS = 1200
 DEFAULT_BASE_URL = "https://monitor.eg4electronics.com"
+
+# Fleet scheduler shared by every config entry (hass.data[DOMAIN][DATA_SCHEDULER])
+DATA_SCHEDULER = "scheduler"
+FLEET_RATE_LIMIT_PER_SECOND = 2.0
+FLEET_RATE_LIMIT_BURST = 6
+FLEET_JITTER_SECONDS = 2.0
+
+# Parallel-group systems, keyed by group (hass.data[DOMAIN][DATA_SYSTEMS])
+DATA_SYSTEMS = "systems"
+
+# Bus event fired when the coordinator sees an inverter state transition
+EVENT_EG4_INVERTER = f"{DOMAIN}_event"
+TRIGGER_WENT_OFFLINE = "went_offline"
+TRIGGER_CAME_ONLINE = "came_online"
+TRIGGER_FAULT = "fault"
+TRIGGER_FAULT_CLEARED = "fault_cleared"
+TRIGGER_GENERATOR_STARTED = "generator_started"
+TRIGGER_GENERATOR_STOPPED = "generator_stopped"
+TRIGGER_CHARGE_INHIBITED = "charge_inhibited"
+TRIGGER_CHARGE_ALLOWED = "charge_allowed"
+TRIGGER_TYPES = [
+    TRIGGER_WENT_OFFLINE,
+    TRIGGER_CAME_ONLINE,
+    TRIGGER_FAULT,
+    TRIGGER_FAULT_CLEARED,
+    TRIGGER_GENERATOR_STARTED,
+    TRIGGER_GENERATOR_STOPPED,
+    TRIGGER_CHARGE_INHIBITED,
+    TRIGGER_CHARGE_ALLOWED,
+]
+
+# Alarm/event log ingestion. The client library has no wrapper for the
+# portal's event list, so it is read through the same authenticated session.
+EVENT_EG4_ALARM = f"{DOMAIN}_alarm"
+ALARM_LOG_PATH = "/WManage/web/analyze/event/list"
+ALARM_PAGE_SIZE = 30
+ALARM_MAX_PAGES = 5
+ALARM_BUFFER_SIZE = 200
+DEFAULT_ALARM_INTERVAL_SECONDS = 300
+
+# Ring buffer of recent decoded snapshots, exported via a service call
+SNAPSHOT_BUFFER_SIZE = 240
+SERVICE_EXPORT_SNAPSHOTS = "export_snapshots"
+
+# Entity presets: which definition groups get entities (and so which
+# endpoints are polled). "battery_units" is the per-battery detail.
+CONF_PRESET = "preset"
+PRESET_MINIMAL = "minimal"
+PRESET_STANDARD = "standard"
+PRESET_FULL = "full"
+DEFAULT_PRESET = PRESET_FULL
+PRESET_GROUPS = {
+    PRESET_MINIMAL: {"runtime", "energy", "metrics"},
+    PRESET_STANDARD: {"runtime", "energy", "battery", "analytics", "metrics"},
+    PRESET_FULL: {
+        "runtime",
+        "energy",
+        "battery",
+        "battery_units",
+        "analytics",
+        "settings",
+        "metrics",
+    },
+}
+# Endpoint each definition group is read from (None = computed locally)
+GROUP_ENDPOINTS = {
+    "runtime": "runtime",
+    "energy": "energy",
+    "battery": "battery",
+    "battery_units": "battery",
+    "analytics": "battery",
+    "settings": "settings",
+    "metrics": None,
+}
+
+# Endpoints that can be paused from the options flow (runtime is always polled)
+CONF_ENDPOINTS = "endpoints"
+OPTIONAL_ENDPOINTS = ["energy", "battery", "settings"]
+
+# Logins made by the config flow, handed to the coordinator's first refresh
+DATA_LOGIN_CACHE = "login_cache"
+LOGIN_CACHE_TTL_SECONDS = 300
+
+# Upload cadence alignment: polls are timed just after the dongle's next
+# expected upload, learned from successive runtime deviceTime values
+CADENCE_SAMPLES = 8
+CADENCE_MIN_PERIOD_SECONDS = 5
+CADENCE_MAX_PERIOD_SECONDS = 900
+CADENCE_MARGIN_SECONDS = 3.0
+CADENCE_PROBE_SECONDS = 1.0
+CADENCE_RETRY_SECONDS = 5.0
+CADENCE_MAX_MISSES = 6
+
+# Holding-parameter change journal
+SETTINGS_JOURNAL_SIZE = 500
+
+# Time-series export of each decoded snapshot, straight from the coordinator
+CONF_EXPORT_URL = "export_url"
+CONF_EXPORT_FORMAT = "export_format"
+EXPORT_FORMAT_INFLUX = "influx"
+EXPORT_FORMAT_PROMETHEUS = "prometheus"
+EXPORT_FORMATS = [EXPORT_FORMAT_INFLUX, EXPORT_FORMAT_PROMETHEUS]
+DEFAULT_EXPORT_FORMAT = EXPORT_FORMAT_INFLUX
+EXPORT_QUEUE_SIZE = 120
+EXPORT_BATCH_SIZE = 20
+EXPORT_FLUSH_SECONDS = 5.0
+EXPORT_TIMEOUT_SECONDS = 10
+EXPORT_MAX_BACKOFF_SECONDS = 300
+
+# Fan-out of each decoded snapshot to the local MQTT broker, through Home
+# Assistant's MQTT integration (an empty topic prefix turns it off)
+CONF_MQTT_PREFIX = "mqtt_prefix"
+CONF_MQTT_MODE = "mqtt_mode"
+CONF_MQTT_DISCOVERY = "mqtt_discovery"
+MQTT_MODE_SNAPSHOT = "snapshot"
+MQTT_MODE_CHANGES = "changes"
+MQTT_MODES = [MQTT_MODE_SNAPSHOT, MQTT_MODE_CHANGES]
+DEFAULT_MQTT_MODE = MQTT_MODE_CHANGES
+MQTT_DISCOVERY_PREFIX = "homeassistant"
+
+# Backfill of power statistics from the portal's 5-minute day charts after
+# a gap in polling (e.g. while Home Assistant was down)
+BACKFILL_CHART_PATH = "/WManage/api/analyze/chart/dayMultiLine"
+BACKFILL_MIN_GAP_SECONDS = 900
+BACKFILL_MAX_DAYS = 7
+BACKFILL_RETRY_SECONDS = 1800
+# Failed attempts at one gap before it is given up on
+BACKFILL_MAX_ATTEMPTS = 6
+
+# Pack analytics: rolling per-module statistics kept incrementally
+ANALYTICS_ALPHA = 0.1
+ANALYTICS_SOH_MIN_DAYS = 7
+
+# Server-error backoff for endpoint fetches (doubles per failure)
+FETCH_BACKOFF_BASE_SECONDS = 30
+FETCH_BACKOFF_MAX_SECONDS = 600
+
+# Record raw portal responses to disk, or replay a capture instead of
+# polling the portal (advanced options, for offline profiling)
+CONF_CAPTURE = "capture"
+CONF_REPLAY_PATH = "replay_path"
+CONF_REPLAY_SPEED = "replay_speed"
+DEFAULT_REPLAY_SPEED = 1.0
+CAPTURE_DIR = "eg4_captures"
+CAPTURE_FLUSH_RECORDS = 20
+
+# Debug instrumentation of polls: event loop lag and blocking-call stack
+# samples (advanced option)
+CONF_INSTRUMENTATION = "instrumentation"
+INSTRUMENT_LAG_INTERVAL_SECONDS = 0.05
+INSTRUMENT_BLOCKING_THRESHOLD_SECONDS = 0.1
+INSTRUMENT_STACK_DEPTH = 12
+
+# On-demand profiling of the next polls (profile service)
+SERVICE_PROFILE = "profile"
+PROFILE_TOP_ENTRIES = 25
+PROFILE_TRACEMALLOC_FRAMES = 10
+
+# Night mode: stretched polls and rare energy reads while the sun is down
+# (or PV power has read zero for a while without the sun integration)
+CONF_NIGHT_MODE = "night_mode"
+SUN_ENTITY = "sun.sun"
+NIGHT_INTERVAL_FACTOR = 4
+NIGHT_ENERGY_INTERVAL_SECONDS = 900
+NIGHT_PV_ZERO_SECONDS = 1800
+
+# User-defined sensors, one "Name [unit] = expression" per line
+CONF_DERIVED = "derived_sensors"
+# Value store group (and child coordinator) of the derived sensors
+DERIVED_GROUP = "derived"
+
+# Options that change which entities exist or how the client is built, so
+# need a reload to apply; everything else is applied to the running
+# coordinator
+RELOAD_OPTIONS = {
+    CONF_PRESET,
+    CONF_DERIVED,
+    CONF_CAPTURE,
+    CONF_REPLAY_PATH,
+    CONF_REPLAY_SPEED,
+}
@@ -1,8 +1,14 @@
-import copy
+import asyncio
+import contextlib
 import logging
+import time
 from datetime import timedelta
+from pathlib import Path
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
@@ -10,7 +16,7 @@ from homeassistant.helpers.update_coordinator import (
 from homeassistant.util import dt as dt_util
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from eg4_inverter_api import EG4InverterAPI
+from .client import async_create_session, async_import_client, async_pop_cached_login
 from .const import (
     DOMAIN,
     CONF_USERNAME,
@@ -22,10 +28,88 @@ from .const import (
     CONF_SETTINGS_INTERVAL_SECONDS,
     DEFAULT_RUNTIME_INTERVAL_SECONDS,
     DEFAULT_SETTINGS_INTERVAL_SECONDS,
+    EVENT_EG4_INVERTER,
+    DEFAULT_ALARM_INTERVAL_SECONDS,
+    SNAPSHOT_BUFFER_SIZE,
+    CONF_EXPORT_URL,
+    CONF_EXPORT_FORMAT,
+    DEFAULT_EXPORT_FORMAT,
+    CONF_CAPTURE,
+    CONF_REPLAY_PATH,
+    CONF_REPLAY_SPEED,
+    DEFAULT_REPLAY_SPEED,
+    CAPTURE_DIR,
+    GROUP_ENDPOINTS,
+    CONF_MQTT_PREFIX,
+    CONF_MQTT_MODE,
+    CONF_MQTT_DISCOVERY,
+    DEFAULT_MQTT_MODE,
+    CONF_DERIVED,
+    DERIVED_GROUP,
+    CONF_INSTRUMENTATION,
+    CONF_NIGHT_MODE,
+    SUN_ENTITY,
 )
+from .backfill import EG4Backfill
+from .cadence import UploadCadence
+from .decoder import ValueStore
+from .errors import (
+    RETRY_POLICIES,
+    FetchErrorTracker,
+    FetchResult,
+    classify,
+    classify_payload,
+    fetch_exceptions,
+)
+from .history import SnapshotRing
+from .night import STATE_ABOVE_HORIZON, NightMode
+from .settings import SettingsJournal
+from .subset import preset_groups, required_endpoints
+from .util import entry_option, parse_float, read_field
+from .alarms import EG4AlarmLog
+from .events import detect_transitions
+from .scheduler import async_get_scheduler
 
 _LOGGER = logging.getLogger(__name__)
 
+# Child coordinators, one per endpoint plus the locally computed values
+CHILD_KEYS = (
+    "runtime",
+    "energy",
+    "battery",
+    "settings",
+    "metrics",
+    DERIVED_GROUP,
+)
+
+
+class EG4EndpointCoordinator(DataUpdateCoordinator):
+    """One endpoint's share of a poll; only that endpoint's entities listen.
+
+    The parent coordinator does the polling and pushes each endpoint's
+    payload here when it has something new, or the endpoint's error when it
+    failed, so entities of other endpoints are never woken and one endpoint
+    failing does not make the others unavailable.
+    """
+
+    def __init__(self, hass: HomeAssistant, parent, key: str) -> None:
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"EG4DataCoordinator.{key}",
+            update_interval=None,
+            always_update=False,
+        )
+        self.parent = parent
+        self.key = key
+
+    async def _async_update_data(self):
+        """A refresh asked for by an entity runs a full poll of the parent."""
+        await self.parent.async_refresh()
+        if not self.parent.last_update_success:
+            raise UpdateFailed(f"EG4 poll failed: {self.parent.last_exception}")
+        return self.data
+
 
 class EG4DataCoordinator(DataUpdateCoordinator):
     """Manages login and fetching data from EG4 Inverter API."""
@@ -34,154 +118,663 @@ class EG4DataCoordinator(DataUpdateCoordinator):
         """Initialize the coordinator with config entry data."""
         self.hass = hass
         self.entry = entry
-        session = async_get_clientsession(hass)
 
         # Extract config fields from entry.data
-        username = entry.data[CONF_USERNAME]
-        password = entry.data[CONF_PASSWORD]
         base_url = entry.data[CONF_BASE_URL]
         self.serial_number = entry.data.get(CONF_SERIAL_NUMBER, 30)
         self.ignore_ssl = entry.data.get(CONF_IGNORE_SSL, False)
 
-        # Instantiate the EG4InverterAPI client
-        self.api = EG4InverterAPI(
-            username, password, base_url=base_url, session=session
-        )
+        # The entry's own session: its cookie jar holds this account's login,
+        # which the alarm log and backfill posts rely on. If the config flow
+        # has just logged in for this entry, its client and session are reused
+        # and the first refresh skips the login.
+        self._flow_login = async_pop_cached_login(hass, entry.data)
+        if self._flow_login is not None:
+            session = self._flow_login[2]
+            # Made by the flow, so not closed with the entry otherwise
+            entry.async_on_unload(session.detach)
+        else:
+            session = async_create_session(hass, self.ignore_ssl)
+        self._session = session
+
+        # The EG4InverterAPI client is built in _async_setup, once the
+        # library has been imported in the executor
+        self.api = None
+        self.inverters = []
 
         # We'll track if we've done the initial login
         self._logged_in = False
-        self._update_interval = timedelta(
-            seconds=entry.data.get(
-                CONF_RUNTIME_INTERVAL_SECONDS, DEFAULT_RUNTIME_INTERVAL_SECONDS
-            )
-        )
-        self._settings_interval = timedelta(
-            seconds=entry.data.get(
-                CONF_SETTINGS_INTERVAL_SECONDS, DEFAULT_SETTINGS_INTERVAL_SECONDS
-            )
-        )
+        # Polls are driven by the domain-wide scheduler, not our own timer
+        self._scheduler = async_get_scheduler(hass)
+        # Stretched polling while the array is dark; scales poll_interval
+        self.night = NightMode(hass)
+        self.night.configure(entry.options.get(CONF_NIGHT_MODE, False))
+        self._load_intervals()
+        # Options currently in effect, so the update listener can tell what changed
+        self.applied_options = dict(entry.options)
 
         super().__init__(
             hass,
             _LOGGER,
             name="EG4DataCoordinator",
-            update_interval=self._update_interval,
+            update_interval=None,
+            # Unchanged polls hand back the previous data object unchanged
+            always_update=False,
         )
         # Track the last time we fetched settings
         self._last_settings_fetch = None
 
+        # Alarm/event log, read incrementally on its own slower cadence
+        self.alarm_log = EG4AlarmLog(hass, entry.entry_id, session, base_url)
+        self._alarm_interval = timedelta(seconds=DEFAULT_ALARM_INTERVAL_SECONDS)
+        self._last_alarm_fetch = None
+
+        # Statistics backfill for gaps in the runtime sample timeline
+        self.backfill = EG4Backfill(hass, entry.entry_id, session, base_url)
+        # Answering from a capture: the alarm log and backfill talk to the
+        # portal directly, so they are left alone while replaying
+        self._replaying = False
+
+        # Dongle upload period and phase, used to time polls and to spot
+        # polls that returned the same upload again
+        self.cadence = UploadCadence()
+        self._unchanged_polls = 0
+        # Entity state writes held back by a definition's deadband
+        self.suppressed_writes = 0
+
+        # Every entity value, decoded once per poll; entities read slots
+        self.values = ValueStore()
+        # Recent decoded snapshots for the export_snapshots service
+        self.snapshots = SnapshotRing(SNAPSHOT_BUFFER_SIZE, self.values)
+        # Optional features below are imported and built only once their
+        # option turns them on, so entries without them never load the code.
+        # User-defined sensors, compiled once against the value slots
+        self.derived = None
+        if entry.options.get(CONF_DERIVED):
+            self.derived = self._build_derived(entry.options[CONF_DERIVED])
+        # Rolling per-module battery statistics, fed from the decoded values
+        self.analytics = None
+        if "analytics" in preset_groups(entry):
+            from .analytics import PackAnalytics
+
+            self.analytics = PackAnalytics(hass, entry.entry_id, self.values)
+        # Time-series export and MQTT fan-out; each runs as an entry task
+        self.exporter = None
+        self.publisher = None
+        self._configure_exporter()
+
+        # Endpoints worth polling, recomputed when entities are disabled
+        self._endpoints = None
+        self.entry.async_on_unload(
+            hass.bus.async_listen(
+                er.EVENT_ENTITY_REGISTRY_UPDATED, self._handle_registry_update
+            )
+        )
+
+        # Holding parameters, diffed per read; setting entities listen per key
+        self.settings = SettingsJournal(hass, entry.entry_id)
+        self._settings_changed = set()
+
+        # Optional loop lag / blocking call detection around each poll
+        self.instrumentation = None
+        self._configure_instrumentation()
+        self.entry.async_on_unload(
+            async_track_state_change_event(hass, [SUN_ENTITY], self._handle_sun)
+        )
+        # Parallel-group system this inverter belongs to, joined after setup
+        self.system = None
+        # Set by the profile service for the next few polls
+        self.profile = None
+        self.entry.async_on_unload(self._async_release_profile)
+
+        # Per-endpoint children that the entities subscribe to
+        self.children = {
+            key: EG4EndpointCoordinator(hass, self, key) for key in CHILD_KEYS
+        }
+
+        # Fetch failures by error class, and per-endpoint server backoff
+        self.errors = FetchErrorTracker()
+        self._exceptions = None
+        self._fetch_exceptions = ()
+
         # Cache “old” settings so we don’t lose them in partial updates
         self._cached_settings = None
         self._cached_runtime = None
         self._cached_energy = None
         self._cached_battery = None
-        self._using_cache = False
+
+    def _load_intervals(self):
+        """Read poll intervals from the entry (options win over setup data)."""
+        self._day_interval = timedelta(
+            seconds=entry_option(
+                self.entry,
+                CONF_RUNTIME_INTERVAL_SECONDS,
+                DEFAULT_RUNTIME_INTERVAL_SECONDS,
+            )
+        )
+        self.poll_interval = self._day_interval * self.night.factor
+        self._settings_interval = timedelta(
+            seconds=entry_option(
+                self.entry,
+                CONF_SETTINGS_INTERVAL_SECONDS,
+                DEFAULT_SETTINGS_INTERVAL_SECONDS,
+            )
+        )
+
+    def child_for(self, group: str) -> EG4EndpointCoordinator:
+        """The child coordinator whose updates a definition group follows."""
+        key = GROUP_ENDPOINTS[group] if group in GROUP_ENDPOINTS else group
+        return self.children[key or "metrics"]
+
+    @callback
+    def _push(self, key, result, payload):
+        """Hand one endpoint's outcome for this poll to its child."""
+        child = self.children[key]
+        if result.ok:
+            child.async_set_updated_data(payload)
+        elif not result.skipped:
+            child.async_set_update_error(
+                UpdateFailed(f"EG4 {key} fetch failed ({result.error}): {result.detail}")
+            )
+
+    @callback
+    def _apply_night(self):
+        """Re-plan polls after night mode fell asleep or woke up."""
+        self.poll_interval = self._day_interval * self.night.factor
+        self._scheduler.async_reschedule(self.entry.entry_id)
+        _LOGGER.info(
+            "EG4 %s night mode %s, polling every %s",
+            self.serial_number,
+            "asleep" if self.night.asleep else "awake",
+            self.poll_interval,
+        )
+
+    @callback
+    def _handle_sun(self, event):
+        new_state = event.data.get("new_state")
+        if (
+            new_state is not None
+            and new_state.state == STATE_ABOVE_HORIZON
+            and self.night.sun_rose()
+        ):
+            self._apply_night()
+
+    def _build_derived(self, text):
+        from .derived import DerivedError, DerivedSensors, parse_derived
+
+        try:
+            specs = parse_derived(text)
+        except DerivedError as err:
+            _LOGGER.error("Ignoring EG4 derived sensors: %s", err)
+            return None
+        return DerivedSensors(specs, self.values) if specs else None
+
+    def _configure_exporter(self):
+        """Start the exporter or publisher the first time its option is set."""
+        options = self.entry.options
+        if self.exporter is None and options.get(CONF_EXPORT_URL):
+            from .exporter import EG4Exporter
+
+            self.exporter = EG4Exporter(
+                async_get_clientsession(self.hass), self.serial_number, self.values
+            )
+            # Cancelled automatically when the entry unloads
+            self.entry.async_create_background_task(
+                self.hass, self.exporter.async_run(), f"{DOMAIN} exporter"
+            )
+        if self.exporter is not None:
+            self.exporter.configure(
+                options.get(CONF_EXPORT_URL),
+                options.get(CONF_EXPORT_FORMAT, DEFAULT_EXPORT_FORMAT),
+            )
+        if self.publisher is None and options.get(CONF_MQTT_PREFIX):
+            from .publisher import EG4MqttPublisher
+
+            self.publisher = EG4MqttPublisher(
+                self.hass, self.serial_number, self.values
+            )
+            self.entry.async_create_background_task(
+                self.hass, self.publisher.async_run(), f"{DOMAIN} mqtt publisher"
+            )
+        if self.publisher is not None:
+            self.publisher.configure(
+                options.get(CONF_MQTT_PREFIX),
+                options.get(CONF_MQTT_MODE, DEFAULT_MQTT_MODE),
+                options.get(CONF_MQTT_DISCOVERY, False),
+            )
+
+    def _configure_instrumentation(self):
+        enabled = self.entry.options.get(CONF_INSTRUMENTATION, False)
+        if self.instrumentation is None and enabled:
+            from .instrumentation import LoopInstrumentation
+
+            self.instrumentation = LoopInstrumentation(f"EG4 {self.serial_number}")
+            self.entry.async_on_unload(self.instrumentation.async_stop)
+        if self.instrumentation is not None:
+            self.instrumentation.configure(enabled)
+
+    @callback
+    def _async_release_profile(self):
+        if self.profile is not None:
+            self.profile.async_release()
+            self.profile = None
+
+    def _step(self, name):
+        """Attribute time to a poll step, when instrumentation is on."""
+        if self.instrumentation is None:
+            return contextlib.nullcontext()
+        return self.instrumentation.in_step(name)
+
+    @callback
+    def async_apply_options(self):
+        """Apply changed options to the running coordinator, without a reload."""
+        self.night.configure(self.entry.options.get(CONF_NIGHT_MODE, False))
+        self._load_intervals()
+        self._configure_exporter()
+        self._configure_instrumentation()
+        self._endpoints = None
+        self._scheduler.async_reschedule(self.entry.entry_id)
+        _LOGGER.debug(
+            "Applied EG4 options: poll every %s, settings every %s",
+            self.poll_interval,
+            self._settings_interval,
+        )
+
+    async def _async_setup(self):
+        """Import the client library off the event loop and build the client."""
+        if self.analytics is not None:
+            await self.analytics.async_load()
+        await self.backfill.async_load()
+
+        eg4 = await async_import_client(self.hass)
+        self._exceptions = eg4.exceptions
+        self._fetch_exceptions = fetch_exceptions(eg4.exceptions)
+
+        cached, self._flow_login = self._flow_login, None
+        session = await self._async_transport()
+        if cached is not None and session is self._session:
+            self.api, self.inverters, _ = cached
+            self._logged_in = True
+            _LOGGER.debug("Reusing config flow login for %s", self.serial_number)
+            return
+
+        self.api = eg4.EG4InverterAPI(
+            self.entry.data[CONF_USERNAME],
+            self.entry.data[CONF_PASSWORD],
+            base_url=self.entry.data[CONF_BASE_URL],
+            session=session,
+        )
+
+    async def _async_transport(self):
+        """The session the client talks through: the portal, or a capture."""
+        options = self.entry.options
+        if replay_path := options.get(CONF_REPLAY_PATH):
+            from .replay import ReplaySession, load_capture
+
+            records = await self.hass.async_add_executor_job(
+                load_capture, self.hass.config.path(replay_path)
+            )
+            _LOGGER.warning(
+                "Replaying %d captured EG4 responses from %s instead of polling",
+                len(records),
+                replay_path,
+            )
+            self._replaying = True
+            return ReplaySession(
+                records, options.get(CONF_REPLAY_SPEED, DEFAULT_REPLAY_SPEED)
+            )
+        if options.get(CONF_CAPTURE):
+            from .replay import CaptureSession, CaptureWriter
+
+            stamp = dt_util.utcnow().strftime("%Y%m%d-%H%M%S")
+            writer = CaptureWriter(
+                self.hass,
+                Path(
+                    self.hass.config.path(
+                        CAPTURE_DIR, f"{self.serial_number}_{stamp}.jsonl.gz"
+                    )
+                ),
+            )
+            self.entry.async_on_unload(writer.async_flush)
+            _LOGGER.info("Capturing EG4 portal responses to %s", writer.path)
+            return CaptureSession(self._session, writer)
+        return self._session
 
     async def _async_update_data(self):
-        """Fetch data from the EG4 Inverter API, called by HA every 'update_interval' seconds."""
+        """Run one poll, instrumented or profiled when asked to."""
+        if self.profile is not None and self.profile.remaining <= 0:
+            self.profile = None
+        instrumented = self.instrumentation is not None and self.instrumentation.enabled
+        if not instrumented and self.profile is None:
+            return await self._async_poll()
+        async with contextlib.AsyncExitStack() as stack:
+            if instrumented:
+                await stack.enter_async_context(self.instrumentation.cycle())
+            if self.profile is not None:
+                await stack.enter_async_context(self.profile.cycle())
+            return await self._async_poll()
+
+    async def _async_poll(self):
+        """Fetch data from the EG4 Inverter API, called by the scheduler."""
+        step = self._step
         # Perform login and inverter selection only once
         if not self._logged_in:
-            await self._async_login_and_select_inverter()
+            try:
+                with step("login"):
+                    await self._async_login_and_select_inverter()
+            except self._fetch_exceptions as err:
+                error = classify(err, self._exceptions)
+                self.errors.record("login", error)
+                failure = UpdateFailed(f"EG4 login failed ({error}): {err}")
+                # Nothing can be fetched, so every child is unavailable
+                for child in self.children.values():
+                    child.async_set_update_error(failure)
+                if self.publisher is not None:
+                    self.publisher.async_set_unavailable()
+                raise failure from err
             self._logged_in = True
 
-        # Always fetch runtime data
-        self._using_cache = False
-        try:
-            _LOGGER.debug("Getting EG4 Data")
-            _LOGGER.debug("Getting Inverter Data")
+        if self._endpoints is None:
+            self._endpoints = required_endpoints(self.hass, self.entry)
+            _LOGGER.debug("Polling EG4 endpoints: %s", sorted(self._endpoints))
+        endpoints = self._endpoints
+
+        with step("get_selected_inverter"):
             inverter_info = self.api.get_selected_inverter()
-            _LOGGER.debug(f"Got Inverter Data: {inverter_info}")
 
-            _LOGGER.debug("Getting Runtime Data")
-            try:
-                runtime_data = await self.api.get_inverter_runtime_async()
-                if runtime_data != None:
-                    self._cached_runtime = copy.deepcopy(runtime_data)
-                else:
-                    self._using_cache = True               
-                    raise Exception("Use Cache")
-            except:
-                _LOGGER.debug(f"Using Cached runtime Data")
-                runtime_data = self._cached_runtime
-            _LOGGER.debug(f"Got Runtime Data: {runtime_data}")
-
-            _LOGGER.debug("Getting battery Data")
-            try:
-                battery_data = await self.api.get_inverter_battery_async()
-                if battery_data != None:
-                    self._cached_battery = copy.deepcopy(battery_data)
-                else:
-                    self._using_cache = True               
-                    raise Exception("Use Cache")
-            except:
-                _LOGGER.debug(f"Using Cached battery Data")
-                battery_data = self._cached_battery
-            
-            _LOGGER.debug(f"Got battery Data: {battery_data}")
-            _LOGGER.debug(f"Got battery Unit Data: {battery_data.battery_units}")
-
-            _LOGGER.debug("Getting energy Data")
-            try:
-                energy_data = await self.api.get_inverter_energy_async()
-                if energy_data != None:
-                    self._cached_energy = copy.deepcopy(energy_data)
-                else:
-                    self._using_cache = True               
-                    raise Exception("Use Cache")
-            except:
-                _LOGGER.debug(f"Using Cached energy Data")
-                energy_data = self._cached_energy
-            _LOGGER.debug(f"Got energy Data: {energy_data}")
-            if energy_data is None:
-                raise Exception
-        except Exception as err:
-            raise UpdateFailed(f"Error fetching runtime data: {err}") from err
+        # Always fetch runtime data
+        previous_runtime = self._cached_runtime
+        with step("runtime"):
+            runtime_data, runtime = await self._async_fetch_cached(
+                "runtime", self.api.get_inverter_runtime_async
+            )
+        new_upload = False
+        if runtime.ok:
+            self._fire_transitions(previous_runtime, runtime_data)
+            new_upload = self.cadence.observe(
+                read_field(runtime_data, "deviceTime"), runtime.requested
+            )
+            if self.night.observe(
+                parse_float(read_field(runtime_data, "ppv")), time.monotonic()
+            ):
+                self._apply_night()
 
-        # Conditionally fetch settings if enough time has passed
         now = dt_util.utcnow()
-        need_settings = False
-
         if (
+            runtime.ok
+            and not self._replaying
+            and (gap := self.backfill.note_sample(now.timestamp()))
+        ):
+            _LOGGER.debug("Polling gap %s to %s, backfilling", *gap)
+            self.entry.async_create_background_task(
+                self.hass,
+                self.backfill.async_backfill(gap, self.serial_number, self._async_fetch),
+                f"{DOMAIN} backfill",
+            )
+        need_settings = "settings" in endpoints and (
             self._last_settings_fetch is None
             or (now - self._last_settings_fetch) >= self._settings_interval
-        ):
-            need_settings = True
+        )
+        if not new_upload and not need_settings and self.data is not None:
+            # Same upload as last time: battery and energy cannot have
+            # moved either, so skip them and leave the entities alone
+            self._unchanged_polls += 1
+            _LOGGER.debug("deviceTime unchanged, skipping entity update")
+            if not runtime.ok or not self.children["runtime"].last_update_success:
+                # Still tell the runtime entities if the endpoint failed or
+                # has just recovered
+                self._push("runtime", runtime, runtime_data)
+            self.night.note_poll(1)
+            await self._async_update_alarms_if_due(now)
+            return self.data
 
+        # Fetch outcome per endpoint polled this time, pushed to the children
+        results = {"runtime": runtime}
+        battery_data = None
+        if "battery" in endpoints:
+            with step("battery"):
+                battery_data, results["battery"] = await self._async_fetch_cached(
+                    "battery", self.api.get_inverter_battery_async
+                )
+
+        energy_data = None
+        if "energy" in endpoints and not self.night.energy_due(time.monotonic()):
+            # Asleep: the counters barely move, keep the last reading
+            energy_data = self._cached_energy
+        elif "energy" in endpoints:
+            with step("energy"):
+                energy_data, results["energy"] = await self._async_fetch_cached(
+                    "energy", self.api.get_inverter_energy_async
+                )
+
+        settings_data = self._cached_settings
         if need_settings:
-            try:
-                settings_data = await self.api.read_settings_async()
-                self._cached_settings = copy.deepcopy(settings_data)
+            # A failed read keeps the old settings rather than failing the poll
+            with step("settings"):
+                settings_data, settings = await self._async_fetch_cached(
+                    "settings", self.api.read_settings_async
+                )
+            results["settings"] = settings
+            if settings.ok:
                 self._last_settings_fetch = now
-            except Exception as err:
-                _LOGGER.warning("Failed to update settings: %s", err)
-                # We don't raise UpdateFailed here because we at least want the
-                # runtime data to be updated. We'll just keep old settings.
-        else:
-            settings_data = self._cached_settings
+                self._settings_changed |= await self.settings.async_update(
+                    settings_data, now.timestamp()
+                )
+
+        if self.data is None:
+            # First refresh: the platforms build their entities (per-battery
+            # units included) from these payloads, so without a fresh or
+            # cached one fail it and let Home Assistant retry the setup
+            missing = [
+                f"{key} ({results[key].error or 'backing off'})"
+                for key, payload in (
+                    ("runtime", runtime_data),
+                    ("battery", battery_data),
+                    ("energy", energy_data),
+                )
+                if key in results and payload is None
+            ]
+            if missing:
+                raise UpdateFailed(f"EG4 initial fetch failed: {', '.join(missing)}")
+
+        await self._async_update_alarms_if_due(now)
+        self.night.note_poll(len(results))
 
         # Return combined data
-        return {
+        metrics = self._scheduler.stats(self.entry.entry_id)
+        metrics["uploadPeriod"] = self.cadence.period
+        metrics["unchangedPolls"] = self._unchanged_polls
+        metrics["suppressedWrites"] = self.suppressed_writes
+        metrics["exportQueueDepth"] = self.exporter.queue_depth if self.exporter else 0
+        metrics["exportDropped"] = self.exporter.dropped if self.exporter else 0
+        metrics["mqttMessages"] = self.publisher.messages if self.publisher else 0
+        metrics["backfilledHours"] = self.backfill.imported_hours
+        metrics["requestsSaved"] = self.night.requests_saved
+        metrics["fetchErrors"] = self.errors.total
+        metrics["fetchErrorsByClass"] = dict(self.errors.counts)
+        data = {
             "inverter": inverter_info,
             "runtime": runtime_data,
             "battery": battery_data,
             "energy": energy_data,
             "settings": settings_data,
+            "metrics": metrics,
         }
+        with step("decode"):
+            self.values.decode(data)
+            if self.analytics is not None:
+                # Derived from the battery values just decoded
+                data["analytics"] = self.analytics.update(data, now.timestamp())
+                self.values.decode_group("analytics", data["analytics"])
+            if self.derived is not None:
+                data[DERIVED_GROUP] = self.derived.evaluate()
+        if self.instrumentation is not None and self.instrumentation.enabled:
+            # After the decode, so a stall there is in this poll's figures
+            metrics["loopLagMax"] = round(self.instrumentation.last_max_lag * 1000, 1)
+            metrics["blockingSteps"] = self.instrumentation.blocking_steps
+        self.snapshots.append(now.timestamp())
+        if self.exporter is not None:
+            self.exporter.async_enqueue(now.timestamp(), data)
+        if self.publisher is not None:
+            self.publisher.async_enqueue(data)
+        for key, result in results.items():
+            self._push(key, result, data[key])
+        self.children["metrics"].async_set_updated_data(metrics)
+        if DERIVED_GROUP in data:
+            self.children[DERIVED_GROUP].async_set_updated_data(data[DERIVED_GROUP])
+        if self._settings_changed:
+            # Only the setting entities whose parameter moved get written
+            self.settings.async_notify(self._settings_changed)
+            self._settings_changed = set()
+        return data
+
+    @callback
+    def _handle_registry_update(self, event):
+        """Re-check which endpoints are needed once one of our entities changes."""
+        if event.data.get("action") != "update":
+            return
+        if "disabled_by" not in event.data.get("changes", {}):
+            return
+        reg_entry = er.async_get(self.hass).async_get(event.data["entity_id"])
+        if reg_entry and reg_entry.config_entry_id == self.entry.entry_id:
+            self._endpoints = None
+
+    async def _async_update_alarms_if_due(self, now):
+        if self._replaying:
+            return
+        if (
+            self._last_alarm_fetch is None
+            or (now - self._last_alarm_fetch) >= self._alarm_interval
+        ):
+            await self._async_update_alarms()
+            self._last_alarm_fetch = now
+
+    async def _async_update_alarms(self):
+        """Pull any alarm log records we have not seen yet."""
+        try:
+            new_alarms = await self.alarm_log.async_update(
+                self.serial_number, self._throttle
+            )
+        except Exception as err:
+            _LOGGER.warning("Failed to update alarm log: %s", err)
+            return
+        if new_alarms:
+            _LOGGER.debug("Got %d new alarm records", len(new_alarms))
+            self.alarm_log.async_fire_events(
+                new_alarms, self.entry.entry_id, self.serial_number
+            )
+
+    @callback
+    def _fire_transitions(self, previous, current):
+        """Fire an event for every state transition between two runtime polls."""
+        transitions = detect_transitions(previous, current)
+        if not transitions:
+            return
+        device = dr.async_get(self.hass).async_get_device(
+            identifiers={(DOMAIN, self.entry.entry_id)}
+        )
+        for trigger_type, details in transitions:
+            _LOGGER.debug("EG4 inverter transition: %s %s", trigger_type, details)
+            self.hass.bus.async_fire(
+                EVENT_EG4_INVERTER,
+                {
+                    "device_id": device.id if device else None,
+                    "entry_id": self.entry.entry_id,
+                    "serial_number": self.serial_number,
+                    "type": trigger_type,
+                    **details,
+                },
+            )
+
+    async def _async_fetch(self, endpoint, fetch) -> FetchResult:
+        """Call one endpoint, retrying as the policy for its error class allows."""
+        result = FetchResult(endpoint)
+        if self.errors.backing_off(endpoint):
+            result.skipped = True
+            return result
+        while True:
+            result.attempts += 1
+            await self._throttle()
+            requested = time.monotonic()
+            try:
+                payload = await fetch()
+            except self._fetch_exceptions as err:
+                error, detail = classify(err, self._exceptions), str(err)
+            else:
+                error = classify_payload(payload)
+                if error is None:
+                    if self.errors.succeeded(endpoint):
+                        _LOGGER.info("EG4 %s endpoint recovered", endpoint)
+                    result.data, result.requested = payload, requested
+                    result.error = result.detail = None
+                    return result
+                detail = read_field(payload, "error_message") or read_field(
+                    payload, "msg"
+                )
+
+            first_failure = self.errors.record(endpoint, error)
+            result.error, result.detail = error, detail
+            policy = RETRY_POLICIES[error]
+            if result.attempts > policy.retries:
+                _LOGGER.log(
+                    logging.WARNING if first_failure else logging.DEBUG,
+                    "EG4 %s fetch failed (%s): %s",
+                    endpoint,
+                    error,
+                    detail,
+                )
+                return result
+            _LOGGER.debug("Retrying EG4 %s fetch after %s: %s", endpoint, error, detail)
+            if policy.relogin:
+                try:
+                    await self._async_login_and_select_inverter()
+                except self._fetch_exceptions as err:
+                    self.errors.record("login", classify(err, self._exceptions))
+                    return result
+            await asyncio.sleep(policy.delay)
+
+    async def _async_fetch_cached(self, endpoint, fetch):
+        """Fetch an endpoint, falling back to its last good payload."""
+        result = await self._async_fetch(endpoint, fetch)
+        cache_attr = f"_cached_{endpoint}"
+        if result.ok:
+            setattr(self, cache_attr, result.data)
+        return getattr(self, cache_attr), result
+
+    async def _throttle(self):
+        """Wait for a slot in the fleet-wide rate limit before a cloud call."""
+        await self._scheduler.async_acquire(self.entry.entry_id)
 
     async def _async_login_and_select_inverter(self):
         """Login to the EG4 API and set the inverter serial number."""
         _LOGGER.debug("Logging into EG4 and setting inverter serial")
-        await self.api.login(ignore_ssl=self.ignore_ssl)
-        self.api.set_selected_inverter(serialNum=self.serial_number)
+        await self._throttle()
+        # The session already carries the ignore_ssl choice
+        await self.api.login(ignore_ssl=False)
+        self.inverters = self.api.get_inverters()
+        with self._step("set_selected_inverter"):
+            self.api.set_selected_inverter(serialNum=self.serial_number)
         _LOGGER.debug(
             "Successfully logged in and selected inverter %s", self.serial_number
         )
 
     async def force_refresh_settings(self):
         """Public method to immediately refresh settings (e.g., after a write)."""
-        try:
-            settings_data = await self.api.read_settings_async()
-            self._cached_settings = settings_data
-            self._last_settings_fetch = dt_util.utcnow()
-        except Exception as err:
-            _LOGGER.error("Error force-refreshing settings: %s", err)
+        settings_data, result = await self._async_fetch_cached(
+            "settings", self.api.read_settings_async
+        )
+        if not result.ok:
+            _LOGGER.error("Error force-refreshing settings: %s", result.error)
+            return
+        self._last_settings_fetch = dt_util.utcnow()
+        changed = self._settings_changed | await self.settings.async_update(
+            settings_data, self._last_settings_fetch.timestamp()
+        )
+        self._settings_changed = set()
+        # Decoded and pushed right away: the caller just wrote a parameter
+        # and should not wait for the next poll to see it
+        self.values.decode_group("settings", settings_data)
+        if self.data is not None:
+            self.data["settings"] = settings_data
+        self._push("settings", result, settings_data)
+        self.settings.async_notify(changed)
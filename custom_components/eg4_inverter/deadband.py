@@ -0,0 +1,54 @@
+"""Hold back state writes for values that only jitter."""
+import time
+from typing import Any
+
+from .definitions import EG4Definition
+
+
+class DeadbandFilter:
+    """Decide whether a new value is worth a state write.
+
+    Values are compared to the last one actually written, not the previous
+    poll, so slow drift still gets written once it adds up (hysteresis).
+    Unknown values, availability changes and the definition's heartbeat
+    always write.
+    """
+
+    __slots__ = (
+        "_deadband",
+        "_deadband_pct",
+        "_heartbeat",
+        "_value",
+        "_available",
+        "_written",
+    )
+
+    def __init__(self, definition: EG4Definition) -> None:
+        self._deadband = definition.deadband
+        self._deadband_pct = definition.deadband_pct
+        self._heartbeat = definition.heartbeat
+        self._value = None
+        self._available = None
+        self._written = None
+
+    @classmethod
+    def for_definition(cls, definition: EG4Definition) -> "DeadbandFilter | None":
+        return cls(definition) if definition.filtered else None
+
+    def should_write(self, value: Any, available: bool) -> bool:
+        now = time.monotonic()
+        last = self._value
+        if (
+            self._written is None
+            or available != self._available
+            or value is None
+            or last is None
+            or (self._heartbeat is not None and now - self._written >= self._heartbeat)
+            or abs(value - last)
+            > max(self._deadband, abs(last) * self._deadband_pct / 100)
+        ):
+            self._value = value
+            self._available = available
+            self._written = now
+            return True
+        return False
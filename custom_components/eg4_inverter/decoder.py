@@ -0,0 +1,98 @@
+"""Decode coordinator payloads once per tick into a flat value store."""
+from collections.abc import Callable
+from typing import Any
+
+from .definitions import DEFINITION_LOOKUP, EG4Definition
+
+PER_BATTERY_GROUP = "battery_units"
+
+_Plan = list[tuple[int, Callable[[Any], Any], EG4Definition]]
+
+
+class ValueStore:
+    """Every entity value of one config entry, addressed by integer slot.
+
+    The decode plan (slot, accessor, definition) for each group is built
+    once; ``decode`` then walks each payload a single time, doing all the
+    parsing, unit stripping and scaling, and entities only index ``values``.
+    Slots for battery units are allocated the first time a unit is seen.
+    """
+
+    def __init__(self) -> None:
+        self.values: list[Any] = []
+        self._slots: dict[tuple, int] = {}
+        self._plans: dict[str, _Plan] = {}
+        self._unit_plans: dict[Any, _Plan] = {}
+        for group, lookup in DEFINITION_LOOKUP.items():
+            if group != PER_BATTERY_GROUP:
+                self._plans[group] = [
+                    (self._allocate((group, key)), accessor, definition)
+                    for key, accessor, definition in lookup
+                ]
+
+    def _allocate(self, address: tuple) -> int:
+        slot = self._slots.get(address)
+        if slot is None:
+            slot = self._slots[address] = len(self.values)
+            self.values.append(None)
+        return slot
+
+    def add_slot(self, group: str, key: str) -> int:
+        """Slot for a value computed outside the definitions."""
+        return self._allocate((group, key))
+
+    def slot(self, group: str, key: str, bat_index: Any = None) -> int:
+        """Slot id for one value; battery unit values also need ``bat_index``."""
+        if group == PER_BATTERY_GROUP:
+            self._unit_plan(bat_index)
+            return self._slots[(group, bat_index, key)]
+        return self._slots[(group, key)]
+
+    def _unit_plan(self, bat_index: Any) -> _Plan:
+        plan = self._unit_plans.get(bat_index)
+        if plan is None:
+            plan = self._unit_plans[bat_index] = [
+                (
+                    self._allocate((PER_BATTERY_GROUP, bat_index, key)),
+                    accessor,
+                    definition,
+                )
+                for key, accessor, definition in DEFINITION_LOOKUP[PER_BATTERY_GROUP]
+            ]
+        return plan
+
+    def __getitem__(self, slot: int) -> Any:
+        return self.values[slot]
+
+    @staticmethod
+    def _run(plan: _Plan, payload: Any, values: list[Any]) -> None:
+        if payload is None:
+            for slot, _, _ in plan:
+                values[slot] = None
+            return
+        for slot, accessor, definition in plan:
+            if definition.calc is not None:
+                values[slot] = definition.calc(payload)
+            else:
+                values[slot] = definition.decode(accessor(payload))
+
+    def decode_group(self, group: str, payload: Any) -> None:
+        """Decode a single group, for payloads derived after ``decode``."""
+        self._run(self._plans[group], payload, self.values)
+
+    def decode(self, data: dict[str, Any]) -> None:
+        """Decode one coordinator snapshot into the value slots."""
+        values = self.values
+        for group, plan in self._plans.items():
+            self._run(plan, data.get(group), values)
+
+        units = getattr(data.get("battery"), "battery_units", None) or []
+        present = set()
+        for unit in units:
+            bat_index = getattr(unit, "batIndex", None)
+            present.add(bat_index)
+            self._run(self._unit_plan(bat_index), unit, values)
+        # Units that dropped out of the payload read as unknown
+        for bat_index, plan in self._unit_plans.items():
+            if bat_index not in present:
+                self._run(plan, None, values)
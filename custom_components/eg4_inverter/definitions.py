@@ -1,6 +1,19 @@
 # definitions.py
+"""Entity definitions for every value the integration exposes.
+
+Each value is an ``EG4Definition``: a frozen, slotted dataclass validated
+when the module is imported, so a typo or a contradictory definition fails
+loudly instead of silently overwriting a key. ``DEFINITION_LOOKUP`` is the
+precomputed (key, accessor, definition) table per group that lets a payload
+be decoded in one pass.
+"""
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
 
 from homeassistant.const import (
+    EntityCategory,
     PERCENTAGE,
     UnitOfPower,
     UnitOfElectricPotential,
@@ -14,160 +27,230 @@ from homeassistant.const import (
 from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass
 
+from .util import parse_float, read_field
+
+DEFINITION_PLATFORMS = ("sensor", "binary_sensor")
+
+# Power readings jitter by a few watts every poll; only write real moves
+POWER_DEADBAND = {"deadband": 10.0, "deadband_pct": 2.0, "heartbeat": 300}
+
+
+@dataclass(frozen=True, slots=True)
+class EG4Definition:
+    """One entity's worth of metadata plus how to decode its raw value."""
+
+    key: str
+    name: str
+    platform: str = "sensor"
+    unit: str | None = None
+    scale: float = 1.0
+    icon: str | None = None
+    device_class: str | None = None
+    state_class: str | None = None
+    entity_category: EntityCategory | None = None
+    co2_parse: bool = False
+    calc: Callable[[Any], Any] | None = None
+    description: str | None = None
+    # State writes are skipped while the value stays within the larger of
+    # these of the last written value, until ``heartbeat`` seconds pass
+    deadband: float = 0.0
+    deadband_pct: float = 0.0
+    heartbeat: float | None = None
+
+    def __post_init__(self) -> None:
+        problems = []
+        if not isinstance(self.key, str) or not self.key:
+            problems.append("key must be a non-empty string")
+        if not isinstance(self.name, str) or not self.name:
+            problems.append("name must be a non-empty string")
+        if self.platform not in DEFINITION_PLATFORMS:
+            problems.append(f"platform must be one of {DEFINITION_PLATFORMS}")
+        if not isinstance(self.scale, (int, float)) or not self.scale:
+            problems.append("scale must be a non-zero number")
+        if self.calc is not None and not callable(self.calc):
+            problems.append("calc must be callable")
+        if self.platform == "binary_sensor" and (
+            self.unit or self.scale != 1.0 or self.co2_parse or self.state_class
+        ):
+            problems.append(
+                "binary sensors take no unit, scale, co2_parse or state_class"
+            )
+        if self.co2_parse and not self.unit:
+            problems.append("co2_parse needs a unit")
+        if self.deadband < 0 or self.deadband_pct < 0:
+            problems.append("deadband and deadband_pct must not be negative")
+        if self.filtered and not self.numeric:
+            problems.append("a deadband needs a numeric sensor")
+        if self.heartbeat is not None and (
+            not self.filtered or self.heartbeat <= 0
+        ):
+            problems.append("heartbeat must be positive and needs a deadband")
+        if problems:
+            raise ValueError(
+                f"Invalid EG4 definition {self.key!r}: {'; '.join(problems)}"
+            )
+
+    @property
+    def numeric(self) -> bool:
+        """Whether the sensor value is parsed to a float."""
+        return bool(self.unit or self.scale != 1.0 or self.co2_parse)
+
+    @property
+    def filtered(self) -> bool:
+        """Whether small changes are held back by a deadband."""
+        return bool(self.deadband or self.deadband_pct)
+
+    def decode(self, raw: Any) -> Any:
+        """Turn a raw payload value into the entity's state value."""
+        if self.platform == "binary_sensor":
+            return bool(raw)
+        # Special case: parse CO2/Coal text like "367.69 kG"
+        if self.co2_parse:
+            return parse_float(str(raw).split(" ")[0], 1.0)
+        if self.numeric:
+            return parse_float(raw, self.scale)
+        # If it's truly a string (like "statusText"), just return it
+        return raw
+
+
 # -------------------------------------------------------------------------
 # 1) ENERGY SENSORS
 #    Data from coordinator.data["energy"]
 #    Original fields in get_inverter_energy_async() sample
 # -------------------------------------------------------------------------
-ENERGY_SENSORS = [
-    {
-        "type": "sensor",
-        "key": "soc",
-        "name": "Battery State of Charge",
-        "unit": PERCENTAGE,
-        "device_class": "battery",  # or SensorDeviceClass.BATTERY if you import it
-        "entity_category": None,
-        "description": "Battery SoC from energy data",
-    },
-    {
-        "type": "sensor",
-        "key": "todayYieldingText",  # "9.2" => interpret as 9.2 kWh
-        "name": "Solar Generation Today",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:solar-power",
-        "description": "Energy generated today (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL_INCREASING,
-    },
-    {
-        "type": "sensor",
-        "key": "totalYieldingText",  # e.g. "368.8" => interpret as 368.8 kWh
-        "name": "Solar Generation Total",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:solar-power",
-        "description": "Lifetime energy generated (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL,
-    },
-    {
-        "type": "sensor",
-        "key": "todayDischargingText",
-        "name": "Battery Discharging Today",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:battery-heart",
-        "description": "Energy discharged from battery today (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL_INCREASING,
-    },
-    {
-        "type": "sensor",
-        "key": "totalDischargingText",
-        "name": "Battery Discharging Total",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:battery-heart",
-        "description": "Lifetime battery discharge (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL,
-    },
-    {
-        "type": "sensor",
-        "key": "todayChargingText",
-        "name": "Battery Charging Today",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:battery-charging",
-        "description": "Energy charged into battery today (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL_INCREASING,
-    },
-    {
-        "type": "sensor",
-        "key": "totalChargingText",
-        "name": "Battery Charging Total",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:battery-charging",
-        "description": "Lifetime battery charge (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL,
-    },
-    {
-        "type": "sensor",
-        "key": "todayUsageText",
-        "name": "Energy Consumption Today",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:home-import-outline",
-        "description": "Energy consumed by the home today (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL_INCREASING,
-    },
-    {
-        "type": "sensor",
-        "key": "totalUsageText",
-        "name": "Energy Consumption Total",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:home-import-outline",
-        "description": "Lifetime energy consumed by the home (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL,
-    },
-    {
-        "type": "sensor",
-        "key": "todayImportText",
-        "name": "Imported from Grid Today",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:transmission-tower-import",
-        "description": "Energy imported from grid today (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL_INCREASING,
-    },
-    {
-        "type": "sensor",
-        "key": "totalImportText",
-        "name": "Imported from Grid Total",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:transmission-tower-import",
-        "description": "Lifetime energy imported from the grid (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL,
-    },
-    {
-        "type": "sensor",
-        "key": "todayExportText",
-        "name": "Exported to Grid Today",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:transmission-tower-export",
-        "description": "Energy exported to grid today (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL_INCREASING,
-    },
-    {
-        "type": "sensor",
-        "key": "totalExportText",
-        "name": "Exported to Grid Total",
-        "unit": UnitOfEnergy.KILO_WATT_HOUR,
-        "icon": "mdi:transmission-tower-export",
-        "description": "Lifetime energy exported to the grid (kWh)",
-        "device_class": SensorDeviceClass.ENERGY,
-        "state_class": SensorStateClass.TOTAL,
-    },
-    {
-        "type": "sensor",
-        "key": "totalCo2ReductionText",  # e.g. "367.69 kG"
-        "name": "CO2 Reduction",
-        "unit": UnitOfMass.KILOGRAMS,
-        "icon": "mdi:molecule-co2",
-        "description": "Total CO2 reduction in kg",
-        "co2_parse": True,  # We'll parse the numeric portion
-    },
-    {
-        "type": "sensor",
-        "key": "totalCoalReductionText",  # e.g. "147.52 kG"
-        "name": "Coal Reduction",
-        "unit": UnitOfMass.KILOGRAMS,
-        "icon": "mdi:factory",
-        "description": "Total coal reduction in kg",
-        "co2_parse": True,
-    },
-]
+ENERGY_SENSORS = (
+    EG4Definition(
+        key="soc",
+        name="Battery State of Charge",
+        unit=PERCENTAGE,
+        device_class=SensorDeviceClass.BATTERY,
+        description="Battery SoC from energy data",
+    ),
+    EG4Definition(
+        key="todayYieldingText",  # "9.2" => interpret as 9.2 kWh
+        name="Solar Generation Today",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:solar-power",
+        description="Energy generated today (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    EG4Definition(
+        key="totalYieldingText",  # e.g. "368.8" => interpret as 368.8 kWh
+        name="Solar Generation Total",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:solar-power",
+        description="Lifetime energy generated (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+    ),
+    EG4Definition(
+        key="todayDischargingText",
+        name="Battery Discharging Today",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:battery-heart",
+        description="Energy discharged from battery today (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    EG4Definition(
+        key="totalDischargingText",
+        name="Battery Discharging Total",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:battery-heart",
+        description="Lifetime battery discharge (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+    ),
+    EG4Definition(
+        key="todayChargingText",
+        name="Battery Charging Today",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:battery-charging",
+        description="Energy charged into battery today (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    EG4Definition(
+        key="totalChargingText",
+        name="Battery Charging Total",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:battery-charging",
+        description="Lifetime battery charge (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+    ),
+    EG4Definition(
+        key="todayUsageText",
+        name="Energy Consumption Today",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:home-import-outline",
+        description="Energy consumed by the home today (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    EG4Definition(
+        key="totalUsageText",
+        name="Energy Consumption Total",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:home-import-outline",
+        description="Lifetime energy consumed by the home (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+    ),
+    EG4Definition(
+        key="todayImportText",
+        name="Imported from Grid Today",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:transmission-tower-import",
+        description="Energy imported from grid today (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    EG4Definition(
+        key="totalImportText",
+        name="Imported from Grid Total",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:transmission-tower-import",
+        description="Lifetime energy imported from the grid (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+    ),
+    EG4Definition(
+        key="todayExportText",
+        name="Exported to Grid Today",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:transmission-tower-export",
+        description="Energy exported to grid today (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+    ),
+    EG4Definition(
+        key="totalExportText",
+        name="Exported to Grid Total",
+        unit=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:transmission-tower-export",
+        description="Lifetime energy exported to the grid (kWh)",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL,
+    ),
+    EG4Definition(
+        key="totalCo2ReductionText",  # e.g. "367.69 kG"
+        name="CO2 Reduction",
+        unit=UnitOfMass.KILOGRAMS,
+        icon="mdi:molecule-co2",
+        description="Total CO2 reduction in kg",
+        co2_parse=True,  # We'll parse the numeric portion
+    ),
+    EG4Definition(
+        key="totalCoalReductionText",  # e.g. "147.52 kG"
+        name="Coal Reduction",
+        unit=UnitOfMass.KILOGRAMS,
+        icon="mdi:factory",
+        description="Total coal reduction in kg",
+        co2_parse=True,
+    ),
+)
 
 
 # -------------------------------------------------------------------------
@@ -175,272 +258,252 @@ ENERGY_SENSORS = [
 #    Data from coordinator.data["runtime"]
 #    Original fields in get_inverter_runtime_async() sample
 # -------------------------------------------------------------------------
-RUNTIME_SENSORS = [
-    {
-        "type": "sensor",
-        "key": "lost",
-        "name": "Inverter Lost State (Raw)",
-        "unit": None,
-        "icon": "mdi:alert",
-        "description": "Indicates if inverter is lost/offline (True/False)",
-    },
-    {
-        "type": "sensor",
-        "key": "statusText",
-        "name": "Inverter Status Text",
-        "unit": None,
-        "icon": "mdi:information-outline",
-    },
-    {
-        "type": "sensor",
-        "key": "batteryType",
-        "name": "Battery Type",
-        "unit": None,
-    },
-    {
-        "type": "sensor",
-        "key": "batCapacity",  # Raw Amp-hours from the device
-        "name": "Battery Capacity",
-        "unit": "kWh",
-        "icon": "mdi:battery",  # or an appropriate icon
-        "scale": 0.0512,  # 51.2 / 1000
-        "description": "Battery capacity in kWh (converted from Ah at 51.2V nominal)",
-    },
-    {
-        "type": "sensor",
-        "key": "batParallelNum",
-        "name": "Battery Parallel Number",
-        "icon": "mdi:battery-plus",
-    },
-    {
-        "type": "sensor",
-        "key": "vpv1",
-        "name": "PV1 Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-        "scale": 0.1,  # if 2098 => 20.98, adjust if needed
-        "icon": "mdi:solar-panel",
-    },
-    {
-        "type": "sensor",
-        "key": "vpv2",
-        "name": "PV2 Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-        "scale": 0.1,
-        "icon": "mdi:solar-panel",
-    },
-    {
-        "type": "sensor",
-        "key": "vpv3",
-        "name": "PV3 Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-        "scale": 0.1,
-        "icon": "mdi:solar-panel",
-    },
-    {
-        "type": "sensor",
-        "key": "ppv",
-        "name": "Total PV Power",
-        "unit": UnitOfPower.WATT,
-        "icon": "mdi:flash",
-    },
-    {
-        "type": "sensor",
-        "key": "ppv1",
-        "name": "PV1 Power",
-        "unit": UnitOfPower.WATT,
-        "icon": "mdi:flash",
-    },
-    {
-        "type": "sensor",
-        "key": "ppv2",
-        "name": "PV2 Power",
-        "unit": UnitOfPower.WATT,
-        "icon": "mdi:flash",
-    },
-    {
-        "type": "sensor",
-        "key": "ppv3",
-        "name": "PV3 Power",
-        "unit": UnitOfPower.WATT,
-        "icon": "mdi:flash",
-    },
-    {
-        "type": "sensor",
-        "key": "vacr",  # e.g. 6145 => 61.45 V? Or is it AC voltage in 0.1?
-        "name": "AC Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-        "scale": 0.1,
-    },
-    {
-        "type": "sensor",
-        "key": "vepsr",  # e.g. 6145 => 61.45 V? Or is it AC voltage in 0.1?
-        "name": "EPS Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-        "scale": 0.1,
-    },
-    {
-        "type": "sensor",
-        "key": "pEpsL1N",
-        "name": "Line 1 Power",
-        "unit": UnitOfPower.WATT,
-        "icon": "mdi:flash",
-    },
-    {
-        "type": "sensor",
-        "key": "pEpsL2N",  
-        "name": "Line 2 Power",
-        "unit": UnitOfPower.WATT,
-        "icon": "mdi:flash",
-    },
-    {
-        "type": "sensor",
-        "key": "peps", 
-        "name": "EPS Watt",
-        "unit": UnitOfPower.WATT,
-        "icon": "mdi:flash",
-    },
-    {
-        "type": "sensor",
-        "key": "fac",
-        "name": "AC Frequency",
-        "unit": UnitOfFrequency.HERTZ,
-        "scale": 0.01,
-    },
-    {
-        "type": "sensor",
-        "key": "feps",
-        "name": "EPS Frequency",
-        "unit": UnitOfFrequency.HERTZ,
-        "scale": 0.01,
-    },
-    {
-        "type": "sensor",
-        "key": "pToGrid",
-        "name": "Power to Grid",
-        "unit": UnitOfPower.WATT,
-        "icon": "mdi:transmission-tower-export",
-    },
-    {
-        "type": "sensor",
-        "key": "pToUser",
-        "name": "Power to User Load",
-        "unit": UnitOfPower.WATT,
-        "icon": "mdi:home-import-outline",
-    },
-    {
-        "type": "sensor",
-        "key": "tradiator1",
-        "name": "Radiator Temp 1",
-        "unit": UnitOfTemperature.CELSIUS,
-    },
-    {
-        "type": "sensor",
-        "key": "tradiator2",
-        "name": "Radiator Temp 2",
-        "unit": UnitOfTemperature.CELSIUS,
-    },
-    {
-        "type": "sensor",
-        "key": "soc",
-        "name": "Runtime SoC",
-        "unit": PERCENTAGE,
-        "description": "Battery SoC from runtime data",
-    },
-    {
-        "type": "sensor",
-        "key": "vBat",
-        "name": "Battery Voltage (Raw)",
-        "unit": UnitOfElectricPotential.VOLT,
-        "scale": 0.1,  # 530 => 53.0
-    },
-    {
-        "type": "sensor",
-        "key": "pCharge",
-        "name": "Battery Charging Power",
-        "unit": UnitOfPower.WATT,
-    },
-    {
-        "type": "sensor",
-        "key": "pDisCharge",
-        "name": "Battery Discharging Power",
-        "unit": UnitOfPower.WATT,
-    },
-    {
-        "type": "sensor",
-        "key": "batPower",
-        "name": "Battery Power (Net)",
-        "unit": UnitOfPower.WATT,
-        "description": "Negative => Discharging, Positive => Charging",
-    },
-    {
-        "type": "sensor",
-        "key": "maxChgCurrValue",
-        "name": "Max Charge Current",
-        "unit": "A",  # or UnitOfElectricCurrent.AMPERE
-    },
-    {
-        "type": "sensor",
-        "key": "maxDischgCurrValue",
-        "name": "Max Discharge Current",
-        "unit": "A",
-    },
-    {
-        "type": "sensor",
-        "key": "genVolt",
-        "name": "Generator Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-    },
-    {
-        "type": "sensor",
-        "key": "genFreq",
-        "name": "Generator Frequency",
-        "unit": UnitOfFrequency.HERTZ,
-    },
-    {
-        "type": "sensor",
-        "key": "deviceTime",
-        "name": "Last Update",
-    },
-    {
-        "type": "sensor",
-        "key": "consumptionPower",
-        "name": "Consumption Power",
-        "unit": UnitOfPower.WATT,
-        "description": "Load consumption power if provided",
-    },
-    {
-        "type": "sensor",
-        "key": "fwCode",
-        "name": "Firmware Code",
-        "unit": None,
-        "description": "Load consumption power if provided",
-    },
-    {
-        "type": "binary_sensor",
-        "key": "genDryContact",
-        "name": "Generator Dry Contact",
-        "calc": lambda runtime: bool(runtime.genDryContact == "ON"),
-        "device_class": BinarySensorDeviceClass.CONNECTIVITY,
-    },
-    {
-        "type": "binary_sensor",
-        "key": "_12KUsingGenerator",
-        "name": "12K Generator State",
-        "device_class": BinarySensorDeviceClass.CONNECTIVITY,
-    },
-    {
-        "type": "binary_sensor",
-        "key": "bmsCharge",
-        "name": "BMS Allow Charging",
-        "device_class": BinarySensorDeviceClass.BATTERY_CHARGING,
-    },
-    {
-        "type": "binary_sensor",
-        "key": "bmsDischarge",
-        "name": "BMS Allow Discharging",
-        "device_class": BinarySensorDeviceClass.BATTERY_CHARGING,
-    },
-]
+RUNTIME_SENSORS = (
+    EG4Definition(
+        key="lost",
+        name="Inverter Lost State (Raw)",
+        icon="mdi:alert",
+        description="Indicates if inverter is lost/offline (True/False)",
+    ),
+    EG4Definition(
+        key="statusText",
+        name="Inverter Status Text",
+        icon="mdi:information-outline",
+    ),
+    EG4Definition(
+        key="batteryType",
+        name="Battery Type",
+    ),
+    EG4Definition(
+        key="batCapacity",  # Raw Amp-hours from the device
+        name="Battery Capacity",
+        unit="kWh",
+        icon="mdi:battery",  # or an appropriate icon
+        scale=0.0512,  # 51.2 / 1000
+        description="Battery capacity in kWh (converted from Ah at 51.2V nominal)",
+    ),
+    EG4Definition(
+        key="batParallelNum",
+        name="Battery Parallel Number",
+        icon="mdi:battery-plus",
+    ),
+    EG4Definition(
+        key="vpv1",
+        name="PV1 Voltage",
+        unit=UnitOfElectricPotential.VOLT,
+        scale=0.1,  # if 2098 => 20.98, adjust if needed
+        icon="mdi:solar-panel",
+    ),
+    EG4Definition(
+        key="vpv2",
+        name="PV2 Voltage",
+        unit=UnitOfElectricPotential.VOLT,
+        scale=0.1,
+        icon="mdi:solar-panel",
+    ),
+    EG4Definition(
+        key="vpv3",
+        name="PV3 Voltage",
+        unit=UnitOfElectricPotential.VOLT,
+        scale=0.1,
+        icon="mdi:solar-panel",
+    ),
+    EG4Definition(
+        key="ppv",
+        name="Total PV Power",
+        unit=UnitOfPower.WATT,
+        icon="mdi:flash",
+        state_class=SensorStateClass.MEASUREMENT,
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="ppv1",
+        name="PV1 Power",
+        unit=UnitOfPower.WATT,
+        icon="mdi:flash",
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="ppv2",
+        name="PV2 Power",
+        unit=UnitOfPower.WATT,
+        icon="mdi:flash",
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="ppv3",
+        name="PV3 Power",
+        unit=UnitOfPower.WATT,
+        icon="mdi:flash",
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="vacr",  # e.g. 6145 => 61.45 V? Or is it AC voltage in 0.1?
+        name="AC Voltage",
+        unit=UnitOfElectricPotential.VOLT,
+        scale=0.1,
+    ),
+    EG4Definition(
+        key="vepsr",  # e.g. 6145 => 61.45 V? Or is it AC voltage in 0.1?
+        name="EPS Voltage",
+        unit=UnitOfElectricPotential.VOLT,
+        scale=0.1,
+    ),
+    EG4Definition(
+        key="pEpsL1N",
+        name="Line 1 Power",
+        unit=UnitOfPower.WATT,
+        icon="mdi:flash",
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="pEpsL2N",  
+        name="Line 2 Power",
+        unit=UnitOfPower.WATT,
+        icon="mdi:flash",
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="peps", 
+        name="EPS Watt",
+        unit=UnitOfPower.WATT,
+        icon="mdi:flash",
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="fac",
+        name="AC Frequency",
+        unit=UnitOfFrequency.HERTZ,
+        scale=0.01,
+    ),
+    EG4Definition(
+        key="feps",
+        name="EPS Frequency",
+        unit=UnitOfFrequency.HERTZ,
+        scale=0.01,
+    ),
+    EG4Definition(
+        key="pToGrid",
+        name="Power to Grid",
+        unit=UnitOfPower.WATT,
+        icon="mdi:transmission-tower-export",
+        state_class=SensorStateClass.MEASUREMENT,
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="pToUser",
+        name="Power to User Load",
+        unit=UnitOfPower.WATT,
+        icon="mdi:home-import-outline",
+        state_class=SensorStateClass.MEASUREMENT,
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="tradiator1",
+        name="Radiator Temp 1",
+        unit=UnitOfTemperature.CELSIUS,
+    ),
+    EG4Definition(
+        key="tradiator2",
+        name="Radiator Temp 2",
+        unit=UnitOfTemperature.CELSIUS,
+    ),
+    EG4Definition(
+        key="soc",
+        name="Runtime SoC",
+        unit=PERCENTAGE,
+        description="Battery SoC from runtime data",
+    ),
+    EG4Definition(
+        key="vBat",
+        name="Battery Voltage (Raw)",
+        unit=UnitOfElectricPotential.VOLT,
+        scale=0.1,  # 530 => 53.0
+    ),
+    EG4Definition(
+        key="pCharge",
+        name="Battery Charging Power",
+        unit=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="pDisCharge",
+        name="Battery Discharging Power",
+        unit=UnitOfPower.WATT,
+        state_class=SensorStateClass.MEASUREMENT,
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="batPower",
+        name="Battery Power (Net)",
+        unit=UnitOfPower.WATT,
+        description="Negative => Discharging, Positive => Charging",
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="maxChgCurrValue",
+        name="Max Charge Current",
+        unit="A",  # or UnitOfElectricCurrent.AMPERE
+    ),
+    EG4Definition(
+        key="maxDischgCurrValue",
+        name="Max Discharge Current",
+        unit="A",
+    ),
+    EG4Definition(
+        key="genVolt",
+        name="Generator Voltage",
+        unit=UnitOfElectricPotential.VOLT,
+    ),
+    EG4Definition(
+        key="genFreq",
+        name="Generator Frequency",
+        unit=UnitOfFrequency.HERTZ,
+    ),
+    EG4Definition(
+        key="deviceTime",
+        name="Last Update",
+    ),
+    EG4Definition(
+        key="consumptionPower",
+        name="Consumption Power",
+        unit=UnitOfPower.WATT,
+        description="Load consumption power if provided",
+        state_class=SensorStateClass.MEASUREMENT,
+        **POWER_DEADBAND,
+    ),
+    EG4Definition(
+        key="fwCode",
+        name="Firmware Code",
+        description="Inverter firmware code",
+    ),
+    EG4Definition(
+        platform="binary_sensor",
+        key="genDryContact",
+        name="Generator Dry Contact",
+        calc=lambda runtime: read_field(runtime, "genDryContact") == "ON",
+        device_class=BinarySensorDeviceClass.CONNECTIVITY,
+    ),
+    EG4Definition(
+        platform="binary_sensor",
+        key="_12KUsingGenerator",
+        name="12K Generator State",
+        device_class=BinarySensorDeviceClass.CONNECTIVITY,
+    ),
+    EG4Definition(
+        platform="binary_sensor",
+        key="bmsCharge",
+        name="BMS Allow Charging",
+        device_class=BinarySensorDeviceClass.BATTERY_CHARGING,
+    ),
+    EG4Definition(
+        platform="binary_sensor",
+        key="bmsDischarge",
+        name="BMS Allow Discharging",
+        device_class=BinarySensorDeviceClass.BATTERY_CHARGING,
+    ),
+)
 
 
 # -------------------------------------------------------------------------
@@ -448,148 +511,310 @@ RUNTIME_SENSORS = [
 #    Data from coordinator.data["battery"] (the high-level summary),
 #    not the per-battery details in battery["battery_units"].
 # -------------------------------------------------------------------------
-BATTERY_SUMMARY_SENSORS = [
-    {
-        "type": "sensor",
-        "key": "remainCapacity",
-        "name": "Battery Remain Capacity",
-        "unit": "kWh",
-        "scale": 0.0512,
-    },
-    {
-        "type": "sensor",
-        "key": "fullCapacity",
-        "name": "Battery Full Capacity",
-        "unit": "kWh",
-        "icon": "mdi:battery",  # or an appropriate icon
-        "scale": 0.0512,
-    },
-    {
-        "type": "sensor",
-        "key": "currentText",
-        "name": "Battery Current Text",
-        "unit": "A",
-        "description": "String representation of current, e.g. '-5.1'",
-    },
-    {
-        "type": "sensor",
-        "key": "totalNumber",
-        "name": "Number of Batteries",
-        "unit": None,
-        "description": "Count of the number of batteries identified by the inverter",
-    },
-    {
-        "type": "sensor",
-        "key": "totalVoltageText",
-        "name": "Battery Voltage (Text)",
-        "unit": UnitOfElectricPotential.VOLT,
-    },
-]
+BATTERY_SUMMARY_SENSORS = (
+    EG4Definition(
+        key="remainCapacity",
+        name="Battery Remain Capacity",
+        unit="kWh",
+        scale=0.0512,
+    ),
+    EG4Definition(
+        key="fullCapacity",
+        name="Battery Full Capacity",
+        unit="kWh",
+        icon="mdi:battery",  # or an appropriate icon
+        scale=0.0512,
+    ),
+    EG4Definition(
+        key="currentText",
+        name="Battery Current Text",
+        unit="A",
+        description="String representation of current, e.g. '-5.1'",
+    ),
+    EG4Definition(
+        key="totalNumber",
+        name="Number of Batteries",
+        description="Count of the number of batteries identified by the inverter",
+    ),
+    EG4Definition(
+        key="totalVoltageText",
+        name="Battery Voltage (Text)",
+        unit=UnitOfElectricPotential.VOLT,
+    ),
+)
 
 
 # "per-battery" definitions that apply to multiple platforms
-PER_BATTERY_DEFS = [
-    {
-        "type": "sensor",
-        "key": "batterySn",
-        "name": "Battery {binfo.batIndex} SN",
-        "unit": PERCENTAGE,
-    },
-    {
-        "type": "sensor",
-        "key": "soc",
-        "name": "Battery {binfo.batIndex} SoC",
-        "unit": PERCENTAGE,
-    },
-    {
-        "type": "sensor",
-        "key": "totalVoltage",
-        "name": "Battery {binfo.batIndex} Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-        "scale": 0.01,  # 5333 => 53.33 if needed
-    },
-    {
-        "type": "sensor",
-        "key": "current",
-        "name": "Battery {binfo.batIndex} Current",
-        "unit": "A",  # negative => discharge
-    },
-    {
-        "type": "sensor",
-        "key": "soh",
-        "name": "Battery {binfo.batIndex} SoH",
-        "unit": PERCENTAGE,
-    },
-    {
-        "type": "sensor",
-        "key": "cycleCnt",
-        "name": "Battery {binfo.batIndex} Cycles",
-        "unit": None,
-    },
-    {
-        "type": "sensor",
-        "key": "batMaxCellTemp",
-        "name": "Battery {binfo.batIndex} Max Cell Temperature",
-        "unit": UnitOfTemperature.CELSIUS,
-        "scale": 0.1,
-    },
-    {
-        "type": "sensor",
-        "key": "batMinCellTemp",
-        "name": "Battery {binfo.batIndex} Min Cell Temperature",
-        "unit": UnitOfTemperature.CELSIUS,
-        "scale": 0.1,
-    },
-    {
-        "type": "sensor",
-        "key": "batMaxCellVoltage",
-        "name": "Battery {binfo.batIndex} Max Cell Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-        "scale": 0.001,
-    },
-    {
-        "type": "sensor",
-        "key": "batMinCellVoltage",
-        "name": "Battery {binfo.batIndex} Min Cell Voltage",
-        "unit": UnitOfElectricPotential.VOLT,
-        "scale": 0.001,
-    },
-    {
-        "type": "sensor",
-        "key": "fwVersionText",
-        "name": "Battery {binfo.batIndex} Firmware Version",
-        "unit": None,
-    },
-    {
-        "type": "sensor",
-        "key": "noticeInfo",
-        "name": "Battery {binfo.batIndex} Notice Text",
-        "unit": None,
-    },
-    {
-        "type": "binary_sensor",
-        "key": "notice",
-        "name": "Battery {binfo.batIndex} Notice Active",
-        "calc": lambda binfo: bool(binfo.noticeInfo),
-        "device_class": BinarySensorDeviceClass.TAMPER,
-    },
-]
-
-SETTING_SENSORS = [
-    {
-        "type": "sensor",
-        "key": "HOLD_EPS_FREQ_SET",
-        "name": "EG4 EPS Frequency Setting",
-        "unit": None,
-        "unit": UnitOfFrequency.HERTZ,
-        "scale": 1,
-    },
-    {
-        "type": "sensor",
-        "key": "HOLD_EPS_VOLT_SET",
-        "name": "EG4 EPS Voltage Setting",
-        "unit": None,
-        "unit": UnitOfElectricPotential.VOLT,
-        "scale": 1,
-    }
-]
+PER_BATTERY_DEFS = (
+    EG4Definition(
+        key="batterySn",
+        name="Battery {binfo.batIndex} SN",
+    ),
+    EG4Definition(
+        key="soc",
+        name="Battery {binfo.batIndex} SoC",
+        unit=PERCENTAGE,
+    ),
+    EG4Definition(
+        key="totalVoltage",
+        name="Battery {binfo.batIndex} Voltage",
+        unit=UnitOfElectricPotential.VOLT,
+        scale=0.01,  # 5333 => 53.33 if needed
+    ),
+    EG4Definition(
+        key="current",
+        name="Battery {binfo.batIndex} Current",
+        unit="A",  # negative => discharge
+    ),
+    EG4Definition(
+        key="soh",
+        name="Battery {binfo.batIndex} SoH",
+        unit=PERCENTAGE,
+    ),
+    EG4Definition(
+        key="cycleCnt",
+        name="Battery {binfo.batIndex} Cycles",
+    ),
+    EG4Definition(
+        key="batMaxCellTemp",
+        name="Battery {binfo.batIndex} Max Cell Temperature",
+        unit=UnitOfTemperature.CELSIUS,
+        scale=0.1,
+    ),
+    EG4Definition(
+        key="batMinCellTemp",
+        name="Battery {binfo.batIndex} Min Cell Temperature",
+        unit=UnitOfTemperature.CELSIUS,
+        scale=0.1,
+    ),
+    EG4Definition(
+        key="batMaxCellVoltage",
+        name="Battery {binfo.batIndex} Max Cell Voltage",
+        unit=UnitOfElectricPotential.VOLT,
+        scale=0.001,
+    ),
+    EG4Definition(
+        key="batMinCellVoltage",
+        name="Battery {binfo.batIndex} Min Cell Voltage",
+        unit=UnitOfElectricPotential.VOLT,
+        scale=0.001,
+    ),
+    EG4Definition(
+        key="fwVersionText",
+        name="Battery {binfo.batIndex} Firmware Version",
+    ),
+    EG4Definition(
+        key="noticeInfo",
+        name="Battery {binfo.batIndex} Notice Text",
+    ),
+    EG4Definition(
+        platform="binary_sensor",
+        key="notice",
+        name="Battery {binfo.batIndex} Notice Active",
+        calc=lambda binfo: bool(read_field(binfo, "noticeInfo")),
+        device_class=BinarySensorDeviceClass.TAMPER,
+    ),
+)
+
+SETTING_SENSORS = (
+    EG4Definition(
+        key="HOLD_EPS_FREQ_SET",
+        name="EG4 EPS Frequency Setting",
+        unit=UnitOfFrequency.HERTZ,
+    ),
+    EG4Definition(
+        key="HOLD_EPS_VOLT_SET",
+        name="EG4 EPS Voltage Setting",
+        unit=UnitOfElectricPotential.VOLT,
+    ),
+)
+
+
+# -------------------------------------------------------------------------
+# ANALYTICS SENSORS
+#    Data from coordinator.data["analytics"], pack figures computed each
+#    poll from the per-battery values (see analytics.py)
+# -------------------------------------------------------------------------
+ANALYTICS_SENSORS = (
+    EG4Definition(
+        key="cellSpread",
+        name="Pack Cell Imbalance",
+        unit=UnitOfElectricPotential.MILLIVOLT,
+        icon="mdi:scale-unbalanced",
+        state_class=SensorStateClass.MEASUREMENT,
+        description="Smoothed max-min cell voltage of the worst module",
+    ),
+    EG4Definition(
+        key="cellSpreadStdDev",
+        name="Pack Cell Imbalance Deviation",
+        unit=UnitOfElectricPotential.MILLIVOLT,
+        icon="mdi:sigma",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        description="Rolling standard deviation of the worst module's cell spread",
+    ),
+    EG4Definition(
+        key="socSpread",
+        name="Pack SoC Imbalance",
+        unit=PERCENTAGE,
+        icon="mdi:battery-sync",
+        state_class=SensorStateClass.MEASUREMENT,
+        description="Highest minus lowest module SoC",
+    ),
+    EG4Definition(
+        key="hottestModule",
+        name="Hottest Battery Module",
+        icon="mdi:thermometer-alert",
+        description="Index of the module with the highest smoothed cell temperature",
+    ),
+    EG4Definition(
+        key="hottestModuleTemp",
+        name="Hottest Battery Module Temperature",
+        unit=UnitOfTemperature.CELSIUS,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        state_class=SensorStateClass.MEASUREMENT,
+        description="Smoothed max cell temperature of the hottest module",
+    ),
+    EG4Definition(
+        key="sohDeclineRate",
+        name="Battery SoH Decline Rate",
+        unit="%/yr",
+        icon="mdi:battery-heart-variant",
+        state_class=SensorStateClass.MEASUREMENT,
+        description="Fastest SoH decline of any module, from a least-squares trend",
+    ),
+)
+
+
+# -------------------------------------------------------------------------
+# METRIC SENSORS
+#    Data from coordinator.data["metrics"], integration health rather than
+#    inverter values (poll scheduling, rate limiting, ...)
+# -------------------------------------------------------------------------
+METRIC_SENSORS = (
+    EG4Definition(
+        key="pollLag",
+        name="Poll Lag",
+        unit=UnitOfTime.SECONDS,
+        icon="mdi:timer-sand",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        description="Seconds between the scheduled poll and its last rate-limited request",
+    ),
+    EG4Definition(
+        key="queueDepth",
+        name="Request Queue Depth",
+        icon="mdi:tray-full",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        description="Cloud requests waiting on the fleet-wide rate limit",
+    ),
+    EG4Definition(
+        key="uploadPeriod",
+        name="Upload Period",
+        unit=UnitOfTime.SECONDS,
+        icon="mdi:upload-network",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.MEASUREMENT,
+        description="Learned interval between dongle uploads to the cloud",
+    ),
+    EG4Definition(
+        key="unchangedPolls",
+        name="Unchanged Polls",
+        icon="mdi:sync-off",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        description="Polls that returned an upload already seen and were skipped",
+    ),
+    EG4Definition(
+        key="suppressedWrites",
+        name="Suppressed State Writes",
+        icon="mdi:database-minus",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        description="Sensor updates held back because the change was inside the deadband",
+    ),
+    EG4Definition(
+        key="fetchErrors",
+        name="Fetch Errors",
+        icon="mdi:cloud-alert",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        description="Failed endpoint requests; diagnostics break them down by error class",
+    ),
+    EG4Definition(
+        key="requestsSaved",
+        name="Requests Saved At Night",
+        icon="mdi:weather-night",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        description="Cloud requests night mode avoided, compared with the day schedule",
+    ),
+)
+
+
+# -------------------------------------------------------------------------
+# LOOKUP TABLE
+#    group -> ((key, accessor, definition), ...), validated and built once.
+#    "battery_units" holds the per-battery definitions, applied to each unit.
+# -------------------------------------------------------------------------
+DEFINITION_GROUPS = {
+    "energy": ENERGY_SENSORS,
+    "runtime": RUNTIME_SENSORS,
+    "settings": SETTING_SENSORS,
+    "battery": BATTERY_SUMMARY_SENSORS,
+    "analytics": ANALYTICS_SENSORS,
+    "metrics": METRIC_SENSORS,
+}
+
+
+def make_accessor(key: str) -> Callable[[Any], Any]:
+    """Return a reader for one field of a model object or a plain dict."""
+
+    def accessor(data: Any) -> Any:
+        return read_field(data, key)
+
+    return accessor
+
+
+def _build_lookup(groups: dict[str, tuple[EG4Definition, ...]]):
+    lookup = {}
+    for group, definitions in groups.items():
+        seen = set()
+        for definition in definitions:
+            # Two definitions with the same key would share a unique_id
+            if (definition.platform, definition.key) in seen:
+                raise ValueError(f"Duplicate EG4 definition {group}.{definition.key}")
+            seen.add((definition.platform, definition.key))
+        lookup[group] = tuple(
+            (definition.key, make_accessor(definition.key), definition)
+            for definition in definitions
+        )
+    return lookup
+
+
+DEFINITION_LOOKUP = _build_lookup(
+    {**DEFINITION_GROUPS, "battery_units": PER_BATTERY_DEFS}
+)
+
+
+# -------------------------------------------------------------------------
+# PLATFORM VIEWS
+#    Each platform only walks the definitions of its own type; the filtered
+#    tuples are built on first use and then reused.
+# -------------------------------------------------------------------------
+@cache
+def platform_definitions(platform: str) -> tuple[tuple[str, EG4Definition], ...]:
+    """Return (parent_key, definition) pairs of the given platform type."""
+    return tuple(
+        (parent_key, definition)
+        for parent_key, definitions in DEFINITION_GROUPS.items()
+        for definition in definitions
+        if definition.platform == platform
+    )
+
+
+@cache
+def per_battery_definitions(platform: str) -> tuple[EG4Definition, ...]:
+    """Return the per-battery definitions of the given platform type."""
+    return tuple(d for d in PER_BATTERY_DEFS if d.platform == platform)
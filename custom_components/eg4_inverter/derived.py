@@ -0,0 +1,229 @@
+"""User-defined sensors: arithmetic over definition keys, compiled once.
+
+Each line of the option is ``Name [unit] = expression``, e.g.
+
+    Battery Net Power [W] = pDisCharge - pCharge
+    Self Consumption [%] = 100 * (consumptionPower - pToUser) / consumptionPower
+
+Names in an expression are definition keys, written ``group.key`` where a
+key exists in more than one group. Only numbers, the arithmetic operators
+and ``abs``/``min``/``max``/``round`` are accepted. Each expression is
+parsed once into a tree of closures that read ValueStore slots directly, so
+evaluating it after the poll's decode is a few function calls, with no
+template rendering and no state machine lookups. A missing input, or a
+division by zero, makes the result unknown.
+"""
+import ast
+import math
+import operator
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.util import slugify
+
+from .const import DERIVED_GROUP
+from .decoder import ValueStore
+from .definitions import DEFINITION_LOOKUP
+
+# Groups a bare key is looked up in; per-battery values are not addressable
+REFERENCE_GROUPS = (
+    "runtime",
+    "energy",
+    "battery",
+    "analytics",
+    "settings",
+    "metrics",
+)
+
+_LINE_RE = re.compile(
+    r"^(?P<name>[^=\[]+?)\s*(?:\[(?P<unit>[^\]]*)\])?\s*=\s*(?P<expr>.+)$"
+)
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    # Float power, so a huge exponent overflows instead of running away
+    ast.Pow: math.pow,
+}
+_UNARY_OPS = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+_FUNCTIONS = {"abs": abs, "min": min, "max": max, "round": round}
+
+_Evaluator = Callable[[list[Any]], Any]
+
+
+class DerivedError(ValueError):
+    """A derived sensor line that cannot be used."""
+
+
+@dataclass(frozen=True, slots=True)
+class DerivedSpec:
+    """One parsed derived sensor, not yet bound to a ValueStore."""
+
+    key: str
+    name: str
+    unit: str | None
+    expression: str
+    tree: ast.expr
+    references: frozenset[tuple[str, str]]
+
+
+def _resolve(node: ast.expr) -> tuple[str, str]:
+    """(group, key) named by a ``key`` or ``group.key`` node."""
+    if isinstance(node, ast.Attribute):
+        if not isinstance(node.value, ast.Name):
+            raise DerivedError("only key or group.key names are allowed")
+        group, key = node.value.id, node.attr
+        if group not in REFERENCE_GROUPS or not any(
+            k == key for k, _, _ in DEFINITION_LOOKUP[group]
+        ):
+            raise DerivedError(f"unknown value {group}.{key}")
+        return group, key
+    if not isinstance(node, ast.Name):
+        raise DerivedError(f"{type(node).__name__} is not allowed")
+    key = node.id
+    groups = [
+        group
+        for group in REFERENCE_GROUPS
+        if any(k == key for k, _, _ in DEFINITION_LOOKUP[group])
+    ]
+    if not groups:
+        raise DerivedError(f"unknown value {key}")
+    if len(groups) > 1:
+        choices = ", ".join(f"{group}.{key}" for group in groups)
+        raise DerivedError(f"{key} is ambiguous, write one of {choices}")
+    return groups[0], key
+
+
+def _check(node: ast.AST, references: set) -> None:
+    """Reject anything but the whitelisted syntax; collect the references."""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise DerivedError(f"only numeric constants are allowed: {node.value!r}")
+    elif isinstance(node, (ast.Name, ast.Attribute)):
+        references.add(_resolve(node))
+    elif isinstance(node, ast.BinOp):
+        if type(node.op) not in _BINARY_OPS:
+            raise DerivedError(f"operator {type(node.op).__name__} is not allowed")
+        _check(node.left, references)
+        _check(node.right, references)
+    elif isinstance(node, ast.UnaryOp):
+        if type(node.op) not in _UNARY_OPS:
+            raise DerivedError(f"operator {type(node.op).__name__} is not allowed")
+        _check(node.operand, references)
+    elif isinstance(node, ast.Call):
+        if (
+            not isinstance(node.func, ast.Name)
+            or node.func.id not in _FUNCTIONS
+            or node.keywords
+            or not node.args
+        ):
+            raise DerivedError("only abs(), min(), max() and round() may be called")
+        for arg in node.args:
+            _check(arg, references)
+    else:
+        raise DerivedError(f"{type(node).__name__} is not allowed")
+
+
+def parse_derived(text: str | None) -> list[DerivedSpec]:
+    """Parse and validate the option text, one sensor per non-blank line."""
+    specs = []
+    keys = set()
+    for number, line in enumerate((text or "").splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _LINE_RE.match(line)
+        if match is None:
+            raise DerivedError(f"line {number}: expected 'Name [unit] = expression'")
+        name = match["name"].strip()
+        key = slugify(name)
+        if not key or key in keys:
+            raise DerivedError(f"line {number}: duplicate or empty name {name!r}")
+        keys.add(key)
+        try:
+            tree = ast.parse(match["expr"], mode="eval").body
+            references: set[tuple[str, str]] = set()
+            _check(tree, references)
+        except SyntaxError as err:
+            raise DerivedError(f"line {number}: {err.msg}") from err
+        except (ValueError, RecursionError) as err:
+            # A NUL byte, or nesting too deep to parse or check
+            raise DerivedError(f"line {number}: {err}") from err
+        except DerivedError as err:
+            raise DerivedError(f"line {number}: {err}") from err
+        specs.append(
+            DerivedSpec(
+                key,
+                name,
+                (match["unit"] or "").strip() or None,
+                match["expr"].strip(),
+                tree,
+                frozenset(references),
+            )
+        )
+    return specs
+
+
+def _strict(op: Callable) -> Callable:
+    def apply(*args):
+        if any(arg is None for arg in args):
+            return None
+        try:
+            return op(*args)
+        except (ArithmeticError, ValueError, TypeError):
+            return None
+
+    return apply
+
+
+def _compile(node: ast.expr, store: ValueStore) -> _Evaluator:
+    if isinstance(node, ast.Constant):
+        constant = node.value
+        return lambda values: constant
+    if isinstance(node, (ast.Name, ast.Attribute)):
+        slot = store.slot(*_resolve(node))
+        return lambda values: values[slot]
+    if isinstance(node, ast.BinOp):
+        left, right = _compile(node.left, store), _compile(node.right, store)
+        op = _strict(_BINARY_OPS[type(node.op)])
+        return lambda values: op(left(values), right(values))
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile(node.operand, store)
+        op = _strict(_UNARY_OPS[type(node.op)])
+        return lambda values: op(operand(values))
+    args = [_compile(arg, store) for arg in node.args]
+    function = _strict(_FUNCTIONS[node.func.id])
+    return lambda values: function(*(arg(values) for arg in args))
+
+
+class DerivedSensors:
+    """The entry's derived sensors, compiled against its ValueStore."""
+
+    def __init__(self, specs: list[DerivedSpec], store: ValueStore) -> None:
+        self.specs = specs
+        self._store = store
+        self._compiled = [
+            (
+                store.add_slot(DERIVED_GROUP, spec.key),
+                spec.key,
+                _compile(spec.tree, store),
+            )
+            for spec in specs
+        ]
+
+    def evaluate(self) -> dict[str, Any]:
+        """Compute every derived value from the freshly decoded store."""
+        values = self._store.values
+        results = {}
+        for slot, key, evaluate in self._compiled:
+            value = evaluate(values)
+            if isinstance(value, float) and not math.isfinite(value):
+                value = None
+            values[slot] = results[key] = value
+        return results
@@ -0,0 +1,49 @@
+"""Diagnostics support for EG4 Inverter."""
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_USERNAME, CONF_PASSWORD, CONF_SERIAL_NUMBER
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD, CONF_SERIAL_NUMBER}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "metrics": coordinator.data.get("metrics") if coordinator.data else None,
+        "endpoints": {
+            key: child.last_update_success
+            for key, child in coordinator.children.items()
+        },
+        "backfill": {
+            "last_sample": coordinator.backfill.last_sample,
+            "watermark": coordinator.backfill.watermark,
+        },
+        "night_mode": {
+            "enabled": coordinator.night.enabled,
+            "asleep": coordinator.night.asleep,
+            "requests_saved": coordinator.night.requests_saved,
+        },
+        "system": {
+            "group": coordinator.system.display_name,
+            "members": len(coordinator.system.members),
+            "leader": coordinator.system.leader is coordinator,
+        }
+        if coordinator.system
+        else None,
+        "recent_alarms": list(coordinator.alarm_log.recent),
+        "settings_changes": list(coordinator.settings.changes),
+        "battery_modules": {
+            index: stats.as_dict()
+            for index, stats in coordinator.analytics.modules.items()
+        }
+        if coordinator.analytics
+        else {},
+    }
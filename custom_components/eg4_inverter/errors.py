@@ -0,0 +1,160 @@
+"""Typed results and retry policies for EG4 endpoint fetches."""
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from enum import StrEnum
+from types import ModuleType
+from typing import Any
+
+from aiohttp import ClientError, ClientResponseError, ContentTypeError
+
+from .const import FETCH_BACKOFF_BASE_SECONDS, FETCH_BACKOFF_MAX_SECONDS
+from .util import read_field
+
+# The client only reports the HTTP status inside the EG4APIError message
+_STATUS_RE = re.compile(r"API request failed: (\d{3})")
+
+
+class FetchError(StrEnum):
+    """Why an endpoint fetch produced no usable payload."""
+
+    TIMEOUT = "timeout"
+    CONNECTION = "connection"
+    AUTH = "auth"
+    SERVER = "server"
+    CLIENT = "client"
+    DECODE = "decode"
+    REJECTED = "rejected"
+    EMPTY = "empty"
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """How to react to one error class within a single poll."""
+
+    retries: int = 0
+    delay: float = 0.0
+    relogin: bool = False
+    # Stop calling the endpoint for a growing while after this error
+    backoff: bool = False
+
+
+RETRY_POLICIES = {
+    FetchError.TIMEOUT: RetryPolicy(retries=1, delay=0.5),
+    FetchError.CONNECTION: RetryPolicy(retries=1, delay=2.0),
+    FetchError.AUTH: RetryPolicy(retries=1, relogin=True),
+    # An expired session is answered with the HTML login page
+    FetchError.DECODE: RetryPolicy(retries=1, relogin=True),
+    FetchError.SERVER: RetryPolicy(backoff=True),
+    FetchError.CLIENT: RetryPolicy(),
+    FetchError.REJECTED: RetryPolicy(),
+    FetchError.EMPTY: RetryPolicy(),
+}
+
+
+@dataclass(slots=True)
+class FetchResult:
+    """Outcome of fetching one endpoint: a payload, or why there is none."""
+
+    endpoint: str
+    data: Any = None
+    error: FetchError | None = None
+    detail: str | None = None
+    attempts: int = 0
+    # Monotonic time the successful request was sent
+    requested: float | None = None
+    # True when the endpoint was skipped because it is backing off
+    skipped: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.skipped
+
+
+def fetch_exceptions(exceptions: ModuleType) -> tuple[type[BaseException], ...]:
+    """Exceptions a fetch can raise that ``classify`` knows how to handle."""
+    return (
+        asyncio.TimeoutError,
+        TimeoutError,
+        ClientError,
+        ValueError,
+        exceptions.EG4AuthError,
+        exceptions.EG4APIError,
+    )
+
+
+def classify(err: BaseException, exceptions: ModuleType) -> FetchError:
+    """Map an exception raised by a fetch to its error class."""
+    if isinstance(err, (asyncio.TimeoutError, TimeoutError)):
+        return FetchError.TIMEOUT
+    if isinstance(err, exceptions.EG4AuthError):
+        return FetchError.AUTH
+    if isinstance(err, exceptions.EG4APIError):
+        match = _STATUS_RE.search(str(err))
+        status = int(match.group(1)) if match else 0
+        if status in (401, 403):
+            return FetchError.AUTH
+        if 400 <= status < 500:
+            return FetchError.CLIENT
+        return FetchError.SERVER
+    if isinstance(err, (ContentTypeError, ValueError)):
+        # Non-JSON bodies and payloads the client's models could not parse
+        return FetchError.DECODE
+    if isinstance(err, ClientResponseError):
+        # Raised by requests made on the client's session, like the charts
+        if err.status in (401, 403):
+            return FetchError.AUTH
+        return FetchError.SERVER if err.status >= 500 else FetchError.CLIENT
+    return FetchError.CONNECTION
+
+
+def classify_payload(payload: Any) -> FetchError | None:
+    """Spot payloads that came back without raising but carry no data."""
+    if payload is None:
+        return FetchError.EMPTY
+    # The client returns an APIResponse(success=False) instead of raising,
+    # and the portal's own JSON says {"success": false}
+    if read_field(payload, "success") is False:
+        return FetchError.REJECTED
+    return None
+
+
+class FetchErrorTracker:
+    """Failure counts per error class and server backoff per endpoint."""
+
+    def __init__(self) -> None:
+        self.counts: dict[str, int] = {error.value: 0 for error in FetchError}
+        self._backoff_until: dict[str, float] = {}
+        self._backoff_level: dict[str, int] = {}
+        self._failing: set[str] = set()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def backing_off(self, endpoint: str) -> bool:
+        return time.monotonic() < self._backoff_until.get(endpoint, 0.0)
+
+    def record(self, endpoint: str, error: FetchError) -> bool:
+        """Count a failure; True if the endpoint was healthy until now."""
+        self.counts[error.value] += 1
+        first_failure = endpoint not in self._failing
+        self._failing.add(endpoint)
+        if RETRY_POLICIES[error].backoff:
+            level = self._backoff_level.get(endpoint, 0)
+            delay = min(
+                FETCH_BACKOFF_BASE_SECONDS * 2**level, FETCH_BACKOFF_MAX_SECONDS
+            )
+            self._backoff_until[endpoint] = time.monotonic() + delay
+            self._backoff_level[endpoint] = level + 1
+        return first_failure
+
+    def succeeded(self, endpoint: str) -> bool:
+        """Clear backoff; True if the endpoint had been failing."""
+        self._backoff_level.pop(endpoint, None)
+        self._backoff_until.pop(endpoint, None)
+        if endpoint in self._failing:
+            self._failing.discard(endpoint)
+            return True
+        return False
@@ -0,0 +1,77 @@
+"""Detect inverter state transitions between two runtime polls."""
+from typing import Any
+
+from .const import (
+    TRIGGER_WENT_OFFLINE,
+    TRIGGER_CAME_ONLINE,
+    TRIGGER_FAULT,
+    TRIGGER_FAULT_CLEARED,
+    TRIGGER_GENERATOR_STARTED,
+    TRIGGER_GENERATOR_STOPPED,
+    TRIGGER_CHARGE_INHIBITED,
+    TRIGGER_CHARGE_ALLOWED,
+)
+from .util import read_field
+
+
+def _is_fault(runtime: Any) -> bool:
+    return "fault" in str(read_field(runtime, "statusText") or "").lower()
+
+
+def _generator_running(runtime: Any) -> bool:
+    return bool(read_field(runtime, "_12KUsingGenerator")) or (
+        read_field(runtime, "genDryContact") == "ON"
+    )
+
+
+def detect_transitions(previous: Any, current: Any) -> list[tuple[str, dict]]:
+    """Compare two runtime payloads and return (trigger type, details) pairs.
+
+    Nothing is reported for the first poll, or when either side is missing.
+    """
+    if previous is None or current is None or previous is current:
+        return []
+
+    transitions = []
+
+    was_lost = bool(read_field(previous, "lost"))
+    is_lost = bool(read_field(current, "lost"))
+    if is_lost != was_lost:
+        transitions.append(
+            (TRIGGER_WENT_OFFLINE if is_lost else TRIGGER_CAME_ONLINE, {})
+        )
+
+    was_fault, is_fault = _is_fault(previous), _is_fault(current)
+    if is_fault != was_fault:
+        transitions.append(
+            (
+                TRIGGER_FAULT if is_fault else TRIGGER_FAULT_CLEARED,
+                {
+                    "status": read_field(current, "status"),
+                    "status_text": read_field(current, "statusText"),
+                    "previous_status_text": read_field(previous, "statusText"),
+                },
+            )
+        )
+
+    was_running = _generator_running(previous)
+    is_running = _generator_running(current)
+    if is_running != was_running:
+        transitions.append(
+            (
+                TRIGGER_GENERATOR_STARTED if is_running else TRIGGER_GENERATOR_STOPPED,
+                {"gen_volt": read_field(current, "genVolt")},
+            )
+        )
+
+    could_charge = bool(read_field(previous, "bmsCharge"))
+    can_charge = bool(read_field(current, "bmsCharge"))
+    if can_charge != could_charge:
+        transitions.append(
+            (
+                TRIGGER_CHARGE_ALLOWED if can_charge else TRIGGER_CHARGE_INHIBITED,
+                {"soc": read_field(current, "soc")},
+            )
+        )
+
+    return transitions
@@ -0,0 +1,188 @@
+"""Write decoded snapshots to a local time-series endpoint.
+
+Points are taken from the coordinator's ValueStore after each poll, so
+nothing goes through the Home Assistant state machine or recorder. Each
+snapshot becomes one Influx line per measurement, or Prometheus exposition
+samples with timestamps, and is POSTed in batches to the configured URL
+(an Influx write endpoint, or an import endpoint that takes timestamped
+Prometheus text such as VictoriaMetrics).
+"""
+import asyncio
+import logging
+import math
+from typing import Any
+
+from aiohttp import ClientError, ClientTimeout
+
+from .const import (
+    EXPORT_FORMAT_PROMETHEUS,
+    EXPORT_QUEUE_SIZE,
+    EXPORT_BATCH_SIZE,
+    EXPORT_FLUSH_SECONDS,
+    EXPORT_TIMEOUT_SECONDS,
+    EXPORT_MAX_BACKOFF_SECONDS,
+)
+from .decoder import PER_BATTERY_GROUP, ValueStore
+from .definitions import DEFINITION_LOOKUP
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_GROUPS = ("runtime", "energy", PER_BATTERY_GROUP)
+CONTENT_TYPES = {
+    EXPORT_FORMAT_PROMETHEUS: "text/plain; version=0.0.4",
+}
+
+# (measurement, tags, ((field, value), ...))
+_Point = tuple[str, dict[str, str], tuple[tuple[str, float], ...]]
+
+
+def _numeric_keys(group: str) -> tuple[str, ...]:
+    return tuple(
+        key
+        for key, _, definition in DEFINITION_LOOKUP[group]
+        if definition.platform == "sensor" and definition.numeric
+    )
+
+
+def _escape_tag(value: str) -> str:
+    for char in ("\\", ",", " ", "="):
+        value = value.replace(char, f"\\{char}")
+    return value
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def format_influx(points: list[_Point], timestamp: float) -> list[str]:
+    """Influx line protocol, one line per measurement and tag set."""
+    ts = int(timestamp * 1e9)
+    lines = []
+    for measurement, tags, fields in points:
+        tag_str = "".join(f",{k}={_escape_tag(v)}" for k, v in tags.items())
+        field_str = ",".join(f"{k}={v!r}" for k, v in fields)
+        lines.append(f"eg4_{measurement}{tag_str} {field_str} {ts}")
+    return lines
+
+
+def format_prometheus(points: list[_Point], timestamp: float) -> list[str]:
+    """Prometheus exposition samples, one per field."""
+    ts = int(timestamp * 1e3)
+    lines = []
+    for measurement, tags, fields in points:
+        labels = ",".join(f'{k}="{_escape_label(v)}"' for k, v in tags.items())
+        for key, value in fields:
+            lines.append(f"eg4_{measurement}_{key}{{{labels}}} {value!r} {ts}")
+    return lines
+
+
+FORMATTERS = {EXPORT_FORMAT_PROMETHEUS: format_prometheus}
+
+
+class EG4Exporter:
+    """Bounded queue of snapshots drained by one background writer.
+
+    ``async_enqueue`` never blocks the poll: when the endpoint is slow or
+    down the queue fills up and the oldest snapshots are dropped (and
+    counted) instead. The writer batches whatever is queued, and backs off
+    exponentially while the endpoint keeps failing.
+    """
+
+    def __init__(self, session, serial_number: str, store: ValueStore) -> None:
+        self._session = session
+        self._store = store
+        self._tags = {"serial": str(serial_number)}
+        self._fields = {group: _numeric_keys(group) for group in EXPORT_GROUPS}
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._url: str | None = None
+        self._format: str | None = None
+        self.dropped = 0
+        self.written = 0
+
+    def configure(self, url: str | None, export_format: str) -> None:
+        """Point the exporter at a new endpoint (an empty URL turns it off)."""
+        self._url = url or None
+        self._format = export_format
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def _fields_of(self, group: str, bat_index: Any = None):
+        values = self._store.values
+        fields = []
+        for key in self._fields[group]:
+            value = values[self._store.slot(group, key, bat_index)]
+            if value is not None and math.isfinite(value):
+                fields.append((key, float(value)))
+        return tuple(fields)
+
+    def _collect(self, data: dict[str, Any]) -> list[_Point]:
+        points = []
+        for group in ("runtime", "energy"):
+            if fields := self._fields_of(group):
+                points.append((group, self._tags, fields))
+        units = getattr(data.get("battery"), "battery_units", None) or []
+        for unit in units:
+            bat_index = getattr(unit, "batIndex", None)
+            if fields := self._fields_of(PER_BATTERY_GROUP, bat_index):
+                tags = {**self._tags, "battery": str(bat_index)}
+                points.append(("battery", tags, fields))
+        return points
+
+    def async_enqueue(self, timestamp: float, data: dict[str, Any]) -> None:
+        """Queue the snapshot just decoded into the store."""
+        if self._url is None:
+            return
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait((timestamp, self._collect(data)))
+
+    async def async_run(self) -> None:
+        """Drain the queue forever; run as an entry background task."""
+        backoff = EXPORT_FLUSH_SECONDS
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(EXPORT_FLUSH_SECONDS)
+            while len(batch) < EXPORT_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if self._url is None:
+                continue
+            try:
+                await self._async_write(batch)
+            except (ClientError, asyncio.TimeoutError) as err:
+                _LOGGER.warning("EG4 export to %s failed: %s", self._url, err)
+                # Put the batch back at the front; drop what no longer fits
+                pending = batch + [
+                    self._queue.get_nowait() for _ in range(self._queue.qsize())
+                ]
+                for item in pending[-EXPORT_QUEUE_SIZE:]:
+                    self._queue.put_nowait(item)
+                self.dropped += max(0, len(pending) - EXPORT_QUEUE_SIZE)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, EXPORT_MAX_BACKOFF_SECONDS)
+                continue
+            except Exception:  # pylint: disable=broad-except
+                # A batch that cannot be written at all is not retried, but
+                # the task keeps exporting the snapshots after it
+                _LOGGER.exception("Dropping an EG4 export batch")
+                self.dropped += len(batch)
+                continue
+            backoff = EXPORT_FLUSH_SECONDS
+            self.written += len(batch)
+
+    async def _async_write(self, batch) -> None:
+        formatter = FORMATTERS.get(self._format, format_influx)
+        lines = []
+        for timestamp, points in batch:
+            lines += formatter(points, timestamp)
+        if not lines:
+            return
+        async with self._session.post(
+            self._url,
+            data="\n".join(lines) + "\n",
+            headers={"Content-Type": CONTENT_TYPES.get(self._format, "text/plain")},
+            timeout=ClientTimeout(total=EXPORT_TIMEOUT_SECONDS),
+        ) as resp:
+            resp.raise_for_status()
@@ -0,0 +1,84 @@
+"""Fixed-size ring buffer of recent decoded coordinator snapshots."""
+import io
+import math
+from array import array
+from typing import Any
+
+from .decoder import ValueStore
+from .definitions import DEFINITION_LOOKUP
+
+SNAPSHOT_GROUPS = ("runtime", "energy", "battery")
+
+
+def snapshot_fields() -> tuple[tuple[str, str], ...]:
+    """(group, key) for every numeric inverter-level sensor value."""
+    return tuple(
+        (group, key)
+        for group in SNAPSHOT_GROUPS
+        for key, _, definition in DEFINITION_LOOKUP[group]
+        if definition.platform == "sensor" and definition.numeric
+    )
+
+
+class SnapshotRing:
+    """Keep the last ``size`` snapshots as rows of doubles.
+
+    Storage is allocated once: one flat ``array('d')`` of size x fields plus
+    one of timestamps, so memory does not grow with uptime and no model
+    objects are kept alive. Rows are copied out of the coordinator's
+    already-decoded ValueStore; missing values are stored as NaN.
+    """
+
+    def __init__(self, size: int, store: ValueStore) -> None:
+        fields = snapshot_fields()
+        self.columns = [f"{group}.{key}" for group, key in fields]
+        self._store = store
+        self._slots = [store.slot(group, key) for group, key in fields]
+        self._size = size
+        self._width = len(fields)
+        self._values = array("d", [math.nan]) * (size * self._width)
+        self._times = array("d", [math.nan]) * size
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float) -> None:
+        """Copy the numeric values of the latest decoded snapshot into a row."""
+        row = self._next * self._width
+        values = self._store.values
+        for offset, slot in enumerate(self._slots):
+            value = values[slot]
+            self._values[row + offset] = math.nan if value is None else value
+        self._times[self._next] = timestamp
+        self._next = (self._next + 1) % self._size
+        self._count = min(self._count + 1, self._size)
+
+    def rows(self):
+        """Yield (timestamp, values) oldest first."""
+        start = (self._next - self._count) % self._size
+        for i in range(self._count):
+            slot = (start + i) % self._size
+            row = slot * self._width
+            yield self._times[slot], self._values[row : row + self._width]
+
+    def as_json(self) -> dict[str, Any]:
+        return {
+            "columns": ["timestamp", *self.columns],
+            "rows": [
+                [ts, *(None if math.isnan(v) else v for v in values)]
+                for ts, values in self.rows()
+            ],
+        }
+
+    def as_csv(self) -> str:
+        # Only this export needs the csv module
+        import csv
+
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(["timestamp", *self.columns])
+        for ts, values in self.rows():
+            writer.writerow([ts, *("" if math.isnan(v) else v for v in values)])
+        return out.getvalue()
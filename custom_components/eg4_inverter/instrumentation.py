@@ -0,0 +1,133 @@
+"""Debug instrumentation: event loop lag and blocking calls during polls.
+
+Part of the poll path is synchronous: ``get_selected_inverter``,
+``set_selected_inverter`` and the client's model construction, which runs
+inside its awaited fetches, plus our own decode. None of that shows up as
+a slow request, only as the event loop being held.
+
+While a poll runs, a sampler on the loop wakes every 50 ms and
+measures how late it was woken; a watchdog thread watches the sampler's
+heartbeat, and when the loop has not come back for longer than the
+threshold it takes a sample of the loop thread's stack. Once the loop is
+free again the stall is logged with that stack and with the step the poll
+was in, so the blocking frame is visible without attaching a profiler.
+"""
+import asyncio
+import contextlib
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from .const import (
+    INSTRUMENT_LAG_INTERVAL_SECONDS,
+    INSTRUMENT_BLOCKING_THRESHOLD_SECONDS,
+    INSTRUMENT_STACK_DEPTH,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class LoopInstrumentation:
+    """Loop lag and blocking-step detection, active only while polls run."""
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self.enabled = False
+        self.threshold = INSTRUMENT_BLOCKING_THRESHOLD_SECONDS
+        # Step the poll is currently in, for attributing a stall
+        self.step = None
+        self._beat = 0.0
+        self._active = 0
+        self._loop_thread: int | None = None
+        self._sample: tuple[float, str | None, str] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+        # Per-poll figures, folded into the coordinator metrics
+        self.last_max_lag = 0.0
+        self.blocking_steps = 0
+
+    def configure(self, enabled: bool) -> None:
+        self.enabled = enabled
+        if not enabled:
+            self.async_stop()
+
+    def async_stop(self) -> None:
+        """Stop the watchdog thread (on unload, or when turned off)."""
+        self._stop.set()
+        self._watchdog = None
+
+    def _watch(self) -> None:
+        """Watchdog thread: sample the loop thread's stack while it is stuck."""
+        while not self._stop.wait(self.threshold / 2):
+            if not self._active or self._loop_thread is None:
+                continue
+            beat = self._beat
+            stalled = time.monotonic() - beat
+            if stalled < self.threshold or (self._sample and self._sample[0] == beat):
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = "".join(
+                traceback.format_stack(frame, limit=INSTRUMENT_STACK_DEPTH)
+            )
+            self._sample = (beat, self.step, stack)
+
+    async def _async_sample(self) -> None:
+        while True:
+            self._beat = started = time.monotonic()
+            await asyncio.sleep(INSTRUMENT_LAG_INTERVAL_SECONDS)
+            lag = time.monotonic() - started - INSTRUMENT_LAG_INTERVAL_SECONDS
+            self.last_max_lag = max(self.last_max_lag, lag)
+            if lag >= self.threshold:
+                self._report(lag, started)
+
+    def _report(self, lag: float, beat: float) -> None:
+        self.blocking_steps += 1
+        sample = self._sample if self._sample and self._sample[0] == beat else None
+        if sample is None:
+            _LOGGER.warning(
+                "%s: event loop blocked for %.0f ms in step %s",
+                self._name,
+                lag * 1000,
+                self.step,
+            )
+            return
+        _LOGGER.warning(
+            "%s: event loop blocked for %.0f ms in step %s, stack sample:\n%s",
+            self._name,
+            lag * 1000,
+            sample[1],
+            sample[2],
+        )
+
+    @contextlib.asynccontextmanager
+    async def cycle(self):
+        """Instrument one poll."""
+        self._loop_thread = threading.get_ident()
+        if self._watchdog is None:
+            self._stop = threading.Event()
+            self._watchdog = threading.Thread(
+                target=self._watch, name=f"{self._name} watchdog", daemon=True
+            )
+            self._watchdog.start()
+        self.last_max_lag = 0.0
+        self._active += 1
+        sampler = asyncio.ensure_future(self._async_sample())
+        try:
+            yield
+        finally:
+            self._active -= 1
+            sampler.cancel()
+            self.step = None
+
+    @contextlib.contextmanager
+    def in_step(self, step: str):
+        """Label what the poll is doing, for attributing a stall."""
+        previous, self.step = self.step, step
+        try:
+            yield
+        finally:
+            self.step = previous
@@ -0,0 +1,31 @@
+"""Describe EG4 inverter events for the logbook."""
+from collections.abc import Callable
+
+from homeassistant.core import Event, HomeAssistant, callback
+
+from .const import DOMAIN, EVENT_EG4_ALARM, EVENT_EG4_INVERTER
+
+
+@callback
+def async_describe_events(
+    hass: HomeAssistant,
+    async_describe_event: Callable[[str, str, Callable[[Event], dict[str, str]]], None],
+) -> None:
+    """Describe logbook events."""
+
+    @callback
+    def async_describe_alarm(event: Event) -> dict[str, str]:
+        return {
+            "name": f"EG4 Inverter {event.data.get('serial_number')}",
+            "message": f"reported {event.data.get('event')} at {event.data.get('time')}",
+        }
+
+    @callback
+    def async_describe_transition(event: Event) -> dict[str, str]:
+        return {
+            "name": f"EG4 Inverter {event.data.get('serial_number')}",
+            "message": str(event.data.get("type", "")).replace("_", " "),
+        }
+
+    async_describe_event(DOMAIN, EVENT_EG4_ALARM, async_describe_alarm)
+    async_describe_event(DOMAIN, EVENT_EG4_INVERTER, async_describe_transition)
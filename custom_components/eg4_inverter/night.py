@@ -0,0 +1,110 @@
+"""Night mode: poll less while the array cannot produce anything.
+
+Between sunset and sunrise PV power stays at zero and today's yield is
+frozen, yet every endpoint was still fetched on the day schedule. With
+night mode on, the coordinator sleeps while ``sun.sun`` is below the
+horizon or, without the sun integration, once PV power has read zero for a
+while. Asleep, polls are stretched by NIGHT_INTERVAL_FACTOR, so battery
+and load are still followed at a reduced rate. The energy endpoint is only
+read every NIGHT_ENERGY_INTERVAL_SECONDS; its import and usage counters
+still move at night, but slowly. Sunrise, or any PV power, wakes it and
+full polling resumes.
+
+The saving is counted against the day schedule: each stretched poll stands
+in for NIGHT_INTERVAL_FACTOR day polls making the same requests, and each
+skipped energy read is one request fewer.
+"""
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    NIGHT_INTERVAL_FACTOR,
+    NIGHT_ENERGY_INTERVAL_SECONDS,
+    NIGHT_PV_ZERO_SECONDS,
+    SUN_ENTITY,
+)
+
+STATE_ABOVE_HORIZON = "above_horizon"
+STATE_BELOW_HORIZON = "below_horizon"
+
+
+class NightMode:
+    """Decides when the coordinator sleeps, and counts what that saves."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.enabled = False
+        self.asleep = False
+        self.requests_saved = 0
+        # Monotonic time PV power was first seen at zero, None while producing
+        self._zero_since: float | None = None
+        self._last_energy: float | None = None
+
+    @property
+    def factor(self) -> int:
+        """Multiplier for the poll interval."""
+        return NIGHT_INTERVAL_FACTOR if self.asleep else 1
+
+    def configure(self, enabled: bool) -> bool:
+        """Turn night mode on or off; return True if that woke it."""
+        self.enabled = enabled
+        if enabled or not self.asleep:
+            return False
+        self.asleep = False
+        return True
+
+    def _sun_down(self) -> bool | None:
+        """Whether the sun has set, or None without a usable sun entity."""
+        state = self.hass.states.get(SUN_ENTITY)
+        if state is None or state.state not in (
+            STATE_ABOVE_HORIZON,
+            STATE_BELOW_HORIZON,
+        ):
+            return None
+        return state.state == STATE_BELOW_HORIZON
+
+    def observe(self, ppv: float | None, now: float) -> bool:
+        """Update from a poll's PV power; return True if asleep changed."""
+        if not self.enabled:
+            return False
+        producing = ppv is not None and ppv > 0
+        if producing:
+            self._zero_since = None
+        elif self._zero_since is None:
+            self._zero_since = now
+        sun_down = self._sun_down()
+        if producing:
+            asleep = False
+        elif sun_down is None:
+            asleep = now - self._zero_since >= NIGHT_PV_ZERO_SECONDS
+        else:
+            asleep = sun_down
+        if asleep == self.asleep:
+            return False
+        self.asleep = asleep
+        self._last_energy = None
+        return True
+
+    def sun_rose(self) -> bool:
+        """Wake at sunrise without waiting for the next stretched poll."""
+        if not self.asleep:
+            return False
+        self.asleep = False
+        return True
+
+    def energy_due(self, now: float) -> bool:
+        """Whether this poll should read the energy endpoint."""
+        if not self.asleep:
+            return True
+        if (
+            self._last_energy is None
+            or now - self._last_energy >= NIGHT_ENERGY_INTERVAL_SECONDS
+        ):
+            self._last_energy = now
+            return True
+        self.requests_saved += 1
+        return False
+
+    def note_poll(self, requests: int) -> None:
+        """Count the day polls a stretched poll of ``requests`` stood in for."""
+        if self.asleep:
+            self.requests_saved += (NIGHT_INTERVAL_FACTOR - 1) * requests
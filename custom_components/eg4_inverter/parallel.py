@@ -0,0 +1,203 @@
+"""Whole-system totals for inverters running in parallel.
+
+The portal's inverter list puts paralleled inverters in the same plant and
+``parallelGroup``. Each inverter is still its own config entry; entries in
+the same group join one EG4SystemCoordinator. The scheduler then polls the
+group as one: the first member's slot refreshes every member concurrently
+(they share the HTTP session and the fleet rate limit), and once they have
+all decoded, the totals are summed from their value stores in a single pass
+and pushed to the system sensors on a virtual "system" device.
+"""
+import asyncio
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import DOMAIN, DATA_SYSTEMS
+from .definitions import DEFINITION_LOOKUP
+from .util import read_field
+
+_LOGGER = logging.getLogger(__name__)
+
+# (group, key) summed across the members
+SYSTEM_TOTALS = (
+    ("runtime", "ppv"),
+    ("runtime", "consumptionPower"),
+    ("runtime", "pToGrid"),
+    ("runtime", "pToUser"),
+    ("runtime", "pCharge"),
+    ("runtime", "pDisCharge"),
+    ("runtime", "peps"),
+    ("energy", "todayYieldingText"),
+    ("energy", "todayUsageText"),
+    ("energy", "todayImportText"),
+    ("energy", "todayExportText"),
+    ("energy", "todayChargingText"),
+    ("energy", "todayDischargingText"),
+)
+# (group, key) averaged across the members
+SYSTEM_AVERAGES = (("runtime", "soc"),)
+MEMBERS_REPORTING = "membersReporting"
+
+
+def system_definitions():
+    """(key, definition) of every system value, from the inverter definitions."""
+    wanted = {*SYSTEM_TOTALS, *SYSTEM_AVERAGES}
+    return tuple(
+        (key, definition)
+        for group, lookup in DEFINITION_LOOKUP.items()
+        for key, _, definition in lookup
+        if (group, key) in wanted and definition.platform == "sensor"
+    )
+
+
+def parallel_group(inverters: list[Any], serial_number: str):
+    """(group id, display name) of the inverter's parallel group, or None."""
+    for inverter in inverters or ():
+        if read_field(inverter, "serialNum") != serial_number:
+            continue
+        group = read_field(inverter, "parallelGroup")
+        if not group:
+            return None
+        plant = read_field(inverter, "plantId")
+        plant_name = read_field(inverter, "plantName") or plant
+        return f"{plant}_{group}", f"{plant_name} {group}"
+    return None
+
+
+class EG4SystemCoordinator(DataUpdateCoordinator):
+    """Refreshes the members of one parallel group together and sums them."""
+
+    def __init__(self, hass: HomeAssistant, group_id: str, name: str) -> None:
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"EG4 system {name}",
+            update_interval=None,
+            always_update=False,
+        )
+        self.group_id = group_id
+        self.display_name = name
+        # entry_id -> member coordinator, in join order
+        self.members: dict[str, Any] = {}
+        # Entry whose sensor platform adds the system sensors; kept when that
+        # entry reloads, so it gets them back while others keep polling
+        self.owner: str | None = None
+        self._total_slots: list[tuple[str, list[int]]] = []
+        self._average_slots: list[tuple[str, list[int]]] = []
+
+    @property
+    def leader(self):
+        """The member whose scheduler slot polls the whole group."""
+        return next(iter(self.members.values()), None)
+
+    @callback
+    def async_add_member(self, coordinator) -> None:
+        self.members[coordinator.entry.entry_id] = coordinator
+        if self.owner is None:
+            self.owner = coordinator.entry.entry_id
+        self._plan()
+
+    @callback
+    def async_remove_member(self, coordinator) -> None:
+        self.members.pop(coordinator.entry.entry_id, None)
+        self._plan()
+
+    def _plan(self) -> None:
+        """Resolve each value's slot in every member's store, once per change."""
+        members = list(self.members.values())
+        self._total_slots = [
+            (key, [member.values.slot(group, key) for member in members])
+            for group, key in SYSTEM_TOTALS
+        ]
+        self._average_slots = [
+            (key, [member.values.slot(group, key) for member in members])
+            for group, key in SYSTEM_AVERAGES
+        ]
+
+    async def _async_update_data(self):
+        """Refresh every member concurrently, then total them."""
+        await asyncio.gather(
+            *(member.async_refresh() for member in self.members.values())
+        )
+        return self.aggregate()
+
+    def aggregate(self) -> dict[str, Any]:
+        """Sum (or average) each value over the members that have it."""
+        members = list(self.members.values())
+        stores = [member.values.values for member in members]
+        reporting = [member.last_update_success for member in members]
+        totals: dict[str, Any] = {MEMBERS_REPORTING: sum(reporting)}
+        for key, slots in self._total_slots:
+            present = [
+                values[slot]
+                for values, slot, ok in zip(stores, slots, reporting)
+                if ok and values[slot] is not None
+            ]
+            totals[key] = round(sum(present), 3) if present else None
+        for key, slots in self._average_slots:
+            present = [
+                values[slot]
+                for values, slot, ok in zip(stores, slots, reporting)
+                if ok and values[slot] is not None
+            ]
+            totals[key] = round(sum(present) / len(present), 1) if present else None
+        return totals
+
+
+@callback
+def async_join_system(hass: HomeAssistant, coordinator):
+    """Add the coordinator to its parallel group's system, creating it if new."""
+    group = parallel_group(coordinator.inverters, coordinator.serial_number)
+    if group is None:
+        return None
+    group_id, name = group
+    systems = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_SYSTEMS, {})
+    system = systems.get(group_id)
+    if system is None:
+        system = systems[group_id] = EG4SystemCoordinator(hass, group_id, name)
+    system.async_add_member(coordinator)
+    # The member has just been refreshed, so there is something to show
+    system.async_set_updated_data(system.aggregate())
+    _LOGGER.debug(
+        "EG4 %s joined parallel system %s (%d members)",
+        coordinator.serial_number,
+        name,
+        len(system.members),
+    )
+    return system
+
+
+@callback
+def async_leave_system(hass: HomeAssistant, coordinator) -> None:
+    """Remove the coordinator from its system, dropping the system if empty."""
+    system = coordinator.system
+    if system is None:
+        return
+    system.async_remove_member(coordinator)
+    coordinator.system = None
+    if not system.members:
+        hass.data[DOMAIN][DATA_SYSTEMS].pop(system.group_id, None)
+
+
+async def async_hand_over_system(hass: HomeAssistant, entry_id: str) -> None:
+    """Give the systems owned by a removed entry to their next member.
+
+    Ownership outlives a reload, so the owner gets its system sensors back;
+    once the owner is removed for good, the member that now leads the
+    system takes them over by setting its sensor platform up again.
+    """
+    for system in hass.data.get(DOMAIN, {}).get(DATA_SYSTEMS, {}).values():
+        if system.owner != entry_id or system.leader is None:
+            continue
+        entry = system.leader.entry
+        system.owner = entry.entry_id
+        _LOGGER.debug(
+            "EG4 %s took over parallel system %s",
+            system.leader.serial_number,
+            system.display_name,
+        )
+        await hass.config_entries.async_unload_platforms(entry, ["sensor"])
+        await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
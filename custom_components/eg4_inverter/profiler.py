@@ -0,0 +1,161 @@
+"""Profile the next few coordinator polls of a running instance.
+
+Started from the ``profile`` service, so a misbehaving production install
+can be looked at without restarting Home Assistant. cProfile is enabled
+for the duration of each poll, which includes the fetches, the decode and
+the push to the child coordinators, and so every entity state write the
+poll fans out to. Whatever else the event loop runs while a poll awaits is
+profiled too; it shows up under its own functions.
+
+With ``memory`` on, tracemalloc traces allocations from the first profiled
+poll to the last, and the difference is reported by line.
+"""
+import contextlib
+import cProfile
+import io
+import logging
+import pstats
+import tracemalloc
+
+from homeassistant.components import persistent_notification
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, PROFILE_TOP_ENTRIES, PROFILE_TRACEMALLOC_FRAMES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _collect(profile, stats_path, baseline, snapshot_path, stop_tracing):
+    """Write the results and format the hotspots (blocking, in the executor)."""
+    profile.dump_stats(stats_path)
+    out = io.StringIO()
+    stats = pstats.Stats(profile, stream=out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_TOP_ENTRIES)
+    allocations = None
+    if baseline is not None:
+        try:
+            snapshot = tracemalloc.take_snapshot()
+        finally:
+            if stop_tracing:
+                tracemalloc.stop()
+        snapshot.dump(snapshot_path)
+        diffs = snapshot.compare_to(baseline, "lineno")
+        allocations = [str(diff) for diff in diffs[:PROFILE_TOP_ENTRIES]]
+    return _trim_stats(out.getvalue()), allocations
+
+
+class ProfileSession:
+    """Profiles ``cycles`` polls, then writes and reports the results.
+
+    One session may cover several entries; their polls share the profiler,
+    which is only enabled while at least one of them is running. They also
+    share ``remaining``: the session ends after ``cycles`` polls in total,
+    whichever entries ran them, as the service describes.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, cycles: int, memory: bool, members: int = 1
+    ) -> None:
+        self.hass = hass
+        self.remaining = cycles
+        self._cycles = cycles
+        self._memory = memory
+        self._members = members
+        self._profile = cProfile.Profile()
+        self._active = 0
+        self._started_tracemalloc = False
+        self._baseline = None
+
+    @contextlib.asynccontextmanager
+    async def cycle(self):
+        """Profile one poll (if the session still wants more)."""
+        if self.remaining <= 0:
+            yield
+            return
+        if self._active == 0:
+            try:
+                self._profile.enable()
+            except ValueError as err:
+                # Another profiler (e.g. the profiler integration) is running
+                _LOGGER.error("Cannot profile EG4 polls: %s", err)
+                self.remaining = 0
+                self._stop_tracing()
+                yield
+                return
+        # Only once the profiler is on, so a refused session traces nothing
+        if self._memory and self._baseline is None:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+                self._started_tracemalloc = True
+            self._baseline = tracemalloc.take_snapshot()
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            if self._active == 0:
+                self._profile.disable()
+            self.remaining -= 1
+            if self.remaining == 0:
+                # Written after the poll returns, so it is not held up
+                self.hass.async_create_task(self._async_finish())
+
+    @callback
+    def async_release(self) -> None:
+        """Drop an entry that unloads before the session has finished.
+
+        Once no entry is left to run the remaining polls, the session is
+        abandoned and stops the tracing it started.
+        """
+        self._members -= 1
+        if self._members <= 0 and self.remaining > 0:
+            self.remaining = 0
+            self._stop_tracing()
+
+    def _stop_tracing(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self._baseline = None
+
+    async def _async_finish(self) -> None:
+        stamp = dt_util.now().strftime("%Y%m%d-%H%M%S")
+        stats_path = self.hass.config.path(f"{DOMAIN}_profile_{stamp}.pstats")
+        snapshot_path = self.hass.config.path(
+            f"{DOMAIN}_profile_{stamp}.tracemalloc"
+        )
+        hotspots, allocations = await self.hass.async_add_executor_job(
+            _collect,
+            self._profile,
+            stats_path,
+            self._baseline,
+            snapshot_path,
+            self._started_tracemalloc,
+        )
+        lines = [
+            f"Profiled {self._cycles} EG4 poll(s).",
+            f"Stats: `{stats_path}`",
+            "",
+            "```",
+            hotspots,
+            "```",
+        ]
+        if allocations is not None:
+            lines += [f"Allocations: `{snapshot_path}`", "", "```", *allocations, "```"]
+        persistent_notification.async_create(
+            self.hass,
+            "\n".join(lines),
+            title="EG4 profile",
+            notification_id=f"{DOMAIN}_profile",
+        )
+        _LOGGER.info("EG4 profile written to %s", stats_path)
+
+
+def _trim_stats(text: str) -> str:
+    """Drop pstats' preamble, keeping the totals line and the table."""
+    lines = [line for line in text.splitlines() if line.strip()]
+    for index, line in enumerate(lines):
+        if "function calls" in line:
+            return "\n".join(lines[index:])
+    return "\n".join(lines)
@@ -0,0 +1,191 @@
+"""Fan decoded snapshots out to the local MQTT broker.
+
+One poll of the cloud then serves every other consumer on the network
+(Node-RED, a metrics agent, another Home Assistant), which subscribe to the
+broker instead of polling the portal themselves. Messages go through Home
+Assistant's own MQTT integration, so the broker is whichever one it is
+connected to.
+
+Every value is a retained message on ``<prefix>/<serial>/<group>/<key>``
+(per-battery values on ``<prefix>/<serial>/battery_units/<index>/<key>``),
+and ``<prefix>/<serial>/availability`` says whether the inverter data is
+current. An unknown value is published as ``None``, which MQTT sensors
+read as unknown. Optionally, MQTT discovery configs are published too, so another
+Home Assistant picks the values up as sensors with units and classes.
+"""
+import asyncio
+import json
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN, MQTT_MODE_CHANGES, MQTT_DISCOVERY_PREFIX
+from .decoder import PER_BATTERY_GROUP, ValueStore
+from .definitions import DEFINITION_LOOKUP
+
+_LOGGER = logging.getLogger(__name__)
+
+PUBLISH_GROUPS = ("runtime", "energy", "battery", "analytics", "settings")
+AVAILABILITY = "availability"
+# What MQTT sensors read as an unknown state
+PAYLOAD_NONE = "None"
+
+
+def _payload(value: Any) -> str:
+    if value is None:
+        return PAYLOAD_NONE
+    if isinstance(value, bool):
+        return "ON" if value else "OFF"
+    return str(value)
+
+
+def discovery_config(
+    state_topic: str,
+    availability_topic: str,
+    serial_number: str,
+    object_id: str,
+    definition,
+) -> dict[str, Any]:
+    """MQTT discovery payload for one value."""
+    config = {
+        "name": definition.name,
+        "unique_id": f"{DOMAIN}_{serial_number}_{object_id}",
+        "state_topic": state_topic,
+        "availability_topic": availability_topic,
+        "device": {
+            "identifiers": [f"{DOMAIN}_{serial_number}"],
+            "name": f"EG4 Inverter {serial_number}",
+            "manufacturer": "EG4",
+        },
+    }
+    if definition.platform == "sensor":
+        config["unit_of_measurement"] = definition.unit
+        config["state_class"] = definition.state_class
+    config["device_class"] = definition.device_class
+    config["icon"] = definition.icon
+    return {key: value for key, value in config.items() if value is not None}
+
+
+class EG4MqttPublisher:
+    """Publishes the values decoded into the store, from a background task.
+
+    ``async_enqueue`` only records which values are due; the publishing
+    task sends them when the broker keeps up, so a slow broker never holds
+    up the poll. Snapshots that arrive while a batch is still going out are
+    merged into the next one rather than queued.
+    """
+
+    def __init__(self, hass: HomeAssistant, serial_number: str, store: ValueStore) -> None:
+        self.hass = hass
+        self._serial = str(serial_number)
+        self._store = store
+        self._prefix: str | None = None
+        self._mode: str | None = None
+        self._discovery = False
+        # topic -> payload last published, for changed-only mode
+        self._published: dict[str, str] = {}
+        self._pending: dict[str, str] = {}
+        self._configs: dict[str, str] = {}
+        self._wakeup = asyncio.Event()
+        self.messages = 0
+
+    def configure(self, prefix: str | None, mode: str, discovery: bool) -> None:
+        """Apply the options; an empty prefix turns publishing off."""
+        prefix = (prefix or "").strip("/") or None
+        if prefix != self._prefix or discovery != self._discovery:
+            # Topics moved, so republish everything (and the configs)
+            self._published.clear()
+            if not (prefix and discovery) and self._configs:
+                # Discovery stops: an empty retained config removes each
+                # sensor. Otherwise the configs, whose topics do not depend
+                # on the prefix, are overwritten with the new state topics.
+                for config_topic in self._configs.values():
+                    self._pending[config_topic] = ""
+                self._wakeup.set()
+            self._configs.clear()
+        self._prefix = prefix
+        self._mode = mode
+        self._discovery = discovery
+
+    @property
+    def _base(self) -> str:
+        return f"{self._prefix}/{self._serial}"
+
+    def _topics(self, data: dict[str, Any]):
+        """(topic, object id, slot, definition) of every published value."""
+        for group in PUBLISH_GROUPS:
+            if data.get(group) is None:
+                continue
+            for key, _, definition in DEFINITION_LOOKUP[group]:
+                slot = self._store.slot(group, key)
+                yield f"{self._base}/{group}/{key}", f"{group}_{key}", slot, definition
+        units = getattr(data.get("battery"), "battery_units", None) or []
+        for unit in units:
+            bat_index = getattr(unit, "batIndex", None)
+            for key, _, definition in DEFINITION_LOOKUP[PER_BATTERY_GROUP]:
+                slot = self._store.slot(PER_BATTERY_GROUP, key, bat_index)
+                topic = f"{self._base}/{PER_BATTERY_GROUP}/{bat_index}/{key}"
+                yield topic, f"battery_{bat_index}_{key}", slot, definition
+
+    def async_enqueue(self, data: dict[str, Any]) -> None:
+        """Mark the snapshot just decoded into the store for publishing."""
+        if self._prefix is None:
+            return
+        changes_only = self._mode == MQTT_MODE_CHANGES
+        values = self._store.values
+        availability = f"{self._base}/{AVAILABILITY}"
+        for topic, object_id, slot, definition in self._topics(data):
+            payload = _payload(values[slot])
+            if changes_only and self._published.get(topic) == payload:
+                continue
+            self._pending[topic] = payload
+            if self._discovery and topic not in self._configs:
+                config_topic = (
+                    f"{MQTT_DISCOVERY_PREFIX}/{definition.platform}/"
+                    f"{DOMAIN}_{self._serial}/{object_id}/config"
+                )
+                self._configs[topic] = config_topic
+                self._pending[config_topic] = json.dumps(
+                    discovery_config(
+                        topic, availability, self._serial, object_id, definition
+                    )
+                )
+        if not changes_only or self._published.get(availability) != "online":
+            self._pending[availability] = "online"
+        if self._pending:
+            self._wakeup.set()
+
+    def async_set_unavailable(self) -> None:
+        if self._prefix is not None:
+            self._pending[f"{self._base}/{AVAILABILITY}"] = "offline"
+            self._wakeup.set()
+
+    async def async_run(self) -> None:
+        """Publish whatever is pending, forever; run as an entry background task."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Imported on first use, so installs that do not publish never
+            # load the MQTT integration
+            from homeassistant.components import mqtt
+
+            if not await mqtt.async_wait_for_mqtt_client(self.hass):
+                _LOGGER.warning("MQTT is not available, dropping EG4 publish")
+                self._pending.clear()
+                continue
+            pending = list(self._pending.items())
+            self._pending = {}
+            for index, (topic, payload) in enumerate(pending):
+                try:
+                    await mqtt.async_publish(self.hass, topic, payload, 0, True)
+                except HomeAssistantError as err:
+                    _LOGGER.warning("EG4 MQTT publish to %s failed: %s", topic, err)
+                    # Retry the rest with the next snapshot, unless that
+                    # brought newer values for them
+                    for topic, payload in pending[index:]:
+                        self._pending.setdefault(topic, payload)
+                    break
+                self._published[topic] = payload
+                self.messages += 1
@@ -0,0 +1,190 @@
+"""Record raw portal responses, and replay them in place of the portal.
+
+Both work at the HTTP session level: ``EG4InverterAPI`` takes a ``session``
+argument, so a capturing session records every JSON body the client
+receives, and a replaying session hands those bodies back to a real client.
+The client only keeps a provided session when it logs in with
+``ignore_ssl=False``, which is why the coordinator always does and leaves
+skipping verification to the session itself. The client's own parsing, the
+coordinator's decode and every entity then run exactly as they would
+against the cloud.
+
+Captures are gzip'd JSON lines, one record per response:
+``{"t": <epoch>, "method", "path", "data", "status", "body"}``. Login
+request bodies hold the password and are never written.
+"""
+import bisect
+import gzip
+import json
+import logging
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from homeassistant.core import HomeAssistant
+
+from .const import CAPTURE_FLUSH_RECORDS
+
+_LOGGER = logging.getLogger(__name__)
+
+LOGIN_PATH = "/WManage/api/login"
+
+
+def _key(method: str, url: str, data: Any) -> tuple[str, str, str | None]:
+    path = urlsplit(url).path
+    return method.upper(), path, None if path == LOGIN_PATH else data
+
+
+def _append_lines(path: Path, lines: list[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "at", encoding="utf-8") as out:
+        out.writelines(lines)
+
+
+def load_capture(path: str | Path) -> list[dict[str, Any]]:
+    """Read every record of a capture file (blocking)."""
+    with gzip.open(path, "rt", encoding="utf-8") as capture:
+        return [json.loads(line) for line in capture if line.strip()]
+
+
+class CaptureWriter:
+    """Buffers records and appends them to the capture file in the executor."""
+
+    def __init__(self, hass: HomeAssistant, path: Path) -> None:
+        self.hass = hass
+        self.path = path
+        self._buffer: list[str] = []
+        self.records = 0
+
+    def record(self, method: str, url: str, data: Any, status: int, body: Any) -> None:
+        _, path, data = _key(method, url, data)
+        line = {"t": time.time(), "method": method, "path": path, "data": data}
+        line.update(status=status, body=body)
+        self._buffer.append(json.dumps(line, separators=(",", ":")) + "\n")
+        self.records += 1
+        if len(self._buffer) >= CAPTURE_FLUSH_RECORDS:
+            self.hass.async_create_task(self.async_flush())
+
+    async def async_flush(self) -> None:
+        lines, self._buffer = self._buffer, []
+        if lines:
+            await self.hass.async_add_executor_job(_append_lines, self.path, lines)
+
+
+class _CapturedResponse:
+    def __init__(self, response, writer: CaptureWriter, method, url, data) -> None:
+        self._response = response
+        self._writer = writer
+        self._request = (method, url, data)
+        self.status = response.status
+
+    async def json(self, *args, **kwargs):
+        body = await self._response.json(*args, **kwargs)
+        self._writer.record(*self._request, self.status, body)
+        return body
+
+    async def text(self, *args, **kwargs):
+        body = await self._response.text(*args, **kwargs)
+        self._writer.record(*self._request, self.status, body)
+        return body
+
+
+class _CapturedRequest:
+    def __init__(self, context, writer, method, url, data) -> None:
+        self._context = context
+        self._args = (writer, method, url, data)
+
+    async def __aenter__(self):
+        return _CapturedResponse(await self._context.__aenter__(), *self._args)
+
+    async def __aexit__(self, *exc_info):
+        return await self._context.__aexit__(*exc_info)
+
+
+class CaptureSession:
+    """Wraps the entry's aiohttp session and records every response body."""
+
+    def __init__(self, session, writer: CaptureWriter) -> None:
+        self._session = session
+        self._writer = writer
+
+    @property
+    def closed(self) -> bool:
+        return self._session.closed
+
+    def request(self, method, url, **kwargs):
+        context = self._session.request(method, url, **kwargs)
+        return _CapturedRequest(context, self._writer, method, url, kwargs.get("data"))
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+class _ReplayResponse:
+    def __init__(self, record: dict[str, Any]) -> None:
+        self.status = record["status"]
+        self._body = record["body"]
+
+    async def json(self, *args, **kwargs):
+        return self._body
+
+    async def text(self, *args, **kwargs):
+        return self._body if isinstance(self._body, str) else json.dumps(self._body)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+
+class ReplaySession:
+    """Stands in for the aiohttp session, answering from a capture.
+
+    With a ``speed`` the capture's clock runs that many times faster than
+    ours from the first request, and each request gets the newest recorded
+    response for the same call at that point, so polls see the data as it
+    was then. A speed of 0 instead hands out the next recorded response on
+    every call, as fast as the caller asks; both wrap around at the end.
+    """
+
+    closed = False
+
+    def __init__(self, records: list[dict[str, Any]], speed: float = 1.0) -> None:
+        self._speed = speed
+        self._responses: dict[tuple, list[dict]] = defaultdict(list)
+        for record in sorted(records, key=lambda record: record["t"]):
+            key = _key(record["method"], record["path"], record["data"])
+            self._responses[key].append(record)
+        self._times = {
+            key: [record["t"] for record in responses]
+            for key, responses in self._responses.items()
+        }
+        self._first = min((record["t"] for record in records), default=0.0)
+        self._span = max((record["t"] for record in records), default=0.0) - self._first
+        self._started: float | None = None
+        self._cursor: dict[tuple, int] = defaultdict(int)
+
+    def _pick(self, key: tuple) -> dict[str, Any]:
+        responses = self._responses.get(key)
+        if not responses:
+            return {"status": 404, "body": {"success": False, "error": "not captured"}}
+        if not self._speed:
+            index = self._cursor[key] % len(responses)
+            self._cursor[key] += 1
+            return responses[index]
+        if self._started is None:
+            self._started = time.monotonic()
+        elapsed = (time.monotonic() - self._started) * self._speed
+        if self._span:
+            elapsed %= self._span
+        index = bisect.bisect_right(self._times[key], self._first + elapsed) - 1
+        return responses[max(index, 0)]
+
+    def request(self, method, url, **kwargs):
+        return _ReplayResponse(self._pick(_key(method, url, kwargs.get("data"))))
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
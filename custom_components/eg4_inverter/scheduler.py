@@ -0,0 +1,209 @@
+"""Domain-wide poll scheduler shared by every EG4 config entry.
+
+Each coordinator registers here instead of running its own timer. Polls are
+timed just after the entry's next expected dongle upload once its cadence
+has been learned; until then they are spread across the interval with a
+per-entry phase offset. A little jitter is added either way, and every
+cloud request draws from one token bucket so a fleet of sites never bursts
+the EG4 portal all at once.
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DOMAIN,
+    DATA_SCHEDULER,
+    FLEET_JITTER_SECONDS,
+    FLEET_RATE_LIMIT_BURST,
+    FLEET_RATE_LIMIT_PER_SECOND,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in FIFO order."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        refill = (now - self._updated) * self._rate
+        self._tokens = min(self._burst, self._tokens + refill)
+        self._updated = now
+
+    async def async_acquire(self) -> float:
+        """Take one token, returning how long we had to wait for it."""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                self._refill()
+                while self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self._rate)
+                    self._refill()
+                self._tokens -= 1
+        finally:
+            self.waiting -= 1
+        return time.monotonic() - started
+
+
+@dataclass(eq=False)
+class _Slot:
+    """Scheduling state for one registered coordinator."""
+
+    entry_id: str
+    coordinator: object
+    offset: float = 0.0
+    planned: float | None = None
+    started: float | None = None
+    waited: float = 0.0
+    lag: float = 0.0
+    handle: asyncio.TimerHandle | None = None
+    task: asyncio.Task | None = field(default=None, repr=False)
+
+
+class EG4FleetScheduler:
+    """Spreads coordinator refreshes over time and rate limits cloud calls."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.bucket = TokenBucket(FLEET_RATE_LIMIT_PER_SECOND, FLEET_RATE_LIMIT_BURST)
+        self._slots: dict[str, _Slot] = {}
+        self._anchor = time.monotonic()
+
+    @callback
+    def async_register(self, entry_id: str, coordinator) -> None:
+        """Start scheduling polls for a coordinator."""
+        self._slots[entry_id] = _Slot(entry_id, coordinator)
+        self._rebalance()
+
+    @callback
+    def async_unregister(self, entry_id: str) -> None:
+        """Stop scheduling polls for a coordinator."""
+        slot = self._slots.pop(entry_id, None)
+        if slot is None:
+            return
+        if slot.handle:
+            slot.handle.cancel()
+        if slot.task:
+            slot.task.cancel()
+        self._rebalance()
+
+    @callback
+    def async_reschedule(self, entry_id: str) -> None:
+        """Re-plan polls after an entry's poll interval changed."""
+        if entry_id in self._slots:
+            self._rebalance()
+
+    async def async_acquire(self, entry_id: str | None = None) -> None:
+        """Wait for a rate-limit token before making a cloud request."""
+        waited = await self.bucket.async_acquire()
+        slot = self._slots.get(entry_id)
+        if slot is not None:
+            slot.waited += waited
+
+    def stats(self, entry_id: str) -> dict:
+        """Queue depth and lag figures for one entry."""
+        slot = self._slots.get(entry_id)
+        lag = 0.0
+        if slot is not None:
+            lag = slot.lag
+            if slot.started is not None and slot.planned is not None:
+                lag = (slot.started - slot.planned) + slot.waited
+        return {
+            "queueDepth": self.bucket.waiting,
+            "pollLag": round(lag, 3),
+            "fleetSize": len(self._slots),
+        }
+
+    @staticmethod
+    def _polls(slot: _Slot) -> bool:
+        """False for parallel-group members polled by their group's leader."""
+        system = slot.coordinator.system
+        return system is None or system.leader is slot.coordinator
+
+    def _rebalance(self) -> None:
+        """Give every polling entry an evenly spaced phase offset."""
+        polling = [slot for slot in self._slots.values() if self._polls(slot)]
+        for index, slot in enumerate(polling):
+            interval = slot.coordinator.poll_interval.total_seconds()
+            slot.offset = interval * index / len(polling)
+        for slot in self._slots.values():
+            self._schedule(slot)
+
+    def _schedule(self, slot: _Slot) -> None:
+        if slot.handle:
+            slot.handle.cancel()
+            slot.handle = None
+        if slot.task is not None and not slot.task.done():
+            # A poll is running; it re-arms the slot when it finishes, so a
+            # second refresh never overlaps it
+            return
+        if not self._polls(slot):
+            slot.planned = None
+            return
+        now = time.monotonic()
+        interval = slot.coordinator.poll_interval.total_seconds()
+        delay = slot.coordinator.cadence.next_delay(now, interval)
+        if delay is not None:
+            planned = now + delay
+        else:
+            periods = int((now - self._anchor - slot.offset) // interval) + 1
+            planned = self._anchor + slot.offset + periods * interval
+        slot.planned = planned + random.uniform(0, FLEET_JITTER_SECONDS)
+        slot.handle = self.hass.loop.call_at(
+            self.hass.loop.time() + (slot.planned - now), self._fire, slot
+        )
+
+    @callback
+    def _fire(self, slot: _Slot) -> None:
+        slot.handle = None
+        slot.task = self.hass.async_create_background_task(
+            self._async_run(slot), f"{DOMAIN} scheduled poll"
+        )
+
+    async def _async_run(self, slot: _Slot) -> None:
+        slot.started = time.monotonic()
+        slot.waited = 0.0
+        # Kept, as a rebalance during the poll may reschedule the slot
+        planned = slot.planned
+        system = slot.coordinator.system
+        try:
+            if system is not None:
+                # Every member at once, then the system totals
+                await system.async_refresh()
+            else:
+                await slot.coordinator.async_refresh()
+        finally:
+            slot.lag = (slot.started - planned) + slot.waited
+            slot.started = None
+            slot.task = None
+            if self._slots.get(slot.entry_id) is slot:
+                self._schedule(slot)
+            if slot.lag > slot.coordinator.poll_interval.total_seconds():
+                _LOGGER.warning(
+                    "EG4 poll lagging %.1fs behind schedule (%d requests queued)",
+                    slot.lag,
+                    self.bucket.waiting,
+                )
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> EG4FleetScheduler:
+    """Return the shared scheduler, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_SCHEDULER not in domain_data:
+        domain_data[DATA_SCHEDULER] = EG4FleetScheduler(hass)
+    return domain_data[DATA_SCHEDULER]
@@ -1,48 +1,32 @@
 import logging
-from typing import Any, Dict
-from homeassistant.components.sensor import (
-    SensorDeviceClass,
-    SensorEntity,
-    SensorStateClass,
-)
+from dataclasses import replace
+from typing import TYPE_CHECKING, Any
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.typing import DiscoveryInfoType
-
-from homeassistant.const import (
-    PERCENTAGE,
-    UnitOfPower,
-    UnitOfElectricPotential,
-    UnitOfTemperature,
-    UnitOfEnergy,
-    UnitOfFrequency,
-    UnitOfTime,
-    UnitOfMass,
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import DOMAIN, DERIVED_GROUP
+from .deadband import DeadbandFilter
+from .parallel import (
+    MEMBERS_REPORTING,
+    EG4SystemCoordinator,
+    system_definitions,
 )
-from .coordinator import EG4DataCoordinator
-from .const import DOMAIN
 from .definitions import (
-    PER_BATTERY_DEFS,
-    BATTERY_SUMMARY_SENSORS,
-    ENERGY_SENSORS,
-    RUNTIME_SENSORS,
-    SETTING_SENSORS,
+    EG4Definition,
+    platform_definitions,
+    per_battery_definitions,
 )
+from .subset import preset_groups
 
-_LOGGER = logging.getLogger(__name__)
-
+if TYPE_CHECKING:
+    # The coordinator is already loaded by the time platforms set up
+    from .coordinator import EG4DataCoordinator, EG4EndpointCoordinator
+    from .derived import DerivedSpec
 
-def parse_float(value: Any, scale: float = 1.0) -> float | None:
-    """Helper to convert strings/numbers to float, applying a scale if needed."""
-    try:
-        if isinstance(value, str):
-            value = value.strip()
-            if not value or value == "--":
-                return None
-        return float(value) * scale
-    except (ValueError, TypeError):
-        return None
+_LOGGER = logging.getLogger(__name__)
 
 
 # -------------------------------------------------------------------------
@@ -55,82 +39,68 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up EG4 inverter sensors from a config entry."""
-    coordinator: EG4DataCoordinator = hass.data[DOMAIN][entry.entry_id]
+    coordinator: "EG4DataCoordinator" = hass.data[DOMAIN][entry.entry_id]
 
     entities = []
+    groups = preset_groups(entry)
+
+    # 4.1) ENERGY, RUNTIME, SETTINGS, BATTERY SUMMARY AND METRIC SENSORS
+    for parent_key, sensor_def in platform_definitions("sensor"):
+        if parent_key not in groups:
+            continue
+        sensor_cls = EG4SettingSensor if parent_key == "settings" else EG4InverterSensor
+        entities.append(
+            sensor_cls(coordinator, entry, sensor_def, parent_key=parent_key)
+        )
 
-    # 4.1) ENERGY SENSORS
-    for sensor_def in ENERGY_SENSORS:
-        if sensor_def.get("type", "") == "sensor":
-            entities.append(
-                EG4InverterSensor(coordinator, entry, sensor_def, parent_key="energy")
-            )
-
-    # 4.2) RUNTIME SENSORS
-    for sensor_def in RUNTIME_SENSORS:
-        if sensor_def.get("type", "") == "sensor":
-            entities.append(
-                EG4InverterSensor(coordinator, entry, sensor_def, parent_key="runtime")
-            )
-
-    # 4.3) SETTINGS SENSORS
-    for sensor_def in SETTING_SENSORS:
-        if sensor_def.get("type", "") == "sensor":
-            entities.append(
-                EG4InverterSensor(coordinator, entry, sensor_def, parent_key="settings")
-            )
-
-    # 4.4) BATTERY SUMMARY SENSORS
-    for sensor_def in BATTERY_SUMMARY_SENSORS:
-        if sensor_def.get("type", "") == "sensor":
-            entities.append(
-                EG4InverterSensor(coordinator, entry, sensor_def, parent_key="battery")
-            )
-
-    # 4.5) PER-BATTERY UNITS
+    # 4.2) PER-BATTERY UNITS
     #     If you want a sensor for each battery in battery_units, create them here:
-    battery_data = coordinator.data.get("battery", {})
-    battery_units = battery_data.battery_units or []
+    battery_units = []
+    if "battery_units" in groups and coordinator.data.get("battery") is not None:
+        battery_units = coordinator.data["battery"].battery_units or []
     for binfo in battery_units:
-        for subdef in PER_BATTERY_DEFS:
-            subdef = subdef.copy()
-            if subdef["type"] != "sensor":
-                continue
-            name_template = subdef.get("name", "")
-            dynamic_name = name_template.format(binfo=binfo)
-            if name_template != dynamic_name:
-                subdef["name"] = dynamic_name
+        for subdef in per_battery_definitions("sensor"):
+            subdef = replace(subdef, name=subdef.name.format(binfo=binfo))
             entities.append(EG4PerBatterySensor(coordinator, entry, binfo, subdef))
 
+    # 4.3) USER-DEFINED DERIVED SENSORS
+    if coordinator.derived is not None:
+        for spec in coordinator.derived.specs:
+            entities.append(EG4DerivedSensor(coordinator, entry, spec))
+
+    # 4.4) PARALLEL SYSTEM TOTALS, added by the entry that created the system
+    system = coordinator.system
+    if system is not None and system.owner == entry.entry_id:
+        for key, sensor_def in system_definitions():
+            entities.append(EG4SystemSensor(system, key, sensor_def))
+
     async_add_entities(entities)
 
 
 # -------------------------------------------------------------------------
 # 5) BASE SENSOR CLASSES
 # -------------------------------------------------------------------------
-class EG4BaseSensor(SensorEntity):
-    """Common base for EG4 sensors that integrates with the coordinator."""
+class EG4BaseSensor(CoordinatorEntity["EG4EndpointCoordinator"], SensorEntity):
+    """Common base for EG4 sensors, subscribed to their endpoint's coordinator."""
 
-    def __init__(self, coordinator, entry):
+    def __init__(self, coordinator: "EG4DataCoordinator", entry, group: str):
         """Initialize the base sensor."""
-        self._coordinator = coordinator
+        super().__init__(coordinator.child_for(group))
+        # The parent holds the decoded values and the shared counters
+        self._parent = coordinator
         self._entry = entry
-
-    @property
-    def should_poll(self) -> bool:
-        """No polling, coordinator notifies us."""
-        return False
-
-    async def async_added_to_hass(self):
-        """When entity is added to HA, subscribe to coordinator updates."""
-        self.async_on_remove(
-            self._coordinator.async_add_listener(self.async_write_ha_state)
-        )
-
-    @property
-    def available(self) -> bool:
-        """Return true if coordinator was able to update successfully."""
-        return self._coordinator.last_update_success
+        # Set by subclasses whose definition has a deadband
+        self._filter = None
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Write our state, unless the deadband says the change is noise."""
+        if self._filter is None or self._filter.should_write(
+            self.native_value, self.available
+        ):
+            self.async_write_ha_state()
+        else:
+            self._parent.suppressed_writes += 1
 
     @property
     def device_info(self):
@@ -145,58 +115,51 @@ class EG4BaseSensor(SensorEntity):
 class EG4InverterSensor(EG4BaseSensor):
     """A sensor for a single data point in either energy, runtime, or battery summary."""
 
-    def __init__(self, coordinator, entry, sensor_def: Dict[str, Any], parent_key: str):
-        super().__init__(coordinator, entry)
+    def __init__(self, coordinator, entry, sensor_def: EG4Definition, parent_key: str):
+        super().__init__(coordinator, entry, parent_key)
         self._sensor_def = sensor_def
         self._parent_key = parent_key
+        # Decoded by the coordinator once per poll; we just read our slot
+        self._slot = coordinator.values.slot(parent_key, sensor_def.key)
+        self._filter = DeadbandFilter.for_definition(sensor_def)
 
         # Build a unique_id from the config entry + sensor key
-        self._attr_unique_id = f"{entry.entry_id}_{parent_key}_{sensor_def['key']}"
-        self._attr_name = sensor_def.get("name", sensor_def["key"])
+        self._attr_unique_id = f"{entry.entry_id}_{parent_key}_{sensor_def.key}"
+        self._attr_name = sensor_def.name
 
         # Optional icon or device_class
-        icon = sensor_def.get("icon")
-        if icon:
-            self._attr_icon = icon
+        if sensor_def.icon:
+            self._attr_icon = sensor_def.icon
 
-        self._attr_device_class = sensor_def.get("device_class")
-        self._attr_state_class = sensor_def.get("state_class")
-
-        # Unit of measurement
-        self._unit = sensor_def.get("unit")
-        self._scale = sensor_def.get("scale", 1.0)
-        calc = sensor_def.get("calc")
-        if calc:
-            self._calc = calc
-
-    @property
-    def native_unit_of_measurement(self):
-        return self._unit
+        self._attr_device_class = sensor_def.device_class
+        self._attr_state_class = sensor_def.state_class
+        self._attr_entity_category = sensor_def.entity_category
+        self._attr_native_unit_of_measurement = sensor_def.unit
 
     @property
     def native_value(self):
-        data = self._coordinator.data.get(self._parent_key, {})
-        try:
-            raw_value = getattr(data, self._sensor_def["key"])
-        except Exception as e:
-            try:
-                raw_value = data.get(self._sensor_def["key"])
-            except Exception as e2:
-                _LOGGER.error(f"{self._sensor_def} with error {e2}")
-                _LOGGER.error(f"Data {vars(data)}")
-                return None
-
-        # Special case: parse CO2/Coal text like "367.69 kG"
-        if self._sensor_def.get("co2_parse"):
-            # Extract float portion
-            return parse_float(str(raw_value).split(" ")[0], 1.0)
-
-        # Otherwise, try to parse as float if the sensor is numeric
-        if self._unit or self._scale != 1.0:
-            return parse_float(raw_value, self._scale)
-
-        # If it's truly a string (like "statusText"), just return it
-        return raw_value
+        return self._parent.values[self._slot]
+
+
+class EG4SettingSensor(EG4InverterSensor):
+    """A holding parameter; only written when the settings journal says it changed."""
+
+    async def async_added_to_hass(self):
+        """Subscribe to our parameter's changes, as well as the settings child."""
+        await super().async_added_to_hass()
+        self._was_available = self.available
+        self.async_on_remove(
+            self._parent.settings.async_add_listener(
+                self._sensor_def.key, self.async_write_ha_state
+            )
+        )
+
+    @callback
+    def _handle_coordinator_update(self):
+        """A settings read only matters to us here if availability flipped."""
+        if self.available != self._was_available:
+            self._was_available = self.available
+            self.async_write_ha_state()
 
 
 class EG4PerBatterySensor(EG4BaseSensor):
@@ -206,46 +169,81 @@ class EG4PerBatterySensor(EG4BaseSensor):
         self,
         coordinator,
         entry,
-        battery_info: Dict[str, Any],
-        sensor_def: Dict[str, Any],
+        battery_info: Any,
+        sensor_def: EG4Definition,
     ):
-        super().__init__(coordinator, entry)
-        self._sensor_def = sensor_def.copy()
+        super().__init__(coordinator, entry, "battery_units")
+        self._sensor_def = sensor_def
         self._bat_index = battery_info.batIndex
+        self._slot = coordinator.values.slot(
+            "battery_units", sensor_def.key, self._bat_index
+        )
+        self._filter = DeadbandFilter.for_definition(sensor_def)
 
-        key = sensor_def["key"]
+        key = sensor_def.key
         self._attr_unique_id = f"{entry.entry_id}_battery_{self._bat_index}_{key}"
-        self._attr_name = sensor_def.get("name", f"{self._bat_index} {key}")
-        self._unit = sensor_def.get("unit")
-        self._scale = sensor_def.get("scale", 1.0)
-        self._attr_device_class = sensor_def.get("device_class")
-        self._attr_state_class = sensor_def.get("state_class")
-        icon = sensor_def.get("icon")
-        if icon:
-            self._attr_icon = icon
-        calc = sensor_def.get("calc")
-        if calc:
-            self._calc = calc
+        self._attr_name = sensor_def.name
+        self._attr_native_unit_of_measurement = sensor_def.unit
+        self._attr_device_class = sensor_def.device_class
+        self._attr_state_class = sensor_def.state_class
+        if sensor_def.icon:
+            self._attr_icon = sensor_def.icon
 
     @property
-    def native_unit_of_measurement(self):
-        return self._unit
+    def native_value(self):
+        return self._parent.values[self._slot]
+
+
+class EG4DerivedSensor(EG4BaseSensor):
+    """A user-defined sensor, evaluated by the coordinator after each decode."""
+
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, coordinator, entry, spec: "DerivedSpec"):
+        super().__init__(coordinator, entry, DERIVED_GROUP)
+        self._slot = coordinator.values.slot(DERIVED_GROUP, spec.key)
+        self._attr_unique_id = f"{entry.entry_id}_{DERIVED_GROUP}_{spec.key}"
+        self._attr_name = spec.name
+        self._attr_native_unit_of_measurement = spec.unit
+        self._attr_extra_state_attributes = {"expression": spec.expression}
 
     @property
     def native_value(self):
-        battery_data = self._coordinator.data.get("battery", {})
-        battery_units = getattr(battery_data, "battery_units", [])
-
-        # Lookup battery by index
-        target = next((b for b in battery_units if getattr(b, "batIndex", None) == self._bat_index), None)
-        if target is None:
-            return None
-
-        try:
-            raw_value = getattr(target, self._sensor_def["key"])
-        except Exception:
-            raw_value = target.get(self._sensor_def["key"])
-
-        if self._unit or self._scale != 1.0:
-            return parse_float(raw_value, self._scale)
-        return raw_value
+        return self._parent.values[self._slot]
+
+
+class EG4SystemSensor(CoordinatorEntity[EG4SystemCoordinator], SensorEntity):
+    """A whole-system total over the inverters of one parallel group."""
+
+    def __init__(
+        self, system: EG4SystemCoordinator, key: str, sensor_def: EG4Definition
+    ):
+        super().__init__(system)
+        self._key = key
+        self._attr_unique_id = f"system_{system.group_id}_{key}"
+        self._attr_name = f"System {sensor_def.name}"
+        self._attr_icon = sensor_def.icon
+        self._attr_device_class = sensor_def.device_class
+        self._attr_state_class = sensor_def.state_class
+        self._attr_native_unit_of_measurement = sensor_def.unit
+
+    @property
+    def native_value(self):
+        return self.coordinator.data.get(self._key) if self.coordinator.data else None
+
+    @property
+    def extra_state_attributes(self):
+        data = self.coordinator.data or {}
+        return {
+            "members": len(self.coordinator.members),
+            "members_reporting": data.get(MEMBERS_REPORTING),
+        }
+
+    @property
+    def device_info(self):
+        """A virtual device for the whole parallel system."""
+        return {
+            "identifiers": {(DOMAIN, f"system_{self.coordinator.group_id}")},
+            "name": f"EG4 Parallel System {self.coordinator.display_name}",
+            "manufacturer": "EG4",
+        }
@@ -0,0 +1,127 @@
+"""Service calls for the EG4 Inverter integration."""
+import logging
+import os
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.json import json_dumps
+
+from .const import DOMAIN, SERVICE_EXPORT_SNAPSHOTS, SERVICE_PROFILE
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_ENTRY_ID = "entry_id"
+ATTR_FORMAT = "format"
+ATTR_FILENAME = "filename"
+ATTR_CYCLES = "cycles"
+ATTR_MEMORY = "memory"
+
+EXPORT_SNAPSHOTS_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_FORMAT, default="json"): vol.In(["json", "csv"]),
+        vol.Optional(ATTR_FILENAME): cv.string,
+    }
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_CYCLES, default=3): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=50)
+        ),
+        vol.Optional(ATTR_MEMORY, default=False): cv.boolean,
+    }
+)
+
+
+def _coordinators(hass: HomeAssistant, entry_id: str | None):
+    """Loaded coordinators, optionally narrowed to one config entry."""
+    from .coordinator import EG4DataCoordinator
+
+    coordinators = {
+        key: value
+        for key, value in hass.data.get(DOMAIN, {}).items()
+        if isinstance(value, EG4DataCoordinator)
+    }
+    if entry_id is None:
+        return coordinators
+    if entry_id not in coordinators:
+        raise ServiceValidationError(f"No loaded EG4 inverter entry {entry_id}")
+    return {entry_id: coordinators[entry_id]}
+
+
+def _write_file(path: str, content: str) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(content)
+
+
+async def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration's services."""
+
+    async def async_export_snapshots(call: ServiceCall) -> ServiceResponse:
+        """Export the recent snapshot ring buffer(s) as JSON or CSV."""
+        fmt = call.data[ATTR_FORMAT]
+        exported = {}
+        for entry_id, coordinator in _coordinators(
+            hass, call.data.get(ATTR_ENTRY_ID)
+        ).items():
+            ring = coordinator.snapshots
+            exported[entry_id] = ring.as_csv() if fmt == "csv" else ring.as_json()
+
+        filename = call.data.get(ATTR_FILENAME)
+        if filename:
+            # Only ever write directly into the config directory
+            base, ext = os.path.splitext(os.path.basename(filename))
+            for entry_id, content in exported.items():
+                suffix = f"_{entry_id}" if len(exported) > 1 else ""
+                path = hass.config.path(f"{base}{suffix}{ext or '.' + fmt}")
+                if fmt == "json":
+                    content = json_dumps(content)
+                await hass.async_add_executor_job(_write_file, path, content)
+                _LOGGER.info("Exported EG4 snapshots to %s", path)
+
+        if not call.return_response:
+            return None
+        return exported
+
+    async def async_profile(call: ServiceCall) -> None:
+        """Profile the next polls; results arrive as a persistent notification."""
+        coordinators = _coordinators(hass, call.data.get(ATTR_ENTRY_ID))
+        if any(
+            c.profile is not None and c.profile.remaining > 0
+            for c in coordinators.values()
+        ):
+            raise ServiceValidationError("An EG4 profile is already running")
+        # cProfile, pstats and tracemalloc are only loaded when asked for
+        from .profiler import ProfileSession
+
+        session = ProfileSession(
+            hass, call.data[ATTR_CYCLES], call.data[ATTR_MEMORY], len(coordinators)
+        )
+        for coordinator in coordinators.values():
+            coordinator.profile = session
+        _LOGGER.info(
+            "Profiling the next %d EG4 poll(s) of %d entries",
+            call.data[ATTR_CYCLES],
+            len(coordinators),
+        )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_SNAPSHOTS,
+        async_export_snapshots,
+        schema=EXPORT_SNAPSHOTS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
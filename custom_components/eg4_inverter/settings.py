@@ -0,0 +1,92 @@
+"""Diff successive holding-parameter dumps and journal what changed."""
+import logging
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, SETTINGS_JOURNAL_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+
+
+def _as_dict(dump: Any) -> dict[str, Any]:
+    """Flatten a settings dump (model object or dict) into key -> value."""
+    if isinstance(dump, dict):
+        return dict(dump)
+    if hasattr(dump, "model_dump"):
+        return dump.model_dump()
+    return dict(vars(dump))
+
+
+class SettingsJournal:
+    """Last known parameter set plus a bounded journal of changes.
+
+    ``update`` compares a fresh dump key by key against the previous one
+    and appends one compact ``[timestamp, key, old, new]`` row per changed
+    parameter. Setting entities subscribe to their own key, so a dump that
+    changed nothing writes no state at all. The baseline is persisted, so
+    changes made while Home Assistant was down show up on the first read.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.settings")
+        self._loaded = False
+        self.current: dict[str, Any] = {}
+        self.changes: deque[list] = deque(maxlen=SETTINGS_JOURNAL_SIZE)
+        self._listeners: dict[str, list[Callable[[], None]]] = {}
+
+    async def async_update(self, dump: Any, timestamp: float) -> set[str]:
+        """Diff a new parameter dump in; return the keys that changed."""
+        if not self._loaded:
+            stored = await self._store.async_load() or {}
+            self.current = stored.get("current", {})
+            self.changes.extend(stored.get("changes", []))
+            self._loaded = True
+
+        values = _as_dict(dump)
+        if not self.current:
+            # Nothing to compare with yet: this dump is the baseline
+            self.current = values
+            self._store.async_delay_save(self._data_to_save, 30)
+            return set(values)
+
+        changed = set()
+        for key, value in values.items():
+            old = self.current.get(key)
+            if key in self.current and old == value:
+                continue
+            changed.add(key)
+            self.changes.append([timestamp, key, old, value])
+            _LOGGER.debug("Setting %s changed: %s -> %s", key, old, value)
+        self.current = values
+        if changed:
+            self._store.async_delay_save(self._data_to_save, 30)
+        return changed
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {"current": self.current, "changes": list(self.changes)}
+
+    @callback
+    def async_add_listener(
+        self, key: str, update_callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Call ``update_callback`` whenever ``key`` changes; returns a remover."""
+        self._listeners.setdefault(key, []).append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._listeners[key].remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_notify(self, keys: set[str]) -> None:
+        """Tell the listeners of the given keys that their value changed."""
+        for key in keys:
+            for update_callback in list(self._listeners.get(key, ())):
+                update_callback()
@@ -0,0 +1,85 @@
+"""Work out which endpoints a config entry actually needs to poll."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from .const import (
+    CONF_PRESET,
+    DEFAULT_PRESET,
+    PRESET_GROUPS,
+    GROUP_ENDPOINTS,
+    CONF_ENDPOINTS,
+    OPTIONAL_ENDPOINTS,
+    CONF_DERIVED,
+)
+from .definitions import BATTERY_SUMMARY_SENSORS, DEFINITION_GROUPS
+from .util import entry_option
+
+_BATTERY_SUMMARY_KEYS = {d.key for d in BATTERY_SUMMARY_SENSORS}
+
+
+def preset_groups(entry: ConfigEntry) -> set[str]:
+    """Definition groups that get entities under the entry's preset."""
+    preset = entry.options.get(CONF_PRESET, DEFAULT_PRESET)
+    return PRESET_GROUPS.get(preset, PRESET_GROUPS[DEFAULT_PRESET])
+
+
+def entity_group(unique_id: str, entry_id: str) -> str | None:
+    """Map an entity unique_id back to its definition group.
+
+    Unique ids are "<entry>_<group>_<key>", or "<entry>_battery_<index>_<key>"
+    for per-battery entities.
+    """
+    prefix = f"{entry_id}_"
+    if not unique_id.startswith(prefix):
+        return None
+    rest = unique_id[len(prefix) :]
+    if rest.startswith("battery_"):
+        if rest[len("battery_") :] in _BATTERY_SUMMARY_KEYS:
+            return "battery"
+        return "battery_units"
+    group = rest.split("_", 1)[0]
+    return group if group in DEFINITION_GROUPS else None
+
+
+def derived_groups(entry: ConfigEntry) -> set[str]:
+    """Definition groups read by the entry's derived sensors."""
+    if not entry.options.get(CONF_DERIVED):
+        return set()
+    from .derived import DerivedError, parse_derived
+
+    try:
+        specs = parse_derived(entry.options.get(CONF_DERIVED))
+    except DerivedError:
+        return set()
+    return {group for spec in specs for group, _ in spec.references}
+
+
+def required_endpoints(hass: HomeAssistant, entry: ConfigEntry) -> set[str]:
+    """Endpoints with at least one enabled (or not yet registered) entity.
+
+    A group only stops being polled once entities for it exist in the
+    registry and every one of them is disabled. Runtime is always polled:
+    it drives availability and the transition events. Endpoints switched
+    off in the options are never polled. Groups a derived sensor reads
+    are polled as long as the derived sensor exists.
+    """
+    registered: dict[str, bool] = {}
+    registry = er.async_get(hass)
+    for reg_entry in er.async_entries_for_config_entry(registry, entry.entry_id):
+        group = entity_group(reg_entry.unique_id, entry.entry_id)
+        if group is None:
+            continue
+        registered[group] = registered.get(group, False) or not reg_entry.disabled
+
+    allowed = set(entry_option(entry, CONF_ENDPOINTS, OPTIONAL_ENDPOINTS))
+    endpoints = {"runtime"}
+    for group in preset_groups(entry):
+        endpoint = GROUP_ENDPOINTS.get(group)
+        if endpoint and registered.get(group, True) and endpoint in allowed:
+            endpoints.add(endpoint)
+    for group in derived_groups(entry):
+        endpoint = GROUP_ENDPOINTS.get(group)
+        if endpoint and endpoint in allowed:
+            endpoints.add(endpoint)
+    return endpoints
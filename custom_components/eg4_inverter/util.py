@@ -0,0 +1,27 @@
+"""Small value helpers shared across the integration."""
+from typing import Any
+
+
+def parse_float(value: Any, scale: float = 1.0) -> float | None:
+    """Helper to convert strings/numbers to float, applying a scale if needed."""
+    try:
+        if isinstance(value, str):
+            value = value.strip()
+            if not value or value == "--":
+                return None
+        return float(value) * scale
+    except (ValueError, TypeError):
+        return None
+
+
+def read_field(data: Any, key: str) -> Any:
+    """Read a field from a model object or a plain dict."""
+    try:
+        return getattr(data, key)
+    except AttributeError:
+        return data.get(key) if isinstance(data, dict) else None
+
+
+def entry_option(entry: Any, key: str, default: Any = None) -> Any:
+    """Read a setting from entry.options, falling back to entry.data."""
+    return entry.options.get(key, entry.data.get(key, default))
@@ -0,0 +1,16 @@
+"""Shared fixtures for the EG4 inverter tests."""
+import pytest_asyncio
+
+from pytest_homeassistant_custom_component.common import async_test_home_assistant
+
+
+@pytest_asyncio.fixture
+async def hass(hass_storage):
+    """A running Home Assistant for tests marked with pytest.mark.asyncio.
+
+    The plugin's own fixture needs asyncio auto mode, which would also pick
+    up the unmarked tests.
+    """
+    async with async_test_home_assistant() as hass:
+        yield hass
+        await hass.async_stop(force=True)
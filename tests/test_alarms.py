@@ -0,0 +1,120 @@
+"""Tests for incremental alarm log ingestion."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.eg4_inverter.alarms import EG4AlarmLog
+from custom_components.eg4_inverter.const import ALARM_MAX_PAGES, ALARM_PAGE_SIZE
+
+SERIAL = "1234567890"
+
+
+def _row(minute: int, record_id: int, text: str = "Grid lost") -> dict:
+    return {"id": record_id, "startTime": f"2024-06-01 12:{minute:02d}:00", "eventText": text}
+
+
+class _Portal:
+    """Serves the alarm log newest first, a page at a time."""
+
+    def __init__(self) -> None:
+        self.rows: list[dict] = []
+        self.pages: list[int] = []
+
+    def add(self, *rows: dict) -> None:
+        self.rows = sorted(
+            [*self.rows, *rows], key=lambda row: row["startTime"], reverse=True
+        )
+
+    async def fetch(self, serial_number: str, page: int) -> list[dict]:
+        self.pages.append(page)
+        start = (page - 1) * ALARM_PAGE_SIZE
+        return self.rows[start : start + ALARM_PAGE_SIZE]
+
+
+def _log(portal: _Portal, stored: dict | None = None) -> tuple[EG4AlarmLog, MagicMock]:
+    store = MagicMock()
+    store.async_load = AsyncMock(return_value=stored)
+    with patch("custom_components.eg4_inverter.alarms.Store", return_value=store):
+        log = EG4AlarmLog(MagicMock(), "entry", MagicMock(), "https://portal")
+    log._async_fetch_page = portal.fetch
+    return log, store
+
+
+async def _update(log: EG4AlarmLog) -> list[dict]:
+    return await log.async_update(SERIAL, AsyncMock())
+
+
+@pytest.mark.asyncio
+async def test_first_read_is_history_not_news():
+    portal = _Portal()
+    portal.add(_row(0, 1), _row(1, 2))
+    log, store = _log(portal)
+
+    assert await _update(log) == []
+    assert len(log.recent) == 2
+    assert log._cursor == {"time": "2024-06-01 12:01:00", "ids": ["2"]}
+    store.async_delay_save.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_only_newer_records_are_returned_oldest_first():
+    portal = _Portal()
+    portal.add(_row(0, 1))
+    log, _ = _log(portal)
+    await _update(log)
+
+    portal.add(_row(2, 3), _row(1, 2))
+    assert [row["id"] for row in await _update(log)] == [2, 3]
+    assert await _update(log) == []
+
+
+@pytest.mark.asyncio
+async def test_records_sharing_the_cursor_time_are_not_repeated():
+    portal = _Portal()
+    portal.add(_row(5, 1))
+    log, _ = _log(portal)
+    await _update(log)
+
+    # A second record with the same timestamp shows up after the first read
+    portal.add(_row(5, 2, "Battery fault"))
+    assert [row["id"] for row in await _update(log)] == [2]
+    assert sorted(log._cursor["ids"]) == ["1", "2"]
+    assert await _update(log) == []
+
+
+@pytest.mark.asyncio
+async def test_catching_up_pages_until_old_records_appear():
+    portal = _Portal()
+    portal.add(_row(0, 0))
+    log, _ = _log(portal)
+    await _update(log)
+
+    portal.add(*(_row(1 + index % 50, 1 + index) for index in range(ALARM_PAGE_SIZE + 5)))
+    portal.pages.clear()
+    assert len(await _update(log)) == ALARM_PAGE_SIZE + 5
+    assert portal.pages == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_paging_stops_at_the_limit():
+    portal = _Portal()
+    portal.add(_row(0, 0))
+    log, _ = _log(portal)
+    await _update(log)
+
+    many = ALARM_PAGE_SIZE * (ALARM_MAX_PAGES + 1)
+    portal.add(*(_row(1 + index % 58, 1 + index) for index in range(many)))
+    portal.pages.clear()
+    await _update(log)
+    assert portal.pages == list(range(1, ALARM_MAX_PAGES + 1))
+
+
+@pytest.mark.asyncio
+async def test_cursor_is_restored_from_storage():
+    portal = _Portal()
+    portal.add(_row(0, 1), _row(1, 2))
+    stored = {"cursor": {"time": "2024-06-01 12:00:00", "ids": ["1"]}, "recent": [_row(0, 1)]}
+    log, _ = _log(portal, stored)
+
+    assert [row["id"] for row in await _update(log)] == [2]
+    assert len(log.recent) == 2
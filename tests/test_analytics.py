@@ -0,0 +1,124 @@
+"""Tests for the rolling pack analytics."""
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.eg4_inverter.analytics import (
+    SECONDS_PER_DAY,
+    PackAnalytics,
+    RollingStat,
+    TrendStat,
+)
+from custom_components.eg4_inverter.decoder import ValueStore
+
+
+def test_rolling_stat_matches_the_ewma_recurrence():
+    stat = RollingStat()
+    stat.update(10.0, alpha=0.5)
+    assert (stat.mean, stat.var, stat.min, stat.max) == (10.0, 0.0, 10.0, 10.0)
+    stat.update(20.0, alpha=0.5)
+    # mean += a * d; var = (1 - a) * (var + a * d^2)
+    assert stat.mean == pytest.approx(15.0)
+    assert stat.var == pytest.approx(25.0)
+    stat.update(12.0, alpha=0.5)
+    assert stat.mean == pytest.approx(13.5)
+    assert stat.var == pytest.approx(0.5 * (25.0 + 0.5 * 9.0))
+    assert (stat.min, stat.max) == (10.0, 20.0)
+
+
+def test_rolling_stat_of_a_constant_has_no_variance():
+    stat = RollingStat()
+    for _ in range(50):
+        stat.update(3.3)
+    assert stat.mean == pytest.approx(3.3)
+    assert stat.var == pytest.approx(0.0)
+
+
+def _least_squares(points):
+    n = len(points)
+    mean_t = sum(t for t, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    cov = sum((t - mean_t) * (y - mean_y) for t, y in points)
+    var = sum((t - mean_t) ** 2 for t, _ in points)
+    return cov / var
+
+
+def test_trend_slope_matches_batch_least_squares():
+    points = [(0.0, 100.0), (1.0, 99.7), (2.5, 99.9), (4.0, 99.1), (7.0, 98.8), (9.0, 98.2)]
+    trend = TrendStat()
+    for t, y in points:
+        trend.update(t, y)
+    assert trend.slope(9.0, 7.0) == pytest.approx(_least_squares(points))
+
+
+def test_trend_waits_for_enough_span():
+    trend = TrendStat()
+    assert trend.slope(0.0, 7.0) is None
+    trend.update(0.0, 100.0)
+    trend.update(3.0, 99.0)
+    assert trend.slope(3.0, 7.0) is None
+    trend.update(8.0, 97.0)
+    assert trend.slope(8.0, 7.0) is not None
+
+
+def _units(*modules):
+    return {
+        "battery": SimpleNamespace(
+            battery_units=[
+                SimpleNamespace(batIndex=index, noticeInfo=None, **values)
+                for index, values in enumerate(modules)
+            ],
+        )
+    }
+
+
+def _analytics(store: ValueStore, stored=None) -> tuple[PackAnalytics, MagicMock]:
+    storage = MagicMock()
+    storage.async_load = AsyncMock(return_value=stored)
+    with patch("custom_components.eg4_inverter.analytics.Store", return_value=storage):
+        analytics = PackAnalytics(MagicMock(), "entry", store)
+    return analytics, storage
+
+
+@pytest.mark.asyncio
+async def test_pack_figures_pick_the_worst_module():
+    store = ValueStore()
+    analytics, _ = _analytics(store)
+    await analytics.async_load()
+    data = _units(
+        {"batMaxCellVoltage": 3350, "batMinCellVoltage": 3340, "batMaxCellTemp": 250, "soc": 90},
+        {"batMaxCellVoltage": 3360, "batMinCellVoltage": 3330, "batMaxCellTemp": 310, "soc": 85},
+    )
+    store.decode(data)
+    figures = analytics.update(data, 0.0)
+    assert figures["cellSpread"] == pytest.approx(30.0)
+    assert figures["socSpread"] == pytest.approx(5.0)
+    assert figures["hottestModule"] == 1
+    assert figures["hottestModuleTemp"] == pytest.approx(31.0)
+    assert figures["sohDeclineRate"] is None
+    assert analytics.update({}, 1.0) is None
+
+
+@pytest.mark.asyncio
+async def test_stats_survive_a_restart():
+    store = ValueStore()
+    analytics, storage = _analytics(store)
+    await analytics.async_load()
+    for day in range(10):
+        data = _units({"soh": 100 - day * 0.1, "batMaxCellTemp": 250 + day})
+        store.decode(data)
+        before = analytics.update(data, day * SECONDS_PER_DAY)
+    saved = json.loads(json.dumps(storage.async_delay_save.call_args[0][0]()))
+
+    restored, _ = _analytics(store, saved)
+    await restored.async_load()
+    assert restored._data_to_save() == analytics._data_to_save()
+    # About 0.1 % a day is 36.5 % a year
+    assert before["sohDeclineRate"] == pytest.approx(36.5)
+
+    data = _units({"soh": 99.0, "batMaxCellTemp": 260})
+    store.decode(data)
+    now = 10 * SECONDS_PER_DAY
+    assert restored.update(data, now) == analytics.update(data, now)
@@ -0,0 +1,166 @@
+"""Tests for backfilling statistics from the portal's day charts."""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.eg4_inverter.backfill import EG4Backfill, hourly_statistics
+from custom_components.eg4_inverter.const import BACKFILL_MAX_ATTEMPTS, BACKFILL_MAX_DAYS
+from custom_components.eg4_inverter.errors import FetchError, FetchResult
+
+HOUR = 3600
+# 2024-06-01 10:00:00 UTC
+TEN = datetime(2024, 6, 1, 10, tzinfo=timezone.utc).timestamp()
+
+
+def _utc(hour: int, day: int = 1) -> datetime:
+    return datetime(2024, 6, day, hour, tzinfo=timezone.utc)
+
+
+def _backfill(stored: dict | None = None) -> tuple[EG4Backfill, MagicMock]:
+    store = MagicMock()
+    store.async_load = AsyncMock(return_value=stored)
+    with patch("custom_components.eg4_inverter.backfill.Store", return_value=store):
+        backfill = EG4Backfill(MagicMock(), "entry", MagicMock(), "https://portal/")
+    return backfill, store
+
+
+async def _fetch(endpoint, call) -> FetchResult:
+    """The coordinator's _async_fetch, minus the rate limit and retries."""
+    return FetchResult(endpoint, data=await call())
+
+
+async def _fail(endpoint, call) -> FetchResult:
+    return FetchResult(endpoint, error=FetchError.AUTH, attempts=2)
+
+
+def test_regular_polls_leave_no_gap():
+    backfill, _ = _backfill()
+    assert backfill.note_sample(TEN) is None
+    assert backfill.note_sample(TEN + 30) is None
+    assert backfill.note_sample(TEN + 600) is None
+
+
+def test_gap_covers_the_whole_hours_that_ended():
+    backfill, _ = _backfill()
+    backfill.note_sample(TEN)
+    assert backfill.note_sample(TEN + 3 * HOUR + 1200) == (_utc(10), _utc(13))
+
+
+
+def test_partly_sampled_first_hour_is_left_alone():
+    backfill, _ = _backfill()
+    backfill.note_sample(TEN + 1200)
+    assert backfill.note_sample(TEN + 3 * HOUR + 600) == (_utc(11), _utc(13))
+
+def test_gap_inside_one_hour_is_left_to_the_recorder():
+    backfill, _ = _backfill()
+    backfill.note_sample(TEN + 60)
+    assert backfill.note_sample(TEN + 1800) is None
+
+
+def test_gap_is_capped_and_skipped_while_running():
+    backfill, _ = _backfill()
+    backfill.note_sample(TEN)
+    now = TEN + (BACKFILL_MAX_DAYS + 3) * 24 * HOUR
+    start, end = backfill.note_sample(now)
+    assert end - start == timedelta(days=BACKFILL_MAX_DAYS)
+
+    backfill.running = True
+    assert backfill.note_sample(now + 2 * HOUR) is None
+
+
+def test_gap_starts_after_the_watermark():
+    backfill, _ = _backfill()
+    backfill.watermark = TEN + 2 * HOUR
+    backfill.note_sample(TEN)
+    assert backfill.note_sample(TEN + 4 * HOUR) == (_utc(12), _utc(14))
+
+
+def _row(hour: int, minute: int, **fields) -> dict:
+    return {"time": f"2024-06-01 {hour:02d}:{minute:02d}:00", **fields}
+
+
+def test_rows_are_bucketed_per_hour_and_direction():
+    rows = [
+        _row(10, 0, solarPv=100, gridPower=-300, batteryDischarging=50),
+        _row(10, 30, solarPv="300", gridPower=200, batteryDischarging=-150),
+        _row(11, 0, solarPv=1000),
+        # Outside the gap, and unreadable rows, are dropped
+        _row(9, 55, solarPv=5000),
+        _row(12, 0, solarPv=5000),
+        {"solarPv": 5000},
+    ]
+    stats = hourly_statistics(rows, _utc(10), _utc(12))
+    assert stats["ppv"] == [
+        {"start": _utc(10), "mean": 200.0, "min": 100.0, "max": 300.0},
+        {"start": _utc(11), "mean": 1000.0, "min": 1000.0, "max": 1000.0},
+    ]
+    assert [(row["min"], row["max"]) for row in stats["pToGrid"]] == [(0.0, 300.0)]
+    assert [(row["min"], row["max"]) for row in stats["pToUser"]] == [(0.0, 200.0)]
+    assert [row["mean"] for row in stats["pDisCharge"]] == [25.0]
+    assert [row["mean"] for row in stats["pCharge"]] == [75.0]
+    assert "consumptionPower" not in stats
+
+
+def test_split_date_fields_are_read_too():
+    rows = [{"year": 2024, "month": 6, "day": 1, "hour": 10, "minute": 5, "solarPv": 40}]
+    assert hourly_statistics(rows, _utc(10), _utc(11))["ppv"][0]["mean"] == 40.0
+
+
+@pytest.mark.asyncio
+async def test_watermark_is_saved_and_restored():
+    backfill, store = _backfill()
+    days = []
+
+    async def fetch_day(serial_number, day):
+        days.append(day)
+        return {"success": True, "data": [_row(10, 0, solarPv=100)]}
+
+    backfill._async_fetch_day = fetch_day
+    backfill._import = MagicMock(return_value=1)
+    await backfill.async_backfill((_utc(10), _utc(13)), "1234", _fetch)
+    assert days == ["2024-06-01"]
+    assert backfill.watermark == _utc(13).timestamp()
+    assert backfill.imported_hours == 1
+    saved = store.async_delay_save.call_args[0][0]()
+    assert saved["watermark"] == _utc(13).timestamp()
+    assert saved["retry_start"] is None
+
+    restored, _ = _backfill(saved)
+    await restored.async_load()
+    assert restored.watermark == _utc(13).timestamp()
+    restored.note_sample(TEN)
+    # Hours up to the watermark are never fetched again
+    assert restored.note_sample(TEN + 5 * HOUR) == (_utc(13), _utc(15))
+
+
+@pytest.mark.asyncio
+async def test_failed_backfill_is_retried_later():
+    backfill, store = _backfill()
+    await backfill.async_backfill((_utc(10), _utc(13)), "1234", _fail)
+    assert backfill.watermark is None
+    assert backfill.retry_start == _utc(10).timestamp()
+    assert store.async_delay_save.call_args[0][0]()["retry_start"] == _utc(10).timestamp()
+    assert not backfill.running
+
+    # Not retried before the retry delay has passed
+    backfill.note_sample(TEN + 4 * HOUR)
+    assert backfill.note_sample(TEN + 4 * HOUR + 30) is None
+    with patch(
+        "custom_components.eg4_inverter.backfill.time.monotonic",
+        return_value=backfill._retry_at,
+    ):
+        assert backfill.note_sample(TEN + 4 * HOUR + 60) == (_utc(10), _utc(14))
+
+
+@pytest.mark.asyncio
+async def test_a_gap_that_keeps_failing_is_given_up():
+    backfill, store = _backfill()
+    for _ in range(BACKFILL_MAX_ATTEMPTS - 1):
+        await backfill.async_backfill((_utc(10), _utc(13)), "1234", _fail)
+        assert backfill.retry_start == _utc(10).timestamp()
+    await backfill.async_backfill((_utc(10), _utc(13)), "1234", _fail)
+    assert backfill.retry_start is None
+    assert backfill.attempts == 0
+    assert store.async_delay_save.call_args[0][0]()["retry_start"] is None
@@ -0,0 +1,74 @@
+"""Tests for learning the dongle upload cadence."""
+from datetime import datetime, timedelta
+
+from custom_components.eg4_inverter.cadence import UploadCadence
+from custom_components.eg4_inverter.const import (
+    CADENCE_MARGIN_SECONDS,
+    CADENCE_MAX_MISSES,
+    CADENCE_PROBE_SECONDS,
+    CADENCE_RETRY_SECONDS,
+)
+
+START = datetime(2024, 6, 1, 12, 0, 0)
+
+
+def _device_time(seconds: float) -> str:
+    return (START + timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def test_repeated_device_time_is_not_new():
+    cadence = UploadCadence()
+    assert cadence.observe(_device_time(0), 100.0)
+    assert not cadence.observe(_device_time(0), 130.0)
+    assert cadence.unchanged == 1
+
+
+def test_missing_device_time_never_holds_back_an_update():
+    cadence = UploadCadence()
+    assert cadence.observe(None, 100.0)
+    assert cadence.observe(None, 130.0)
+
+
+def test_period_is_the_smallest_gap_between_uploads():
+    cadence = UploadCadence()
+    # The second poll missed one upload, so saw a 2-period gap
+    for device, requested in ((0, 100.0), (120, 221.0), (180, 281.0)):
+        cadence.observe(_device_time(device), requested)
+    assert cadence.period == 60
+
+
+def test_gaps_outside_the_plausible_range_are_ignored():
+    cadence = UploadCadence()
+    cadence.observe(_device_time(0), 100.0)
+    cadence.observe(_device_time(2), 102.0)
+    cadence.observe(_device_time(3602), 3702.0)
+    assert cadence.period is None
+
+
+def test_no_delay_until_the_cadence_is_known():
+    cadence = UploadCadence()
+    assert cadence.next_delay(0.0, 30.0) is None
+    cadence.observe(_device_time(0), 100.0)
+    assert cadence.next_delay(100.0, 30.0) is None
+
+
+def test_next_poll_lands_just_after_an_upload():
+    cadence = UploadCadence()
+    cadence.observe(_device_time(0), 100.0)
+    cadence.observe(_device_time(60), 160.0)
+    delay = cadence.next_delay(161.0, 30.0)
+    # The upload was seen on schedule at 160, so the anchor probes a little
+    # earlier and the poll aims just past the next upload
+    anchor = 160.0 - CADENCE_PROBE_SECONDS
+    assert delay == anchor + 60 + CADENCE_MARGIN_SECONDS - 161.0
+
+
+def test_missed_upload_is_retried_then_given_up():
+    cadence = UploadCadence()
+    cadence.observe(_device_time(0), 100.0)
+    cadence.observe(_device_time(60), 160.0)
+    cadence.observe(_device_time(60), 223.0)
+    assert cadence.next_delay(223.0, 30.0) == CADENCE_RETRY_SECONDS
+    for requested in range(CADENCE_MAX_MISSES):
+        cadence.observe(_device_time(60), 230.0 + requested)
+    assert cadence.next_delay(240.0, 30.0) is None
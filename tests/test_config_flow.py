@@ -1,7 +1,22 @@
-from homeassistant import config_entries
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant import config_entries, loader
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.data_entry_flow import FlowResultType
 from custom_components.eg4_inverter.config_flow import ConfigFlow
+from custom_components.eg4_inverter.const import (
+    CONF_BASE_URL,
+    CONF_IGNORE_SSL,
+    CONF_SERIAL_NUMBER,
+    DEFAULT_BASE_URL,
+    DOMAIN,
+)
 from pytest_homeassistant_custom_component.common import MockConfigEntry
 
+PACKAGE = "custom_components.eg4_inverter"
+FLOW = f"{PACKAGE}.config_flow"
+
 async def test_config_flow(hass):
     flow = ConfigFlow()
     result = await flow.async_step_user({
@@ -12,4 +27,75 @@ async def test_config_flow(hass):
     })
 
     assert result["type"] == "create_entry"
-    assert result["title"] == "EG4 Inverter"
\ No newline at end of file
+    assert result["title"] == "EG4 Inverter"
+
+SERIAL = "1234567890"
+OTHER_SERIAL = "2222222222"
+
+
+def _entry(hass, serial: str = SERIAL) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=2,
+        unique_id=serial,
+        title=f"EG4 Inverter {serial}",
+        data={
+            CONF_USERNAME: "user",
+            CONF_PASSWORD: "secret",
+            CONF_SERIAL_NUMBER: serial,
+            CONF_BASE_URL: DEFAULT_BASE_URL,
+            CONF_IGNORE_SSL: False,
+        },
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def _reconfigure(hass, entry: MockConfigEntry, serial: str) -> dict:
+    """Run the reconfigure step with a login that always succeeds."""
+    hass.data.pop(loader.DATA_CUSTOM_COMPONENTS, None)
+    info = {"api": MagicMock(), "session": MagicMock(), "inverters": []}
+    with (
+        patch(f"{FLOW}.validate_input", AsyncMock(return_value=info)),
+        patch(f"{PACKAGE}.async_setup_entry", AsyncMock(return_value=True)),
+        patch(f"{PACKAGE}.async_unload_entry", AsyncMock(return_value=True)),
+    ):
+        result = await entry.start_reconfigure_flow(hass)
+        assert result["step_id"] == "reconfigure"
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {CONF_USERNAME: "user", CONF_SERIAL_NUMBER: serial},
+        )
+        await hass.async_block_till_done()
+    return result
+
+
+@pytest.mark.asyncio
+async def test_reconfigure_to_another_serial_moves_the_unique_id(hass):
+    entry = _entry(hass)
+    result = await _reconfigure(hass, entry, OTHER_SERIAL)
+    assert result["type"] is FlowResultType.ABORT
+    assert result["reason"] == "reconfigure_successful"
+    assert entry.unique_id == OTHER_SERIAL
+    assert entry.data[CONF_SERIAL_NUMBER] == OTHER_SERIAL
+    # The stored password is kept when the field is left blank
+    assert entry.data[CONF_PASSWORD] == "secret"
+
+
+@pytest.mark.asyncio
+async def test_reconfigure_keeping_the_serial_succeeds(hass):
+    entry = _entry(hass)
+    result = await _reconfigure(hass, entry, SERIAL)
+    assert result["reason"] == "reconfigure_successful"
+    assert entry.unique_id == SERIAL
+
+
+@pytest.mark.asyncio
+async def test_reconfigure_onto_a_configured_serial_aborts(hass):
+    entry = _entry(hass)
+    _entry(hass, OTHER_SERIAL)
+    result = await _reconfigure(hass, entry, OTHER_SERIAL)
+    assert result["type"] is FlowResultType.ABORT
+    assert result["reason"] == "already_configured"
+    assert entry.unique_id == SERIAL
+    assert entry.data[CONF_SERIAL_NUMBER] == SERIAL
@@ -0,0 +1,272 @@
+"""Tests for the polling coordinator and its per-endpoint children."""
+import ssl
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiohttp import ClientResponseError
+from eg4_inverter_api import exceptions
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.eg4_inverter.client import async_cache_login
+from custom_components.eg4_inverter.const import DOMAIN
+from custom_components.eg4_inverter.coordinator import EG4DataCoordinator
+
+SERIAL = "1234567890"
+
+
+class _Payload(SimpleNamespace):
+    """A client model object: fields it was not given read as None."""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return None
+
+
+class _Api:
+    """Stands in for EG4InverterAPI; each endpoint answers from ``payloads``."""
+
+    def __init__(self, *args, session=None, **kwargs) -> None:
+        self.session = session
+        self.logins: list[bool] = []
+        self.payloads = {
+            "runtime": _Payload(success=True, deviceTime="2024-06-01 12:00:00", ppv=100),
+            "energy": _Payload(success=True, todayYieldingText="1.0"),
+            "battery": _Payload(success=True, battery_units=[]),
+            "settings": {"chargeRate": 50},
+        }
+
+    async def login(self, ignore_ssl=False) -> None:
+        self.logins.append(ignore_ssl)
+
+    def get_inverters(self):
+        return [_Payload(serialNum=SERIAL)]
+
+    def set_selected_inverter(self, serialNum=None) -> None:
+        return None
+
+    def get_selected_inverter(self):
+        return _Payload(serialNum=SERIAL)
+
+    async def _answer(self, key):
+        payload = self.payloads[key]
+        if isinstance(payload, Exception):
+            raise payload
+        return payload
+
+    async def get_inverter_runtime_async(self):
+        return await self._answer("runtime")
+
+    async def get_inverter_energy_async(self):
+        return await self._answer("energy")
+
+    async def get_inverter_battery_async(self):
+        return await self._answer("battery")
+
+    async def read_settings_async(self):
+        return await self._answer("settings")
+
+
+def _data(**data) -> dict:
+    return {
+        "username": "user",
+        "password": "secret",
+        "base_url": "https://portal.invalid",
+        "serial_number": SERIAL,
+        **data,
+    }
+
+
+async def _coordinator(hass, options=None, **data) -> EG4DataCoordinator:
+    entry = MockConfigEntry(domain=DOMAIN, data=_data(**data), options=options or {})
+    entry.add_to_hass(hass)
+    client = SimpleNamespace(EG4InverterAPI=_Api, exceptions=exceptions)
+    with patch(
+        "custom_components.eg4_inverter.coordinator.async_import_client",
+        AsyncMock(return_value=client),
+    ):
+        coordinator = EG4DataCoordinator(hass, entry)
+        await coordinator._async_setup()
+    coordinator.alarm_log.async_update = AsyncMock(return_value=[])
+    # Not rate limited: each test polls more often than the fleet allows
+    coordinator._throttle = AsyncMock()
+    return coordinator
+
+
+def _listen(coordinator: EG4DataCoordinator) -> dict[str, list]:
+    calls = {key: [] for key in coordinator.children}
+    for key, child in coordinator.children.items():
+        child.async_add_listener(lambda key=key: calls[key].append(key))
+    return calls
+
+
+def _woken(calls: dict[str, list]) -> set[str]:
+    woken = {key for key, seen in calls.items() if seen}
+    for seen in calls.values():
+        seen.clear()
+    return woken
+
+
+@pytest.mark.asyncio
+async def test_each_child_wakes_only_its_own_entities(hass):
+    coordinator = await _coordinator(hass)
+    calls = _listen(coordinator)
+
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert _woken(calls) == {"runtime", "energy", "battery", "settings", "metrics"}
+
+    # Same upload again: nothing moved, so no entity is woken
+    await coordinator.async_refresh()
+    assert _woken(calls) == set()
+
+    # New upload: settings are not due, so their entities stay asleep
+    coordinator.api.payloads["runtime"] = _Payload(
+        success=True, deviceTime="2024-06-01 12:05:00", ppv=200
+    )
+    await coordinator.async_refresh()
+    assert _woken(calls) == {"runtime", "energy", "battery", "metrics"}
+    assert coordinator.children["settings"].data == {"chargeRate": 50}
+
+
+@pytest.mark.asyncio
+async def test_a_failed_endpoint_only_fails_its_own_child(hass):
+    coordinator = await _coordinator(hass)
+    await coordinator.async_refresh()
+
+    coordinator.api.payloads["runtime"] = _Payload(
+        success=True, deviceTime="2024-06-01 12:05:00", ppv=200
+    )
+    coordinator.api.payloads["energy"] = exceptions.EG4APIError("API request failed: 400")
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert not coordinator.children["energy"].last_update_success
+    for key in ("runtime", "battery", "settings", "metrics"):
+        assert coordinator.children[key].last_update_success
+    # The energy entities keep the last good reading to show once it recovers
+    assert coordinator.data["energy"].todayYieldingText == "1.0"
+
+
+@pytest.mark.asyncio
+async def test_login_failure_fails_every_child(hass):
+    coordinator = await _coordinator(hass)
+    coordinator.api.login = AsyncMock(side_effect=exceptions.EG4AuthError("bad password"))
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert not any(child.last_update_success for child in coordinator.children.values())
+
+
+@pytest.mark.asyncio
+async def test_first_refresh_fails_without_a_payload(hass):
+    coordinator = await _coordinator(hass)
+    coordinator.api.payloads["battery"] = exceptions.EG4APIError("API request failed: 400")
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert "initial fetch failed: battery (client)" in str(coordinator.last_exception)
+
+    coordinator.api.payloads["battery"] = _Payload(success=True, battery_units=[])
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+
+    # Once set up, a failing endpoint no longer fails the poll
+    coordinator.api.payloads["runtime"] = _Payload(
+        success=True, deviceTime="2024-06-01 12:05:00", ppv=200
+    )
+    coordinator.api.payloads["battery"] = exceptions.EG4APIError("API request failed: 400")
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert not coordinator.children["battery"].last_update_success
+
+
+@pytest.mark.asyncio
+async def test_each_entry_talks_through_its_own_session(hass):
+    first = await _coordinator(hass, ignore_ssl=True)
+    second = await _coordinator(hass, serial_number="0987654321")
+    assert first._session is not second._session
+    assert first._session.connector._ssl.verify_mode == ssl.CERT_NONE
+    assert second._session.connector._ssl.verify_mode == ssl.CERT_REQUIRED
+    for coordinator in (first, second):
+        # The side requests carry the client's login cookies
+        assert coordinator.api.session is coordinator._session
+        assert coordinator.alarm_log._session is coordinator._session
+        assert coordinator.backfill._session is coordinator._session
+
+    # The library would drop the session if asked to skip verification
+    await first.async_refresh()
+    assert first.api.logins == [False]
+
+
+@pytest.mark.asyncio
+async def test_config_flow_login_is_reused_with_its_session(hass):
+    api, session = _Api(), MagicMock()
+    async_cache_login(hass, _data(), api, api.get_inverters(), session)
+    coordinator = await _coordinator(hass)
+    assert coordinator.api is api
+    assert coordinator._session is session
+    assert coordinator.alarm_log._session is session
+
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert api.logins == []
+
+
+@pytest.mark.asyncio
+async def test_backfill_charts_log_in_again_like_the_other_endpoints(hass):
+    coordinator = await _coordinator(hass)
+    await coordinator.async_refresh()
+    answers = [
+        ClientResponseError(MagicMock(), (), status=401),
+        {"success": True, "data": []},
+    ]
+
+    async def fetch_day(serial_number, day):
+        answer = answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    coordinator.backfill._async_fetch_day = fetch_day
+    coordinator.backfill._import = MagicMock(return_value=0)
+    gap = (
+        datetime(2024, 6, 1, 10, tzinfo=timezone.utc),
+        datetime(2024, 6, 1, 12, tzinfo=timezone.utc),
+    )
+    await coordinator.backfill.async_backfill(gap, SERIAL, coordinator._async_fetch)
+    assert coordinator.api.logins == [False, False]
+    assert coordinator.backfill.watermark == gap[1].timestamp()
+    assert coordinator.errors.counts["auth"] == 1
+
+
+
+@pytest.mark.asyncio
+async def test_optional_features_are_built_only_once_enabled(hass):
+    coordinator = await _coordinator(hass)
+    assert coordinator.derived is None
+    assert coordinator.exporter is None
+    assert coordinator.publisher is None
+    assert coordinator.instrumentation is None
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.data["metrics"]["exportQueueDepth"] == 0
+
+    coordinator = await _coordinator(hass, options={"derived_sensors": "Doubled [W] = ppv * 2"})
+    await coordinator.async_refresh()
+    assert coordinator.data["derived"] == {"doubled": 200.0}
+
+
+@pytest.mark.asyncio
+async def test_forced_settings_refresh_notifies_without_waiting_for_a_poll(hass):
+    coordinator = await _coordinator(hass)
+    coordinator.api.payloads["settings"] = {"HOLD_EPS_VOLT_SET": 230}
+    await coordinator.async_refresh()
+    written = []
+    coordinator.settings.async_add_listener("HOLD_EPS_VOLT_SET", lambda: written.append(1))
+
+    coordinator.api.payloads["settings"] = {"HOLD_EPS_VOLT_SET": 240}
+    await coordinator.force_refresh_settings()
+    assert written == [1]
+    assert coordinator.values[coordinator.values.slot("settings", "HOLD_EPS_VOLT_SET")] == 240
+    assert coordinator.children["settings"].data == {"HOLD_EPS_VOLT_SET": 240}
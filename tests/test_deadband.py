@@ -0,0 +1,62 @@
+"""Tests for the per-definition deadband filter."""
+from unittest.mock import patch
+
+from custom_components.eg4_inverter.deadband import DeadbandFilter
+from custom_components.eg4_inverter.definitions import EG4Definition
+
+POWER = EG4Definition(
+    key="ppv", name="PV", unit="W", deadband=10.0, deadband_pct=2.0, heartbeat=300
+)
+
+
+def _filter(definition=POWER):
+    return DeadbandFilter.for_definition(definition)
+
+
+def test_unfiltered_definitions_get_no_filter():
+    assert DeadbandFilter.for_definition(EG4Definition(key="ppv", name="PV", unit="W")) is None
+
+
+def test_first_value_is_always_written():
+    assert _filter().should_write(100.0, True)
+
+
+def test_jitter_inside_the_band_is_held_back():
+    with patch("custom_components.eg4_inverter.deadband.time.monotonic", return_value=0):
+        band = _filter()
+        assert band.should_write(1000.0, True)
+        # max(10 W, 2% of 1000 W) = 20 W
+        assert not band.should_write(1015.0, True)
+        assert not band.should_write(985.0, True)
+        assert band.should_write(1021.0, True)
+
+
+def test_drift_is_compared_with_the_last_written_value():
+    with patch("custom_components.eg4_inverter.deadband.time.monotonic", return_value=0):
+        band = _filter()
+        band.should_write(100.0, True)
+        assert not band.should_write(106.0, True)
+        assert not band.should_write(109.0, True)
+        # 11 W away from the written 100 W, though only 2 W from the last poll
+        assert band.should_write(111.0, True)
+
+
+def test_unknown_and_availability_changes_always_write():
+    with patch("custom_components.eg4_inverter.deadband.time.monotonic", return_value=0):
+        band = _filter()
+        band.should_write(100.0, True)
+        assert band.should_write(100.0, False)
+        assert band.should_write(100.0, True)
+        assert band.should_write(None, True)
+        assert band.should_write(101.0, True)
+
+
+def test_heartbeat_writes_an_unchanged_value():
+    with patch("custom_components.eg4_inverter.deadband.time.monotonic") as monotonic:
+        band = _filter()
+        monotonic.return_value = 0
+        band.should_write(100.0, True)
+        monotonic.return_value = 299
+        assert not band.should_write(101.0, True)
+        monotonic.return_value = 300
+        assert band.should_write(101.0, True)
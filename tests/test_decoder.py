@@ -0,0 +1,101 @@
+"""Tests for the slot-addressed value store."""
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.eg4_inverter.decoder import PER_BATTERY_GROUP, ValueStore
+
+
+class _Payload(SimpleNamespace):
+    """A client model: fields it was not given read as None."""
+
+    def __getattr__(self, name):
+        return None
+
+
+def _battery(*units):
+    return _Payload(battery_units=[_Payload(**unit) for unit in units])
+
+
+def test_every_definition_has_a_distinct_slot():
+    store = ValueStore()
+    slots = [store.slot("runtime", "ppv"), store.slot("energy", "soc"), store.slot("runtime", "soc")]
+    assert len(set(slots)) == 3
+    assert all(store[slot] is None for slot in slots)
+
+
+def test_unknown_key_has_no_slot():
+    with pytest.raises(KeyError):
+        ValueStore().slot("runtime", "nosuchkey")
+
+
+def test_decode_parses_and_scales():
+    store = ValueStore()
+    store.decode(
+        {
+            "runtime": _Payload(ppv="1200", vBat=530, pToGrid="--", statusText="normal"),
+            "energy": {"totalCo2ReductionText": "367.69 kG"},
+        }
+    )
+    assert store[store.slot("runtime", "ppv")] == 1200.0
+    assert store[store.slot("runtime", "vBat")] == pytest.approx(53.0)
+    assert store[store.slot("runtime", "statusText")] == "normal"
+    assert store[store.slot("energy", "totalCo2ReductionText")] == pytest.approx(367.69)
+    # Absent fields and "--" placeholders are unknown
+    assert store[store.slot("runtime", "pToGrid")] is None
+    assert store[store.slot("runtime", "pToUser")] is None
+
+
+def test_missing_group_clears_its_values():
+    store = ValueStore()
+    store.decode({"runtime": _Payload(ppv=1200)})
+    store.decode({"runtime": None})
+    assert store[store.slot("runtime", "ppv")] is None
+
+
+def test_plain_dicts_are_read_like_model_objects():
+    store = ValueStore()
+    store.decode({"energy": {"todayYieldingText": "9.2"}})
+    assert store[store.slot("energy", "todayYieldingText")] == pytest.approx(9.2)
+
+
+def test_added_slots_survive_decode():
+    store = ValueStore()
+    slot = store.add_slot("derived", "net")
+    assert store.add_slot("derived", "net") == slot
+    store.values[slot] = 5.0
+    store.decode({"runtime": _Payload(ppv=1)})
+    assert store[slot] == 5.0
+
+
+def test_battery_units_get_slots_per_index():
+    store = ValueStore()
+    store.decode(
+        {
+            "battery": _battery(
+                {"batIndex": 0, "soc": 90, "totalVoltage": 5333},
+                {"batIndex": 1, "soc": 85, "totalVoltage": 5320},
+            )
+        }
+    )
+    assert store[store.slot(PER_BATTERY_GROUP, "soc", 0)] == 90.0
+    assert store[store.slot(PER_BATTERY_GROUP, "soc", 1)] == 85.0
+    assert store[store.slot(PER_BATTERY_GROUP, "totalVoltage", 0)] == pytest.approx(53.33)
+    assert store.slot(PER_BATTERY_GROUP, "soc", 0) != store.slot(PER_BATTERY_GROUP, "soc", 1)
+
+
+def test_battery_unit_that_drops_out_reads_unknown():
+    store = ValueStore()
+    store.decode({"battery": _battery({"batIndex": 0, "soc": 90}, {"batIndex": 1, "soc": 85})})
+    store.decode({"battery": _battery({"batIndex": 0, "soc": 91})})
+    assert store[store.slot(PER_BATTERY_GROUP, "soc", 0)] == 91.0
+    assert store[store.slot(PER_BATTERY_GROUP, "soc", 1)] is None
+    store.decode({"battery": None})
+    assert store[store.slot(PER_BATTERY_GROUP, "soc", 0)] is None
+
+
+def test_decode_group_only_touches_that_group():
+    store = ValueStore()
+    store.decode({"runtime": _Payload(ppv=1200)})
+    store.decode_group("analytics", None)
+    assert store[store.slot("runtime", "ppv")] == 1200.0
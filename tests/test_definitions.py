@@ -0,0 +1,74 @@
+"""Tests for the validated entity definition schema."""
+import pytest
+
+from custom_components.eg4_inverter.definitions import (
+    DEFINITION_LOOKUP,
+    EG4Definition,
+    _build_lookup,
+)
+
+
+@pytest.mark.parametrize(
+    ("fields", "problem"),
+    [
+        ({"key": ""}, "key must be a non-empty string"),
+        ({"name": None}, "name must be a non-empty string"),
+        ({"platform": "switch"}, "platform must be one of"),
+        ({"scale": 0}, "scale must be a non-zero number"),
+        ({"scale": "10"}, "scale must be a non-zero number"),
+        ({"calc": "ppv * 2"}, "calc must be callable"),
+        ({"platform": "binary_sensor", "unit": "W"}, "binary sensors take no unit"),
+        ({"platform": "binary_sensor", "scale": 0.1}, "binary sensors take no unit"),
+        ({"co2_parse": True}, "co2_parse needs a unit"),
+    ],
+)
+def test_invalid_definitions_are_rejected(fields, problem):
+    with pytest.raises(ValueError, match=problem):
+        EG4Definition(**{"key": "ppv", "name": "PV Power", **fields})
+
+
+def test_every_problem_is_reported_at_once():
+    with pytest.raises(ValueError) as err:
+        EG4Definition(key="", name="", scale=0)
+    message = str(err.value)
+    assert "key must" in message
+    assert "name must" in message
+    assert "scale must" in message
+
+
+def test_definitions_are_frozen():
+    definition = EG4Definition(key="ppv", name="PV Power", unit="W")
+    with pytest.raises(AttributeError):
+        definition.unit = "kW"
+
+
+def test_decode_by_kind():
+    assert EG4Definition(key="ppv", name="PV", unit="W").decode("1200") == 1200.0
+    assert EG4Definition(key="vBat", name="V", scale=0.1).decode(530) == pytest.approx(53.0)
+    assert EG4Definition(key="co2", name="CO2", unit="kg", co2_parse=True).decode(
+        "367.69 kG"
+    ) == pytest.approx(367.69)
+    assert EG4Definition(key="lost", name="Lost", platform="binary_sensor").decode(1) is True
+    assert EG4Definition(key="statusText", name="Status").decode("normal") == "normal"
+
+
+def test_duplicate_keys_in_a_group_are_rejected():
+    definition = EG4Definition(key="ppv", name="PV Power", unit="W")
+    with pytest.raises(ValueError, match="Duplicate EG4 definition runtime.ppv"):
+        _build_lookup({"runtime": (definition, definition)})
+
+
+def test_a_binary_sensor_may_share_a_sensor_key():
+    sensor = EG4Definition(key="lost", name="Lost Count")
+    binary = EG4Definition(key="lost", name="Lost", platform="binary_sensor")
+    assert len(_build_lookup({"runtime": (sensor, binary)})["runtime"]) == 2
+
+
+def test_battery_serial_is_read_as_text():
+    [definition] = [
+        definition
+        for key, _, definition in DEFINITION_LOOKUP["battery_units"]
+        if key == "batterySn"
+    ]
+    assert definition.unit is None
+    assert definition.decode("BAT1234") == "BAT1234"
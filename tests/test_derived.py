@@ -0,0 +1,110 @@
+"""Tests for user-defined derived sensors."""
+import pytest
+
+from custom_components.eg4_inverter.decoder import ValueStore
+from custom_components.eg4_inverter.derived import (
+    DERIVED_GROUP,
+    DerivedError,
+    DerivedSensors,
+    parse_derived,
+)
+
+
+def _evaluate(text: str, values: dict[tuple[str, str], float | None]):
+    store = ValueStore()
+    for (group, key), value in values.items():
+        store.values[store.slot(group, key)] = value
+    sensors = DerivedSensors(parse_derived(text), store)
+    return sensors.evaluate(), store
+
+
+def test_parse_name_unit_and_references():
+    (spec,) = parse_derived("Battery Net Power [W] = pDisCharge - pCharge")
+    assert spec.key == "battery_net_power"
+    assert spec.name == "Battery Net Power"
+    assert spec.unit == "W"
+    assert spec.references == {("runtime", "pDisCharge"), ("runtime", "pCharge")}
+
+
+def test_blank_lines_and_comments_are_skipped():
+    specs = parse_derived("\n# a comment\nNet = ppv - consumptionPower\n\n")
+    assert [spec.key for spec in specs] == ["net"]
+    assert specs[0].unit is None
+
+
+def test_evaluate_writes_results_into_the_store():
+    results, store = _evaluate(
+        "Net [W] = pDisCharge - pCharge\nShare [%] = round(100 * ppv / consumptionPower, 1)",
+        {
+            ("runtime", "pDisCharge"): 1200.0,
+            ("runtime", "pCharge"): 200.0,
+            ("runtime", "ppv"): 500.0,
+            ("runtime", "consumptionPower"): 2000.0,
+        },
+    )
+    assert results == {"net": 1000.0, "share": 25.0}
+    assert store[store.slot(DERIVED_GROUP, "net")] == 1000.0
+
+
+def test_group_qualified_names_resolve_ambiguous_keys():
+    results, _ = _evaluate(
+        "Soc Gap = runtime.soc - energy.soc",
+        {("runtime", "soc"): 80.0, ("energy", "soc"): 78.0},
+    )
+    assert results == {"soc_gap": 2.0}
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        {("runtime", "ppv"): None, ("runtime", "consumptionPower"): 100.0},
+        {("runtime", "ppv"): 100.0, ("runtime", "consumptionPower"): 0.0},
+    ],
+)
+def test_missing_input_or_division_by_zero_is_unknown(values):
+    results, _ = _evaluate("Ratio = ppv / consumptionPower", values)
+    assert results == {"ratio": None}
+
+
+def test_overflow_is_unknown():
+    results, _ = _evaluate("Huge = 10 ** 400 + ppv", {("runtime", "ppv"): 1.0})
+    assert results == {"huge": None}
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "no equals sign",
+        "A = ppv +",
+        "A = nosuchkey",
+        "A = soc",
+        "A = nosuchgroup.ppv",
+        "A = runtime.nosuchkey",
+        "A = runtime.ppv.real",
+        "A = (1).real",
+        "A = ppv[0]",
+        "A = max(*ppv)",
+        "A = open('x')",
+        "A = __import__('os')",
+        "A = ppv.__class__",
+        "A = 'text'",
+        "A = True",
+        "A = ppv if ppv else 0",
+        "A = ppv < 1",
+        "A = lambda: 1",
+        "A = abs(x=ppv)",
+        "A = abs()",
+        "A = ppv\x00",
+        "A = " + "(" * 5000 + "1" + ")" * 5000,
+        "A = ppv\nA = ppv",
+        "= ppv",
+    ],
+)
+def test_rejected_lines_raise_derived_error(text):
+    with pytest.raises(DerivedError):
+        parse_derived(text)
+
+
+def test_errors_name_the_line():
+    with pytest.raises(DerivedError, match="line 2"):
+        parse_derived("A = ppv\nB = ppv +")
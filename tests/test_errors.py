@@ -0,0 +1,95 @@
+"""Tests for fetch error classification and backoff."""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from aiohttp import ClientConnectionError, ClientResponseError, ContentTypeError
+from eg4_inverter_api import exceptions
+
+from custom_components.eg4_inverter.const import (
+    FETCH_BACKOFF_BASE_SECONDS,
+    FETCH_BACKOFF_MAX_SECONDS,
+)
+from custom_components.eg4_inverter.errors import (
+    FetchError,
+    FetchErrorTracker,
+    classify,
+    classify_payload,
+)
+
+
+def _response_error(status: int) -> ClientResponseError:
+    return ClientResponseError(MagicMock(), (), status=status)
+
+
+@pytest.mark.parametrize(
+    ("err", "expected"),
+    [
+        (asyncio.TimeoutError(), FetchError.TIMEOUT),
+        (TimeoutError(), FetchError.TIMEOUT),
+        (exceptions.EG4AuthError("bad password"), FetchError.AUTH),
+        (exceptions.EG4APIError("API request failed: 401"), FetchError.AUTH),
+        (exceptions.EG4APIError("API request failed: 403"), FetchError.AUTH),
+        (exceptions.EG4APIError("API request failed: 404"), FetchError.CLIENT),
+        (exceptions.EG4APIError("API request failed: 502"), FetchError.SERVER),
+        (exceptions.EG4APIError("something odd"), FetchError.SERVER),
+        (ContentTypeError(MagicMock(), ()), FetchError.DECODE),
+        (ValueError("bad model"), FetchError.DECODE),
+        (_response_error(503), FetchError.SERVER),
+        (_response_error(429), FetchError.CLIENT),
+        (_response_error(401), FetchError.AUTH),
+        (_response_error(403), FetchError.AUTH),
+        (ClientConnectionError(), FetchError.CONNECTION),
+    ],
+)
+def test_classify(err, expected):
+    assert classify(err, exceptions) is expected
+
+
+def test_classify_payload():
+    assert classify_payload(None) is FetchError.EMPTY
+    assert classify_payload(MagicMock(success=False)) is FetchError.REJECTED
+    assert classify_payload({"soc": 50}) is None
+    assert classify_payload({"success": False, "msg": "login"}) is FetchError.REJECTED
+
+
+def test_tracker_reports_first_failure_and_recovery():
+    tracker = FetchErrorTracker()
+    assert tracker.record("runtime", FetchError.TIMEOUT)
+    assert not tracker.record("runtime", FetchError.TIMEOUT)
+    assert tracker.counts["timeout"] == 2
+    assert tracker.total == 2
+    assert tracker.succeeded("runtime")
+    assert not tracker.succeeded("runtime")
+
+
+def test_server_errors_back_off_exponentially():
+    tracker = FetchErrorTracker()
+    with patch("custom_components.eg4_inverter.errors.time.monotonic") as monotonic:
+        monotonic.return_value = 0.0
+        tracker.record("energy", FetchError.SERVER)
+        monotonic.return_value = FETCH_BACKOFF_BASE_SECONDS - 1
+        assert tracker.backing_off("energy")
+        assert not tracker.backing_off("runtime")
+        monotonic.return_value = FETCH_BACKOFF_BASE_SECONDS
+        assert not tracker.backing_off("energy")
+
+        tracker.record("energy", FetchError.SERVER)
+        monotonic.return_value += 2 * FETCH_BACKOFF_BASE_SECONDS - 1
+        assert tracker.backing_off("energy")
+
+        for _ in range(10):
+            tracker.record("energy", FetchError.SERVER)
+        monotonic.return_value += FETCH_BACKOFF_MAX_SECONDS
+        assert not tracker.backing_off("energy")
+
+        tracker.succeeded("energy")
+        tracker.record("energy", FetchError.SERVER)
+        monotonic.return_value += FETCH_BACKOFF_BASE_SECONDS
+        assert not tracker.backing_off("energy")
+
+
+def test_other_errors_do_not_back_off():
+    tracker = FetchErrorTracker()
+    tracker.record("runtime", FetchError.TIMEOUT)
+    assert not tracker.backing_off("runtime")
@@ -0,0 +1,127 @@
+"""Tests for inverter state transitions and their device triggers."""
+import pytest
+import voluptuous as vol
+
+from homeassistant.core import callback
+
+from custom_components.eg4_inverter.const import (
+    DOMAIN,
+    EVENT_EG4_INVERTER,
+    TRIGGER_CAME_ONLINE,
+    TRIGGER_CHARGE_ALLOWED,
+    TRIGGER_CHARGE_INHIBITED,
+    TRIGGER_FAULT,
+    TRIGGER_FAULT_CLEARED,
+    TRIGGER_GENERATOR_STARTED,
+    TRIGGER_GENERATOR_STOPPED,
+    TRIGGER_TYPES,
+    TRIGGER_WENT_OFFLINE,
+)
+from custom_components.eg4_inverter.device_trigger import (
+    TRIGGER_SCHEMA,
+    async_attach_trigger,
+    async_get_triggers,
+)
+from custom_components.eg4_inverter.events import detect_transitions
+
+NORMAL = {"lost": False, "statusText": "normal", "bmsCharge": True, "soc": 80}
+
+
+def _runtime(**changes) -> dict:
+    return {**NORMAL, **changes}
+
+
+def _types(previous, current) -> list[str]:
+    return [trigger for trigger, _ in detect_transitions(previous, current)]
+
+
+def test_first_poll_reports_nothing():
+    assert detect_transitions(None, _runtime(lost=True)) == []
+    assert detect_transitions(_runtime(), None) == []
+    runtime = _runtime()
+    assert detect_transitions(runtime, runtime) == []
+
+
+def test_unchanged_runtime_reports_nothing():
+    assert detect_transitions(_runtime(), _runtime(ppv=1200)) == []
+
+
+def test_lost_edges():
+    assert _types(_runtime(), _runtime(lost=True)) == [TRIGGER_WENT_OFFLINE]
+    assert _types(_runtime(lost=True), _runtime()) == [TRIGGER_CAME_ONLINE]
+
+
+def test_fault_edges_carry_the_status():
+    [(trigger, details)] = detect_transitions(
+        _runtime(), _runtime(status=64, statusText="Fault")
+    )
+    assert trigger == TRIGGER_FAULT
+    assert details == {"status": 64, "status_text": "Fault", "previous_status_text": "normal"}
+    assert _types(_runtime(statusText="Fault"), _runtime()) == [TRIGGER_FAULT_CLEARED]
+
+
+def test_generator_edges_from_either_field():
+    assert _types(_runtime(), _runtime(_12KUsingGenerator=True)) == [TRIGGER_GENERATOR_STARTED]
+    [(trigger, details)] = detect_transitions(
+        _runtime(genDryContact="ON"), _runtime(genDryContact="OFF", genVolt=0)
+    )
+    assert trigger == TRIGGER_GENERATOR_STOPPED
+    assert details == {"gen_volt": 0}
+
+
+def test_bms_charge_edges():
+    [(trigger, details)] = detect_transitions(_runtime(), _runtime(bmsCharge=False, soc=100))
+    assert trigger == TRIGGER_CHARGE_INHIBITED
+    assert details == {"soc": 100}
+    assert _types(_runtime(bmsCharge=False), _runtime()) == [TRIGGER_CHARGE_ALLOWED]
+
+
+def test_simultaneous_edges_are_all_reported():
+    assert _types(_runtime(), _runtime(lost=True, statusText="Fault", bmsCharge=False)) == [
+        TRIGGER_WENT_OFFLINE,
+        TRIGGER_FAULT,
+        TRIGGER_CHARGE_INHIBITED,
+    ]
+
+
+def _trigger(trigger_type: str) -> dict:
+    return {"platform": "device", "domain": DOMAIN, "device_id": "device", "type": trigger_type}
+
+
+@pytest.mark.asyncio
+async def test_every_transition_is_offered_as_a_trigger():
+    triggers = await async_get_triggers(None, "device")
+    assert [trigger["type"] for trigger in triggers] == TRIGGER_TYPES
+    for trigger in triggers:
+        assert TRIGGER_SCHEMA(trigger) == trigger
+
+
+def test_schema_rejects_unknown_types():
+    with pytest.raises(vol.Invalid):
+        TRIGGER_SCHEMA(_trigger("exploded"))
+
+
+@pytest.mark.asyncio
+async def test_attached_trigger_fires_for_its_device_and_type_only(hass):
+    calls = []
+
+    @callback
+    def action(run_variables, context=None):
+        calls.append(run_variables["trigger"]["event"].data)
+
+    unsubscribe = await async_attach_trigger(
+        hass,
+        TRIGGER_SCHEMA(_trigger(TRIGGER_FAULT)),
+        action,
+        {"trigger_data": {}, "variables": {}},
+    )
+    hass.bus.async_fire(EVENT_EG4_INVERTER, {"device_id": "device", "type": TRIGGER_FAULT})
+    hass.bus.async_fire(EVENT_EG4_INVERTER, {"device_id": "other", "type": TRIGGER_FAULT})
+    hass.bus.async_fire(EVENT_EG4_INVERTER, {"device_id": "device", "type": TRIGGER_CAME_ONLINE})
+    await hass.async_block_till_done()
+    assert calls == [{"device_id": "device", "type": TRIGGER_FAULT}]
+
+    unsubscribe()
+    hass.bus.async_fire(EVENT_EG4_INVERTER, {"device_id": "device", "type": TRIGGER_FAULT})
+    await hass.async_block_till_done()
+    assert len(calls) == 1
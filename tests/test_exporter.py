@@ -0,0 +1,138 @@
+"""Tests for the time-series exporter."""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from aiohttp import ClientError
+
+from custom_components.eg4_inverter.decoder import ValueStore
+from custom_components.eg4_inverter.exporter import (
+    EG4Exporter,
+    format_influx,
+    format_prometheus,
+)
+
+POINTS = [
+    ("runtime", {"serial": "12 34,5"}, (("ppv", 1200.0), ("soc", 80.0))),
+    ("battery", {"serial": "1234", "battery": "0"}, (("soc", 90.5),)),
+]
+MODULE = "custom_components.eg4_inverter.exporter"
+
+
+def test_influx_lines_escape_tags_and_use_nanoseconds():
+    assert format_influx(POINTS, 1.5) == [
+        "eg4_runtime,serial=12\\ 34\\,5 ppv=1200.0,soc=80.0 1500000000",
+        "eg4_battery,serial=1234,battery=0 soc=90.5 1500000000",
+    ]
+
+
+def test_prometheus_samples_one_per_field_in_milliseconds():
+    points = [("runtime", {"serial": 'a"b'}, (("ppv", 1200.0), ("soc", 80.0)))]
+    assert format_prometheus(points, 1.5) == [
+        'eg4_runtime_ppv{serial="a\\"b"} 1200.0 1500',
+        'eg4_runtime_soc{serial="a\\"b"} 80.0 1500',
+    ]
+
+
+def _exporter(queue_size: int = 120) -> EG4Exporter:
+    store = ValueStore()
+    store.values[store.slot("runtime", "ppv")] = 1200.0
+    store.values[store.slot("runtime", "statusText")] = "normal"
+    with patch(f"{MODULE}.EXPORT_QUEUE_SIZE", queue_size):
+        exporter = EG4Exporter(None, "1234", store)
+    exporter.configure("http://influx/write", "influx")
+    return exporter
+
+
+def test_only_numeric_known_values_are_collected():
+    exporter = _exporter()
+    [(measurement, tags, fields)] = exporter._collect({})
+    assert (measurement, tags) == ("runtime", {"serial": "1234"})
+    assert fields == (("ppv", 1200.0),)
+
+
+def test_nothing_is_queued_while_turned_off():
+    exporter = _exporter()
+    exporter.configure(None, "influx")
+    exporter.async_enqueue(1.0, {})
+    assert exporter.queue_depth == 0
+
+
+def test_full_queue_drops_the_oldest_snapshot():
+    exporter = _exporter(queue_size=3)
+    for timestamp in range(5):
+        exporter.async_enqueue(float(timestamp), {})
+    assert exporter.queue_depth == 3
+    assert exporter.dropped == 2
+    assert [exporter._queue.get_nowait()[0] for _ in range(3)] == [2.0, 3.0, 4.0]
+
+
+async def _run_until(exporter: EG4Exporter, condition) -> None:
+    with patch(f"{MODULE}.EXPORT_FLUSH_SECONDS", 0):
+        task = asyncio.create_task(exporter.async_run())
+        try:
+            for _ in range(100):
+                await asyncio.sleep(0)
+                if condition():
+                    break
+        finally:
+            task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_requeued_in_order():
+    exporter = _exporter()
+    batches = []
+
+    async def write(batch):
+        batches.append([timestamp for timestamp, _ in batch])
+        if len(batches) == 1:
+            raise ClientError("down")
+
+    exporter._async_write = write
+    for timestamp in range(3):
+        exporter.async_enqueue(float(timestamp), {})
+    await _run_until(exporter, lambda: exporter.written == 3)
+    assert batches == [[0.0, 1.0, 2.0], [0.0, 1.0, 2.0]]
+    assert exporter.dropped == 0
+
+
+@pytest.mark.asyncio
+async def test_requeue_drops_what_no_longer_fits():
+    exporter = _exporter(queue_size=3)
+    for timestamp in range(3):
+        exporter.async_enqueue(float(timestamp), {})
+
+    async def write(batch):
+        # More snapshots arrive while the write is failing
+        exporter.async_enqueue(10.0, {})
+        exporter.async_enqueue(11.0, {})
+        raise ClientError("down")
+
+    exporter._async_write = write
+    with patch(f"{MODULE}.EXPORT_QUEUE_SIZE", 3):
+        await _run_until(exporter, lambda: exporter.dropped)
+    assert exporter.dropped == 2
+    assert [exporter._queue.get_nowait()[0] for _ in range(3)] == [2.0, 10.0, 11.0]
+
+
+@pytest.mark.asyncio
+async def test_unexpected_error_drops_the_batch_and_keeps_exporting(caplog):
+    exporter = _exporter()
+    batches = []
+
+    async def write(batch):
+        batches.append([timestamp for timestamp, _ in batch])
+        if len(batches) == 1:
+            # The next poll's snapshot arrives while this batch fails
+            exporter.async_enqueue(1.0, {})
+            raise ValueError("bad value")
+
+    exporter._async_write = write
+    exporter.async_enqueue(0.0, {})
+    await _run_until(exporter, lambda: exporter.written)
+    assert batches == [[0.0], [1.0]]
+    assert exporter.dropped == 1
+    assert "Dropping an EG4 export batch" in caplog.text
@@ -0,0 +1,85 @@
+"""Tests for the snapshot ring buffer and its exports."""
+import csv
+import io
+from types import SimpleNamespace
+
+from custom_components.eg4_inverter.decoder import ValueStore
+from custom_components.eg4_inverter.history import SnapshotRing
+
+
+class _Payload(SimpleNamespace):
+    """A client model: fields it was not given read as None."""
+
+    def __getattr__(self, name):
+        return None
+
+
+def _ring(size: int) -> tuple[SnapshotRing, ValueStore]:
+    store = ValueStore()
+    return SnapshotRing(size, store), store
+
+
+def _append(ring: SnapshotRing, store: ValueStore, timestamp: float, ppv) -> None:
+    store.decode({"runtime": _Payload(ppv=ppv)})
+    ring.append(timestamp)
+
+
+def _ppv_column(ring: SnapshotRing) -> int:
+    return ring.columns.index("runtime.ppv")
+
+
+def test_only_numeric_sensors_are_columns():
+    ring, _ = _ring(3)
+    assert "runtime.ppv" in ring.columns
+    assert "energy.soc" in ring.columns
+    assert "runtime.statusText" not in ring.columns
+
+
+def test_rows_come_out_oldest_first():
+    ring, store = _ring(3)
+    _append(ring, store, 1.0, 100)
+    _append(ring, store, 2.0, 200)
+    column = _ppv_column(ring)
+    assert len(ring) == 2
+    assert [(ts, values[column]) for ts, values in ring.rows()] == [(1.0, 100.0), (2.0, 200.0)]
+
+
+def test_wraparound_keeps_the_latest_rows():
+    ring, store = _ring(3)
+    for second in range(1, 8):
+        _append(ring, store, float(second), second * 100)
+    column = _ppv_column(ring)
+    assert len(ring) == 3
+    assert [(ts, values[column]) for ts, values in ring.rows()] == [
+        (5.0, 500.0),
+        (6.0, 600.0),
+        (7.0, 700.0),
+    ]
+
+
+def test_json_export_turns_missing_values_into_null():
+    ring, store = _ring(2)
+    _append(ring, store, 1.0, None)
+    _append(ring, store, 2.0, 300)
+    exported = ring.as_json()
+    column = exported["columns"].index("runtime.ppv")
+    assert exported["columns"][0] == "timestamp"
+    assert [row[0] for row in exported["rows"]] == [1.0, 2.0]
+    assert [row[column] for row in exported["rows"]] == [None, 300.0]
+
+
+def test_csv_export_leaves_missing_values_blank():
+    ring, store = _ring(2)
+    _append(ring, store, 1.0, None)
+    _append(ring, store, 2.0, 300)
+    header, *rows = csv.reader(io.StringIO(ring.as_csv()))
+    column = header.index("runtime.ppv")
+    assert header[0] == "timestamp"
+    assert [row[column] for row in rows] == ["", "300.0"]
+    assert len(rows) == 2
+
+
+def test_empty_ring_exports_only_the_header():
+    ring, _ = _ring(2)
+    assert ring.as_json()["rows"] == []
+    assert ring.as_csv().splitlines() == [",".join(["timestamp", *ring.columns])]
@@ -0,0 +1,56 @@
+"""Tests for config entry migration."""
+import pytest
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.eg4_inverter import async_migrate_entry
+from custom_components.eg4_inverter.const import DOMAIN
+
+SERIAL = "1234567890"
+BASE_URL = "https://monitor.eg4electronics.com"
+V1_TITLE = f"EG4 Inverter Integration - {BASE_URL}"
+
+
+def _v1_entry(hass, **data) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=1,
+        title=V1_TITLE,
+        unique_id=V1_TITLE,
+        data={"username": "user", "password": "secret", "base_url": BASE_URL, **data},
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.mark.asyncio
+async def test_v1_entry_takes_its_serial_as_unique_id(hass):
+    entry = _v1_entry(hass, serial_number=SERIAL)
+    assert await async_migrate_entry(hass, entry)
+    assert entry.version == 2
+    assert entry.unique_id == SERIAL
+    assert entry.title == V1_TITLE
+
+
+@pytest.mark.asyncio
+async def test_v1_entry_keeps_its_unique_id_when_the_serial_is_taken(hass):
+    MockConfigEntry(domain=DOMAIN, version=2, unique_id=SERIAL).add_to_hass(hass)
+    entry = _v1_entry(hass, serial_number=SERIAL)
+    assert await async_migrate_entry(hass, entry)
+    assert entry.version == 2
+    assert entry.unique_id == V1_TITLE
+
+
+@pytest.mark.asyncio
+async def test_v1_entry_without_a_serial_keeps_its_unique_id(hass):
+    entry = _v1_entry(hass)
+    assert await async_migrate_entry(hass, entry)
+    assert entry.version == 2
+    assert entry.unique_id == V1_TITLE
+
+
+@pytest.mark.asyncio
+async def test_entries_from_a_newer_version_are_refused(hass):
+    entry = MockConfigEntry(domain=DOMAIN, version=3, unique_id=SERIAL)
+    entry.add_to_hass(hass)
+    assert not await async_migrate_entry(hass, entry)
@@ -0,0 +1,57 @@
+"""Tests for loop lag and blocking step detection."""
+import asyncio
+import logging
+import time
+
+import pytest
+
+from custom_components.eg4_inverter.instrumentation import LoopInstrumentation
+
+
+async def _instrumented(instrumentation: LoopInstrumentation, step: str, block: float):
+    async with instrumentation.cycle():
+        # Let the sampler take its first beat
+        await asyncio.sleep(0.01)
+        with instrumentation.in_step(step):
+            time.sleep(block)
+        # Give the sampler the loop back so it can measure the stall
+        await asyncio.sleep(0.1)
+
+
+@pytest.mark.asyncio
+async def test_blocking_step_is_counted_and_logged(caplog):
+    instrumentation = LoopInstrumentation("EG4 test")
+    instrumentation.configure(True)
+    try:
+        with caplog.at_level(logging.WARNING):
+            await _instrumented(instrumentation, "decode", 0.3)
+    finally:
+        instrumentation.async_stop()
+    assert instrumentation.blocking_steps == 1
+    assert instrumentation.last_max_lag >= 0.25
+    assert "blocked for" in caplog.text
+    assert "in step decode" in caplog.text
+    # The watchdog caught the loop thread inside the blocking call
+    assert "time.sleep(block)" in caplog.text
+    assert instrumentation.step is None
+
+
+@pytest.mark.asyncio
+async def test_short_steps_are_not_reported():
+    instrumentation = LoopInstrumentation("EG4 test")
+    instrumentation.configure(True)
+    try:
+        await _instrumented(instrumentation, "decode", 0.001)
+    finally:
+        instrumentation.async_stop()
+    assert instrumentation.blocking_steps == 0
+    assert instrumentation.last_max_lag < instrumentation.threshold
+
+
+def test_steps_nest_and_unwind():
+    instrumentation = LoopInstrumentation("EG4 test")
+    with instrumentation.in_step("login"):
+        with instrumentation.in_step("set_selected_inverter"):
+            assert instrumentation.step == "set_selected_inverter"
+        assert instrumentation.step == "login"
+    assert instrumentation.step is None
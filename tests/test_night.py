@@ -0,0 +1,82 @@
+"""Tests for night mode."""
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from custom_components.eg4_inverter.const import (
+    NIGHT_ENERGY_INTERVAL_SECONDS,
+    NIGHT_INTERVAL_FACTOR,
+    NIGHT_PV_ZERO_SECONDS,
+)
+from custom_components.eg4_inverter.night import (
+    STATE_ABOVE_HORIZON,
+    STATE_BELOW_HORIZON,
+    NightMode,
+)
+
+
+def _night(sun: str | None = None) -> NightMode:
+    hass = MagicMock()
+    hass.states.get.return_value = None if sun is None else SimpleNamespace(state=sun)
+    night = NightMode(hass)
+    night.configure(True)
+    return night
+
+
+def test_disabled_night_mode_never_sleeps():
+    night = _night(STATE_BELOW_HORIZON)
+    night.configure(False)
+    assert not night.observe(0.0, 0.0)
+    assert night.factor == 1
+
+
+def test_sleeps_when_the_sun_is_down_and_wakes_on_pv():
+    night = _night(STATE_BELOW_HORIZON)
+    assert night.observe(0.0, 0.0)
+    assert night.asleep
+    assert night.factor == NIGHT_INTERVAL_FACTOR
+    # Any PV power wakes it, whatever the sun entity says
+    assert night.observe(50.0, 60.0)
+    assert not night.asleep
+
+
+def test_stays_awake_while_the_sun_is_up():
+    night = _night(STATE_ABOVE_HORIZON)
+    assert not night.observe(0.0, 0.0)
+    assert not night.observe(0.0, NIGHT_PV_ZERO_SECONDS * 2)
+
+
+def test_without_the_sun_entity_sleeps_after_zero_pv_for_a_while():
+    night = _night()
+    assert not night.observe(0.0, 0.0)
+    assert not night.observe(None, NIGHT_PV_ZERO_SECONDS - 1)
+    assert night.observe(0.0, NIGHT_PV_ZERO_SECONDS)
+    assert night.asleep
+
+
+def test_sunrise_and_disabling_wake_it():
+    night = _night(STATE_BELOW_HORIZON)
+    night.observe(0.0, 0.0)
+    assert night.sun_rose()
+    assert not night.sun_rose()
+    night.observe(0.0, 1.0)
+    assert night.configure(False)
+    assert not night.asleep
+
+
+def test_energy_is_read_less_often_while_asleep():
+    night = _night(STATE_BELOW_HORIZON)
+    assert night.energy_due(0.0)
+    night.observe(0.0, 0.0)
+    assert night.energy_due(10.0)
+    assert not night.energy_due(20.0)
+    assert night.energy_due(10.0 + NIGHT_ENERGY_INTERVAL_SECONDS)
+    assert night.requests_saved == 1
+
+
+def test_stretched_polls_count_the_day_polls_they_replace():
+    night = _night(STATE_BELOW_HORIZON)
+    night.note_poll(3)
+    assert night.requests_saved == 0
+    night.observe(0.0, 0.0)
+    night.note_poll(3)
+    assert night.requests_saved == (NIGHT_INTERVAL_FACTOR - 1) * 3
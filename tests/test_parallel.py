@@ -0,0 +1,117 @@
+"""Tests for totalling paralleled inverters as one system."""
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from custom_components.eg4_inverter.const import DATA_SYSTEMS, DOMAIN
+from custom_components.eg4_inverter.decoder import ValueStore
+from custom_components.eg4_inverter.parallel import (
+    MEMBERS_REPORTING,
+    EG4SystemCoordinator,
+    async_hand_over_system,
+    async_join_system,
+    async_leave_system,
+    parallel_group,
+)
+
+INVERTERS = [
+    {"serialNum": "A", "plantId": 7, "plantName": "Home", "parallelGroup": "A1"},
+    {"serialNum": "B", "plantId": 7, "plantName": "Home", "parallelGroup": "A1"},
+    {"serialNum": "C", "plantId": 7, "plantName": "Home", "parallelGroup": ""},
+]
+
+
+def _member(serial: str, ppv=None, soc=None, ok: bool = True) -> SimpleNamespace:
+    values = ValueStore()
+    values.values[values.slot("runtime", "ppv")] = ppv
+    values.values[values.slot("runtime", "soc")] = soc
+    return SimpleNamespace(
+        entry=SimpleNamespace(entry_id=f"entry_{serial}"),
+        serial_number=serial,
+        inverters=INVERTERS,
+        values=values,
+        last_update_success=ok,
+        system=None,
+        async_refresh=AsyncMock(),
+    )
+
+
+def test_parallel_group_of_an_inverter():
+    assert parallel_group(INVERTERS, "A") == ("7_A1", "Home A1")
+    assert parallel_group(INVERTERS, "C") is None
+    assert parallel_group(INVERTERS, "Z") is None
+    assert parallel_group(None, "A") is None
+
+
+@pytest.mark.asyncio
+async def test_aggregate_sums_and_averages_reporting_members(hass):
+    system = EG4SystemCoordinator(hass, "7_A1", "Home A1")
+    for member in (
+        _member("A", ppv=1000.0, soc=80.0),
+        _member("B", ppv=500.5, soc=None),
+        _member("C", ppv=9999.0, soc=10.0, ok=False),
+    ):
+        system.async_add_member(member)
+    totals = system.aggregate()
+    assert totals[MEMBERS_REPORTING] == 2
+    assert totals["ppv"] == 1500.5
+    assert totals["soc"] == 80.0
+    assert totals["pToGrid"] is None
+
+
+@pytest.mark.asyncio
+async def test_refresh_polls_every_member(hass):
+    system = EG4SystemCoordinator(hass, "7_A1", "Home A1")
+    members = [_member("A", ppv=1.0), _member("B", ppv=2.0)]
+    for member in members:
+        system.async_add_member(member)
+    await system.async_refresh()
+    for member in members:
+        member.async_refresh.assert_awaited_once()
+    assert system.data["ppv"] == 3.0
+
+
+@pytest.mark.asyncio
+async def test_members_join_and_leave_one_system(hass):
+    first, second, alone = _member("A", ppv=1.0), _member("B", ppv=2.0), _member("C")
+    system = first.system = async_join_system(hass, first)
+    assert async_join_system(hass, second) is system
+    second.system = system
+    assert async_join_system(hass, alone) is None
+    assert system.leader is first
+    assert system.owner == "entry_A"
+    assert system.data["ppv"] == 3.0
+    assert hass.data[DOMAIN][DATA_SYSTEMS] == {"7_A1": system}
+
+    async_leave_system(hass, first)
+    assert first.system is None
+    assert system.leader is second
+    assert system.aggregate()["ppv"] == 2.0
+
+    async_leave_system(hass, second)
+    assert hass.data[DOMAIN][DATA_SYSTEMS] == {}
+
+
+@pytest.mark.asyncio
+async def test_removed_owner_hands_the_system_to_the_next_member(hass):
+    first, second = _member("A", ppv=1.0), _member("B", ppv=2.0)
+    system = first.system = async_join_system(hass, first)
+    second.system = async_join_system(hass, second)
+    with (
+        patch.object(hass.config_entries, "async_unload_platforms", AsyncMock()) as unload,
+        patch.object(hass.config_entries, "async_forward_entry_setups", AsyncMock()) as setup,
+    ):
+        # A reload leaves and rejoins: the owner keeps its system sensors
+        async_leave_system(hass, first)
+        assert system.owner == "entry_A"
+
+        await async_hand_over_system(hass, "entry_A")
+        assert system.owner == "entry_B"
+        unload.assert_awaited_once_with(second.entry, ["sensor"])
+        setup.assert_awaited_once_with(second.entry, ["sensor"])
+
+        # Removing a member that does not own the system changes nothing
+        await async_hand_over_system(hass, "entry_C")
+        assert system.owner == "entry_B"
+        assert setup.await_count == 1
@@ -0,0 +1,60 @@
+"""Tests for the poll profiler started by the profile service."""
+import tracemalloc
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.eg4_inverter.profiler import ProfileSession
+
+
+async def _poll(session: ProfileSession) -> None:
+    async with session.cycle():
+        sum(range(100))
+
+
+@pytest.fixture
+def not_tracing():
+    assert not tracemalloc.is_tracing()
+    yield
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        pytest.fail("tracemalloc was left running")
+
+
+@pytest.mark.asyncio
+async def test_a_refused_profiler_starts_no_tracing(not_tracing):
+    session = ProfileSession(MagicMock(), 3, memory=True)
+    session._profile = MagicMock()
+    session._profile.enable.side_effect = ValueError("Another profiling tool is already active")
+    await _poll(session)
+    assert session.remaining == 0
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.asyncio
+async def test_tracing_stops_once_every_entry_has_unloaded(not_tracing):
+    session = ProfileSession(MagicMock(), 3, memory=True, members=2)
+    await _poll(session)
+    assert tracemalloc.is_tracing()
+    assert session.remaining == 2
+    session.async_release()
+    assert tracemalloc.is_tracing()
+    session.async_release()
+    assert session.remaining == 0
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.asyncio
+async def test_finished_session_writes_and_reports_its_results(hass, tmp_path, not_tracing):
+    hass.config.config_dir = str(tmp_path)
+    session = ProfileSession(hass, 2, memory=True)
+    with patch(
+        "custom_components.eg4_inverter.profiler.persistent_notification.async_create"
+    ) as notify:
+        await _poll(session)
+        await _poll(session)
+        await hass.async_block_till_done()
+    assert not tracemalloc.is_tracing()
+    assert len(list(tmp_path.glob("*.pstats"))) == 1
+    assert len(list(tmp_path.glob("*.tracemalloc"))) == 1
+    assert "Profiled 2 EG4 poll(s)." in notify.call_args.args[1]
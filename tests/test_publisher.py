@@ -0,0 +1,195 @@
+"""Tests for the MQTT publisher, against a mocked broker."""
+import asyncio
+import contextlib
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from homeassistant.exceptions import HomeAssistantError
+
+from custom_components.eg4_inverter.const import MQTT_MODE_CHANGES, MQTT_MODE_SNAPSHOT
+from custom_components.eg4_inverter.decoder import ValueStore
+from custom_components.eg4_inverter.publisher import EG4MqttPublisher
+
+SERIAL = "1234567890"
+
+
+async def _stop(task: asyncio.Task) -> None:
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+
+async def _publish_batches(publisher, store, snapshots):
+    """Decode and enqueue each snapshot; return what each one published."""
+    published = []
+    batches = []
+
+    async def async_publish(hass, topic, payload, qos, retain):
+        assert retain
+        published.append((topic, payload))
+
+    with patch(
+        "homeassistant.components.mqtt.async_wait_for_mqtt_client",
+        AsyncMock(return_value=True),
+    ), patch("homeassistant.components.mqtt.async_publish", async_publish):
+        task = asyncio.create_task(publisher.async_run())
+        try:
+            for data in snapshots:
+                store.decode(data)
+                publisher.async_enqueue(data)
+                for _ in range(5):
+                    await asyncio.sleep(0)
+                batches.append(dict(published))
+                published.clear()
+        finally:
+            await _stop(task)
+    return batches
+
+
+@pytest.mark.asyncio
+async def test_publishes_retained_values_and_availability():
+    store = ValueStore()
+    publisher = EG4MqttPublisher(MagicMock(), SERIAL, store)
+    publisher.configure("eg4/", MQTT_MODE_SNAPSHOT, False)
+
+    (batch,) = await _publish_batches(publisher, store, [{"runtime": {"ppv": 1200}}])
+
+    assert batch[f"eg4/{SERIAL}/runtime/ppv"] == str(store[store.slot("runtime", "ppv")])
+    assert batch[f"eg4/{SERIAL}/availability"] == "online"
+    # Groups missing from the snapshot are not published at all
+    assert not any(f"/{SERIAL}/energy/" in topic for topic in batch)
+    assert publisher.messages == len(batch)
+
+
+@pytest.mark.asyncio
+async def test_changes_mode_only_publishes_moved_values():
+    store = ValueStore()
+    publisher = EG4MqttPublisher(MagicMock(), SERIAL, store)
+    publisher.configure("eg4", MQTT_MODE_CHANGES, False)
+
+    first, repeat, moved = await _publish_batches(
+        publisher,
+        store,
+        [
+            {"runtime": {"ppv": 1200, "soc": 80}},
+            {"runtime": {"ppv": 1200, "soc": 80}},
+            {"runtime": {"ppv": 1500, "soc": 80}},
+        ],
+    )
+
+    assert f"eg4/{SERIAL}/runtime/soc" in first
+    assert repeat == {}
+    assert f"eg4/{SERIAL}/runtime/ppv" in moved
+    assert f"eg4/{SERIAL}/runtime/soc" not in moved
+    assert f"eg4/{SERIAL}/availability" not in moved
+
+
+@pytest.mark.asyncio
+async def test_discovery_configs_are_published_once():
+    store = ValueStore()
+    publisher = EG4MqttPublisher(MagicMock(), SERIAL, store)
+    publisher.configure("eg4", MQTT_MODE_SNAPSHOT, True)
+
+    first, second = await _publish_batches(
+        publisher,
+        store,
+        [{"runtime": {"ppv": 1200}}, {"runtime": {"ppv": 1300}}],
+    )
+
+    config_topic = f"homeassistant/sensor/eg4_inverter_{SERIAL}/runtime_ppv/config"
+    config = json.loads(first[config_topic])
+    assert config["state_topic"] == f"eg4/{SERIAL}/runtime/ppv"
+    assert config["availability_topic"] == f"eg4/{SERIAL}/availability"
+    assert config["unit_of_measurement"] == "W"
+    assert config_topic not in second
+
+
+@pytest.mark.asyncio
+async def test_failed_publish_is_retried_with_the_next_snapshot():
+    store = ValueStore()
+    publisher = EG4MqttPublisher(MagicMock(), SERIAL, store)
+    publisher.configure("eg4", MQTT_MODE_CHANGES, False)
+    attempts = []
+
+    async def async_publish(hass, topic, payload, qos, retain):
+        attempts.append(topic)
+        if len(attempts) == 1:
+            raise HomeAssistantError("broker went away")
+
+    data = {"runtime": {"ppv": 1200}}
+    with patch(
+        "homeassistant.components.mqtt.async_wait_for_mqtt_client",
+        AsyncMock(return_value=True),
+    ), patch("homeassistant.components.mqtt.async_publish", async_publish):
+        task = asyncio.create_task(publisher.async_run())
+        try:
+            store.decode(data)
+            publisher.async_enqueue(data)
+            for _ in range(5):
+                await asyncio.sleep(0)
+            assert publisher.messages == 0
+            failed_topic = attempts[0]
+
+            # Unchanged values, but the failed batch goes out with this one
+            publisher.async_enqueue(data)
+            for _ in range(5):
+                await asyncio.sleep(0)
+        finally:
+            await _stop(task)
+
+    assert attempts.count(failed_topic) == 2
+    assert f"eg4/{SERIAL}/runtime/ppv" in publisher._published
+
+
+@pytest.mark.asyncio
+async def test_unavailable_is_published_as_offline():
+    store = ValueStore()
+    publisher = EG4MqttPublisher(MagicMock(), SERIAL, store)
+    publisher.configure("eg4", MQTT_MODE_CHANGES, False)
+    publisher.async_set_unavailable()
+    assert publisher._pending == {f"eg4/{SERIAL}/availability": "offline"}
+
+
+@pytest.mark.asyncio
+async def test_disabled_publisher_queues_nothing():
+    store = ValueStore()
+    publisher = EG4MqttPublisher(MagicMock(), SERIAL, store)
+    publisher.configure("", MQTT_MODE_SNAPSHOT, False)
+    data = {"runtime": {"ppv": 1200}}
+    store.decode(data)
+    publisher.async_enqueue(data)
+    publisher.async_set_unavailable()
+    assert publisher._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_unknown_values_are_published_as_none():
+    store = ValueStore()
+    publisher = EG4MqttPublisher(MagicMock(), SERIAL, store)
+    publisher.configure("eg4", MQTT_MODE_SNAPSHOT, False)
+
+    (batch,) = await _publish_batches(publisher, store, [{"runtime": {"ppv": "--"}}])
+
+    assert batch[f"eg4/{SERIAL}/runtime/ppv"] == "None"
+
+
+@pytest.mark.asyncio
+async def test_discovery_configs_follow_the_prefix_and_are_cleared_when_off():
+    store = ValueStore()
+    publisher = EG4MqttPublisher(MagicMock(), SERIAL, store)
+    publisher.configure("eg4", MQTT_MODE_SNAPSHOT, True)
+    config_topic = f"homeassistant/sensor/eg4_inverter_{SERIAL}/runtime_ppv/config"
+    data = {"runtime": {"ppv": 1200}}
+    await _publish_batches(publisher, store, [data])
+
+    # A new prefix rewrites the same config topics with the new state topics
+    publisher.configure("solar", MQTT_MODE_SNAPSHOT, True)
+    (moved,) = await _publish_batches(publisher, store, [data])
+    assert json.loads(moved[config_topic])["state_topic"] == f"solar/{SERIAL}/runtime/ppv"
+
+    # Turning publishing off removes the sensors it had announced
+    publisher.configure("", MQTT_MODE_SNAPSHOT, True)
+    (cleared,) = await _publish_batches(publisher, store, [data])
+    assert cleared[config_topic] == ""
+    assert not any(topic.startswith("solar/") for topic in cleared)
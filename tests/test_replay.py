@@ -0,0 +1,174 @@
+"""Tests for recording portal responses and replaying them."""
+import asyncio
+import json
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from eg4_inverter_api import EG4InverterAPI
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.eg4_inverter.const import CAPTURE_DIR, DOMAIN
+from custom_components.eg4_inverter.coordinator import EG4DataCoordinator
+from custom_components.eg4_inverter.decoder import ValueStore
+from custom_components.eg4_inverter.replay import (
+    CaptureSession,
+    CaptureWriter,
+    ReplaySession,
+    load_capture,
+)
+
+BASE_URL = "https://portal"
+SERIAL = "1234567890"
+LOGIN = {
+    "success": True,
+    "plants": [{"plantId": 1, "name": "Home", "inverters": [{"serialNum": SERIAL}]}],
+}
+
+
+class _Response:
+    def __init__(self, body) -> None:
+        self.status = 200
+        self._body = body
+
+    async def json(self, *args, **kwargs):
+        return self._body
+
+    async def text(self, *args, **kwargs):
+        return json.dumps(self._body)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+
+class _Portal:
+    """Answers like the portal; counts what reaches it."""
+
+    closed = False
+
+    def __init__(self) -> None:
+        self.ppv = 1200
+        self.requests = []
+
+    def request(self, method, url, **kwargs):
+        self.requests.append((method, url, kwargs.get("data")))
+        if url.endswith("/WManage/api/login"):
+            return _Response(LOGIN)
+        return _Response({"success": True, "ppv": self.ppv, "statusText": "normal"})
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+def _hass() -> MagicMock:
+    hass = MagicMock()
+
+    async def executor(target, *args):
+        return target(*args)
+
+    hass.async_add_executor_job = executor
+    hass.async_create_task = asyncio.ensure_future
+    return hass
+
+
+async def _poll(session) -> ValueStore:
+    api = EG4InverterAPI("user", "secret", base_url=BASE_URL, session=session)
+    await api.login()
+    api.set_selected_inverter(serialNum=SERIAL)
+    store = ValueStore()
+    store.decode({"runtime": await api.get_inverter_runtime_async()})
+    return store
+
+
+def _ppv(store: ValueStore):
+    return store[store.slot("runtime", "ppv")]
+
+
+def _coordinator(hass, **options) -> EG4DataCoordinator:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            "username": "user",
+            "password": "secret",
+            "base_url": BASE_URL,
+            "serial_number": SERIAL,
+            "ignore_ssl": True,
+        },
+        options=options,
+    )
+    entry.add_to_hass(hass)
+    return EG4DataCoordinator(hass, entry)
+
+
+async def _poll_runtime(coordinator: EG4DataCoordinator):
+    await coordinator._async_setup()
+    await coordinator._async_login_and_select_inverter()
+    return await coordinator.api.get_inverter_runtime_async()
+
+
+@pytest.mark.asyncio
+async def test_capture_replays_to_the_same_decoded_values(tmp_path):
+    portal = _Portal()
+    writer = CaptureWriter(_hass(), tmp_path / "capture.jsonl.gz")
+    live = await _poll(CaptureSession(portal, writer))
+    await writer.async_flush()
+
+    records = load_capture(writer.path)
+    assert [record["path"] for record in records] == [
+        "/WManage/api/login",
+        "/WManage/api/inverter/getInverterRuntime",
+    ]
+    # The login body carries the password and is never written
+    assert records[0]["data"] is None
+    assert "secret" not in (tmp_path / "capture.jsonl.gz").read_bytes().decode("latin-1")
+
+    portal.ppv = 0
+    replayed = await _poll(ReplaySession(records, speed=0))
+    assert _ppv(replayed) == _ppv(live) == 1200.0
+    assert len(portal.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_entries_ignoring_ssl_still_capture_and_replay(hass, tmp_path):
+    # The library drops a provided session when logging in with ignore_ssl
+    hass.config.config_dir = str(tmp_path)
+    portal = _Portal()
+    live = _coordinator(hass, capture=True)
+    live._session = portal
+    with patch("custom_components.eg4_inverter.replay.CAPTURE_FLUSH_RECORDS", 1):
+        runtime = await _poll_runtime(live)
+        await hass.async_block_till_done()
+    assert len(portal.requests) == 2
+    (capture,) = Path(hass.config.path(CAPTURE_DIR)).iterdir()
+
+    replay = _coordinator(hass, replay_path=str(capture), replay_speed=0)
+    replayed = await _poll_runtime(replay)
+    assert replayed.ppv == runtime.ppv == 1200
+    assert len(portal.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_replay_without_a_recording_answers_not_found():
+    session = ReplaySession([], speed=0)
+    url = f"{BASE_URL}/WManage/api/inverter/getInverterRuntime"
+    async with session.post(url) as response:
+        assert response.status == 404
+        assert (await response.json())["success"] is False
+
+
+@pytest.mark.asyncio
+async def test_fast_replay_walks_the_recording_and_wraps():
+    records = [
+        {"t": float(t), "method": "POST", "path": "/x", "data": "a", "status": 200, "body": t}
+        for t in range(3)
+    ]
+    session = ReplaySession(records, speed=0)
+    bodies = []
+    for _ in range(4):
+        async with session.post(f"{BASE_URL}/x", data="a") as response:
+            bodies.append(await response.json())
+    assert bodies == [0, 1, 2, 0]
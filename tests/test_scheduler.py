@@ -0,0 +1,142 @@
+"""Tests for the fleet poll scheduler and its shared rate limit."""
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from custom_components.eg4_inverter.scheduler import EG4FleetScheduler, TokenBucket
+
+
+class _Coordinator:
+    """Just enough of a coordinator for the scheduler; refreshes block on ``release``."""
+
+    def __init__(self, delay: float | None = 0.0, system=None) -> None:
+        self.poll_interval = timedelta(seconds=30)
+        self.cadence = SimpleNamespace(next_delay=lambda now, interval: delay)
+        self.system = system
+        self.release = asyncio.Event()
+        self.running = 0
+        self.most_running = 0
+        self.refreshes = 0
+
+    async def async_refresh(self) -> None:
+        self.refreshes += 1
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        try:
+            await self.release.wait()
+        finally:
+            self.running -= 1
+
+
+def _scheduler() -> EG4FleetScheduler:
+    loop = asyncio.get_running_loop()
+    hass = MagicMock()
+    hass.loop = loop
+    hass.async_create_background_task = lambda coro, name: loop.create_task(coro)
+    return EG4FleetScheduler(hass)
+
+
+async def _settle(seconds: float = 0.05) -> None:
+    await asyncio.sleep(seconds)
+
+
+def _no_jitter():
+    return patch("custom_components.eg4_inverter.scheduler.random.uniform", return_value=0.0)
+
+
+@pytest.mark.asyncio
+async def test_bucket_admits_a_burst_then_paces():
+    bucket = TokenBucket(rate=50.0, burst=3)
+    waits = [await bucket.async_acquire() for _ in range(4)]
+    assert all(wait < 0.01 for wait in waits[:3])
+    assert waits[3] >= 0.015
+    assert bucket.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_bucket_serves_waiters_in_order():
+    bucket = TokenBucket(rate=100.0, burst=1)
+    served = []
+
+    async def acquire(name: str) -> None:
+        await bucket.async_acquire()
+        served.append(name)
+
+    await asyncio.gather(*(acquire(name) for name in "abcd"))
+    assert served == list("abcd")
+
+
+@pytest.mark.asyncio
+async def test_polling_entries_are_spread_over_the_interval():
+    scheduler = _scheduler()
+    scheduler.async_register("a", _Coordinator(delay=None))
+    scheduler.async_register("b", _Coordinator(delay=None))
+    try:
+        assert [slot.offset for slot in scheduler._slots.values()] == [0.0, 15.0]
+    finally:
+        scheduler.async_unregister("a")
+        scheduler.async_unregister("b")
+
+
+@pytest.mark.asyncio
+async def test_parallel_members_are_left_to_their_leader():
+    leader = _Coordinator(delay=None)
+    system = SimpleNamespace(leader=leader)
+    leader.system = system
+    member = _Coordinator(delay=None, system=system)
+    scheduler = _scheduler()
+    scheduler.async_register("leader", leader)
+    scheduler.async_register("member", member)
+    try:
+        assert scheduler._slots["leader"].handle is not None
+        assert scheduler._slots["member"].handle is None
+        assert scheduler._slots["member"].planned is None
+    finally:
+        scheduler.async_unregister("leader")
+        scheduler.async_unregister("member")
+
+
+@pytest.mark.asyncio
+async def test_rescheduling_during_a_poll_never_overlaps_it():
+    coordinator = _Coordinator(delay=0.0)
+    scheduler = _scheduler()
+    with _no_jitter():
+        scheduler.async_register("a", coordinator)
+        try:
+            await _settle()
+            assert coordinator.running == 1
+            slot = scheduler._slots["a"]
+
+            # Options changed mid-poll: the slot is not re-armed while it runs
+            for _ in range(3):
+                scheduler.async_reschedule("a")
+                assert slot.handle is None
+            await _settle()
+            assert coordinator.most_running == 1
+            assert coordinator.refreshes == 1
+
+            # The finished poll arms the next one itself
+            coordinator.release.set()
+            await _settle()
+            assert coordinator.refreshes > 1
+            assert coordinator.most_running == 1
+        finally:
+            scheduler.async_unregister("a")
+            await _settle(0)
+
+
+@pytest.mark.asyncio
+async def test_unregister_cancels_a_running_poll():
+    coordinator = _Coordinator(delay=0.0)
+    scheduler = _scheduler()
+    with _no_jitter():
+        scheduler.async_register("a", coordinator)
+        await _settle()
+    task = scheduler._slots["a"].task
+    scheduler.async_unregister("a")
+    await _settle(0)
+    assert task.cancelled()
+    assert scheduler.stats("a")["fleetSize"] == 0
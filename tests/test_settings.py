@@ -0,0 +1,91 @@
+"""Tests for the holding-parameter journal."""
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.eg4_inverter.const import SETTINGS_JOURNAL_SIZE
+from custom_components.eg4_inverter.settings import SettingsJournal
+
+
+def _journal(stored: dict | None = None) -> tuple[SettingsJournal, MagicMock]:
+    store = MagicMock()
+    store.async_load = AsyncMock(return_value=stored)
+    with patch("custom_components.eg4_inverter.settings.Store", return_value=store):
+        journal = SettingsJournal(MagicMock(), "entry")
+    return journal, store
+
+
+def _saved(store: MagicMock) -> dict:
+    return store.async_delay_save.call_args[0][0]()
+
+
+@pytest.mark.asyncio
+async def test_first_dump_is_the_baseline():
+    journal, store = _journal()
+    assert await journal.async_update({"chargeRate": 50, "acCharge": True}, 1.0) == {
+        "chargeRate",
+        "acCharge",
+    }
+    assert list(journal.changes) == []
+    assert _saved(store) == {"current": {"chargeRate": 50, "acCharge": True}, "changes": []}
+
+
+@pytest.mark.asyncio
+async def test_only_changed_keys_are_journaled():
+    journal, store = _journal()
+    await journal.async_update({"chargeRate": 50, "acCharge": True}, 1.0)
+    store.async_delay_save.reset_mock()
+
+    assert await journal.async_update({"chargeRate": 50, "acCharge": True}, 2.0) == set()
+    store.async_delay_save.assert_not_called()
+
+    changed = await journal.async_update(
+        SimpleNamespace(chargeRate=80, acCharge=True, eps=False), 3.0
+    )
+    assert changed == {"chargeRate", "eps"}
+    assert sorted(journal.changes) == [[3.0, "chargeRate", 50, 80], [3.0, "eps", None, False]]
+    assert _saved(store)["current"] == {"chargeRate": 80, "acCharge": True, "eps": False}
+
+
+@pytest.mark.asyncio
+async def test_journal_is_bounded():
+    journal, _ = _journal()
+    await journal.async_update({"chargeRate": 0}, 0.0)
+    for rate in range(1, SETTINGS_JOURNAL_SIZE + 6):
+        await journal.async_update({"chargeRate": rate}, float(rate))
+    assert len(journal.changes) == SETTINGS_JOURNAL_SIZE
+    assert journal.changes[-1] == [
+        float(SETTINGS_JOURNAL_SIZE + 5),
+        "chargeRate",
+        SETTINGS_JOURNAL_SIZE + 4,
+        SETTINGS_JOURNAL_SIZE + 5,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_changes_while_down_show_up_on_the_first_read():
+    stored = {"current": {"chargeRate": 50}, "changes": [[1.0, "chargeRate", 40, 50]]}
+    journal, store = _journal(stored)
+    assert await journal.async_update({"chargeRate": 60}, 2.0) == {"chargeRate"}
+    assert list(journal.changes) == [[1.0, "chargeRate", 40, 50], [2.0, "chargeRate", 50, 60]]
+    store.async_load.assert_awaited_once()
+
+    await journal.async_update({"chargeRate": 70}, 3.0)
+    store.async_load.assert_awaited_once()
+
+
+def test_listeners_are_called_for_their_own_key_only():
+    journal, _ = _journal()
+    rate, eps = MagicMock(), MagicMock()
+    remove_rate = journal.async_add_listener("chargeRate", rate)
+    journal.async_add_listener("eps", eps)
+
+    journal.async_notify({"chargeRate", "acCharge"})
+    rate.assert_called_once()
+    eps.assert_not_called()
+
+    remove_rate()
+    journal.async_notify({"chargeRate", "eps"})
+    rate.assert_called_once()
+    eps.assert_called_once()
@@ -0,0 +1,92 @@
+"""Tests for working out which endpoints an entry polls."""
+import pytest
+
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.eg4_inverter.const import (
+    CONF_DERIVED,
+    CONF_PRESET,
+    DOMAIN,
+    PRESET_FULL,
+    PRESET_MINIMAL,
+)
+from custom_components.eg4_inverter.subset import entity_group, required_endpoints
+
+
+def _entry(hass, **options) -> MockConfigEntry:
+    entry = MockConfigEntry(domain=DOMAIN, options=options)
+    entry.add_to_hass(hass)
+    return entry
+
+
+def _register(hass, entry, *unique_ids: str, disabled: bool = False) -> None:
+    registry = er.async_get(hass)
+    for unique_id in unique_ids:
+        registry.async_get_or_create(
+            "sensor",
+            DOMAIN,
+            f"{entry.entry_id}_{unique_id}",
+            config_entry=entry,
+            disabled_by=er.RegistryEntryDisabler.USER if disabled else None,
+        )
+
+
+def test_unique_ids_map_back_to_their_group():
+    assert entity_group("e_runtime_ppv", "e") == "runtime"
+    assert entity_group("e_battery_remainCapacity", "e") == "battery"
+    assert entity_group("e_battery_0_soc", "e") == "battery_units"
+    assert entity_group("e_nosuchgroup_x", "e") is None
+    assert entity_group("other_runtime_ppv", "e") is None
+
+
+@pytest.mark.asyncio
+async def test_new_entry_polls_every_endpoint_of_its_preset(hass):
+    full = _entry(hass, **{CONF_PRESET: PRESET_FULL})
+    minimal = _entry(hass, **{CONF_PRESET: PRESET_MINIMAL})
+    assert required_endpoints(hass, full) == {"runtime", "energy", "battery", "settings"}
+    assert required_endpoints(hass, minimal) == {"runtime", "energy"}
+
+
+@pytest.mark.asyncio
+async def test_endpoints_of_disabled_entities_are_skipped(hass):
+    entry = _entry(hass, **{CONF_PRESET: PRESET_FULL})
+    _register(
+        hass, entry, "energy_todayYieldingText", "energy_totalYieldingText", disabled=True
+    )
+    _register(hass, entry, "settings_notice", disabled=True)
+    _register(hass, entry, "runtime_ppv", disabled=True)
+    assert required_endpoints(hass, entry) == {"runtime", "battery"}
+
+    # One enabled entity is enough to keep its endpoint
+    _register(hass, entry, "energy_todayChargingText")
+    assert required_endpoints(hass, entry) == {"runtime", "energy", "battery"}
+
+
+@pytest.mark.asyncio
+async def test_battery_is_kept_while_per_battery_entities_are_enabled(hass):
+    entry = _entry(hass, **{CONF_PRESET: PRESET_FULL})
+    _register(hass, entry, "battery_remainCapacity", "battery_fullCapacity", disabled=True)
+    _register(hass, entry, "battery_0_soc")
+    assert "battery" in required_endpoints(hass, entry)
+
+
+@pytest.mark.asyncio
+async def test_endpoints_read_by_derived_sensors_are_kept(hass):
+    entry = _entry(
+        hass,
+        **{
+            CONF_PRESET: PRESET_MINIMAL,
+            CONF_DERIVED: "Stored [Ah] = battery.remainCapacity\nToday = todayYieldingText",
+        },
+    )
+    _register(hass, entry, "energy_todayYieldingText", disabled=True)
+    assert required_endpoints(hass, entry) == {"runtime", "energy", "battery"}
+
+
+@pytest.mark.asyncio
+async def test_unparseable_derived_sensors_add_no_endpoints(hass):
+    entry = _entry(
+        hass, **{CONF_PRESET: PRESET_MINIMAL, CONF_DERIVED: "Broken = battery.nosuchkey"}
+    )
+    assert required_endpoints(hass, entry) == {"runtime", "energy"}